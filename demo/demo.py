@@ -1,52 +1,147 @@
+import os
 from json import load as load_json
-from subprocess import run as sp_run
-from flask import Flask, url_for, request, render_template
+from os.path import join as joinpath
+from flask import Flask, url_for, request, render_template, jsonify
+from subprocess import DEVNULL, PIPE, run as sp_run
+from jobs import DONE, FAILED, JobQueue, QueueFull
+from result_cache import DiskResultCache, MemoryResultCache, result_key
+from tango import tracing
+from tango.sandbox_pool import DEMO_IMAGE, DockerSandbox, ProcessSandbox, SandboxPool
 from pretty_msgs import from_validation, from_quality
 
 app = Flask(__name__)
 
+# Each job is graded in its own directory under /tango/jobs, which is /tmp/tango/jobs on the docker host
+SCRATCH_ROOT = "/tango/jobs"
+HOST_SCRATCH_ROOT = "/tmp/tango/jobs"
+# How long a client should wait before resubmitting when the queue is full
+RETRY_AFTER_SECONDS = 5
+MAX_WORKERS = os.cpu_count() or 1
+# Grading sandboxes are started before their jobs arrive, but each grades a single job: student code runs in it
+SANDBOX_MAX_JOBS = 1
+# Results of unchanged resubmissions are reused for an hour, unless one of their tests errored.
+# TANGO_RESULT_CACHE is "memory" (the default), "disk" to share them between processes in TANGO_RESULT_CACHE_DIR,
+# or "off"
+RESULT_CACHE_TTL = 3600
 
-@app.route('/')
-def index():
-    with open("./edukate_demo.html") as f:
-        return f.read()
 
+def make_result_cache():
+    """
+    Create the cache of results chosen by TANGO_RESULT_CACHE.
 
-@app.route('/test', methods=["POST"])
-def test_code():
-    with open("/tango/src/demo.R", "w") as r_code:
-        r_code.write(request.form["code"])
-    with open("/tango/testcases/demo.R", "w") as r_test:
-        r_test.write(request.form["tests"])
-    sp_run([
-        "docker", "run", "--rm",
-        "--mount", "type=bind,src=/tmp/tango/src,dst=/home/tango/src,readonly=true",
-        "--mount", "type=bind,src=/tmp/tango/testcases,dst=/home/tango/testcases,readonly=true",
-        "--mount", "type=bind,src=/tmp/tango/out,dst=/home/tango/out",
-        "awoolley10/tango-demo"
-    ])
-    with open("/tango/out/validation.json") as v_json:
+    Returns:
+        (MemoryResultCache | DiskResultCache | None): The cache, or None if results aren't cached.
+    """
+    storage = os.environ.get("TANGO_RESULT_CACHE", "memory")
+    if storage == "disk":
+        return DiskResultCache(os.environ.get("TANGO_RESULT_CACHE_DIR", "/tango/results"), ttl=RESULT_CACHE_TTL)
+    if storage == "memory":
+        return MemoryResultCache(ttl=RESULT_CACHE_TTL)
+    return None
+
+
+def toolchain_version():
+    """
+    Identify the grader, so that results aren't reused once it changes.
+
+    Results depend on the exercise and the grader, which are both in the grading image.
+
+    Returns:
+        (str): TANGO_TOOLCHAIN_VERSION, or else the id of the grading image, or "local" if neither is known.
+    """
+    version = os.environ.get("TANGO_TOOLCHAIN_VERSION")
+    if version is None and os.environ.get("TANGO_SANDBOX") != "process":
+        inspect = sp_run(
+            ["docker", "image", "inspect", "--format", "{{.Id}}", DEMO_IMAGE],
+            stdout=PIPE, stderr=DEVNULL, encoding="utf-8"
+        )
+        version = inspect.stdout.strip()
+    return version or "local"
+
+
+def start_sandbox():
+    """
+    Start a sandbox for the pool to grade submissions in.
+
+    Returns:
+        (ProcessSandbox): A docker container of the grading image, or with TANGO_SANDBOX=process a local
+            run_tests.py, e.g. when the demo itself runs inside the grading image.
+    """
+    if os.environ.get("TANGO_SANDBOX") == "process":
+        return ProcessSandbox(["python3", "/home/tango/run_tests.py", "/home/tango/config.yaml", "--serve"])
+    return DockerSandbox(SCRATCH_ROOT, HOST_SCRATCH_ROOT)
+
+
+def cached_result(submission):
+    """
+    Find the result of grading an identical submission.
+
+    Args:
+        submission (dict[str: str]): The submitted "code" and "tests".
+
+    Returns:
+        (tuple[str | None, dict | None]): The key to store the submission's result under, or None if results
+            aren't cached, and the cached result, or None if there isn't one.
+    """
+    if result_cache is None:
+        return None, None
+    key = result_key(submission["code"], submission["tests"], TOOLCHAIN_VERSION)
+    return key, result_cache.get(key)
+
+
+def record_trace(out_dir):
+    """
+    Add the spans the sandbox logged while grading a job to the latency histograms, see run_tests.py.
+
+    Args:
+        out_dir (str): The job's out/ directory, where the sandbox wrote trace.ndjson with the results.
+    """
+    try:
+        with open(joinpath(out_dir, "trace.ndjson")) as trace:
+            for span in tracing.read_spans(trace):
+                metrics.record(span)
+    except FileNotFoundError:
+        pass
+
+
+def grade(submission, scratch_dir):
+    """
+    Grade a submission in a sandbox, run by the job queue.
+
+    Args:
+        submission (dict[str: str]): The submitted "code" and "tests", and the "cache_key" to store the result under.
+        scratch_dir (str): The job's scratch directory, which the submission is graded in.
+
+    Returns:
+        (dict[str: Any]): The feedback to render with feedback.j2.
+    """
+    for directory in ("src", "testcases", "out"):
+        os.makedirs(joinpath(scratch_dir, directory))
+    with open(joinpath(scratch_dir, "src", "demo.R"), "w") as r_code:
+        r_code.write(submission["code"])
+    with open(joinpath(scratch_dir, "testcases", "demo.R"), "w") as r_test:
+        r_test.write(submission["tests"])
+
+    out_dir = joinpath(scratch_dir, "out")
+    try:
+        with tracing.span("sandbox", kind="demo"):
+            sandboxes.run(scratch_dir)
+    finally:
+        record_trace(out_dir)
+
+    with open(joinpath(out_dir, "validation.json")) as v_json:
         validation_result = from_validation(load_json(v_json)["runners"][0])
     if len(validation_result["successes"]) == 3:
-        with open("/tango/out/quality.json") as q_json:
+        with open(joinpath(out_dir, "quality.json")) as q_json:
             q_res = load_json(q_json)["runners"][0]
         q_e = from_quality(q_res["errors"])  # Quality errors
         q_score = round(100 * q_res["score"])
 
-        with open("/tango/out/evaluation.json") as e_json:
+        with open(joinpath(out_dir, "evaluation.json")) as e_json:
             e_res = load_json(e_json)["runners"][0]
-        try:
-            e_s = e_res["successes"]
-        except KeyError:
-            e_s = []
-        try:
-            e_f = e_res["failures"]
-        except KeyError:
-            e_f = []
-        try:
-            e_e = e_res["errors"]
-        except KeyError:
-            e_e = []
+        e_s = e_res.get("successes", [])
+        e_f = e_res.get("failures", [])
+        e_e = e_res.get("errors", [])
     else:
         q_e = None
         q_score = None
@@ -54,8 +149,7 @@ def test_code():
         e_f = None
         e_e = None
 
-    return render_template(
-        "feedback.j2",
+    result = dict(
         v_s=validation_result["successes"],
         v_f=validation_result["failures"],
         v_e=validation_result["errors"],
@@ -65,6 +159,125 @@ def test_code():
         e_f=e_f,
         e_e=e_e
     )
+    # Only successful grades are reused: a test which errored, e.g. by timing out while the server was busy,
+    # might pass if the submission is graded again
+    if submission.get("cache_key") is not None and not e_e:
+        result_cache.put(submission["cache_key"], result)
+    return result
+
+
+os.makedirs(SCRATCH_ROOT, exist_ok=True)
+# Latency histograms of each stage of grading, served at /metrics
+metrics = tracing.HistogramRegistry()
+tracing.enable_tracing(metrics)
+result_cache = make_result_cache()
+TOOLCHAIN_VERSION = toolchain_version()
+sandboxes = SandboxPool(start_sandbox, size=MAX_WORKERS, max_jobs=SANDBOX_MAX_JOBS)
+jobs = JobQueue(grade, max_workers=MAX_WORKERS, scratch_root=SCRATCH_ROOT)
+
+
+def queue_full_response():
+    """
+    Tell the client to resubmit later because the job queue is full.
+
+    Returns:
+        (tuple): A 503 response with a Retry-After header.
+    """
+    return jsonify(error="Too many submissions are being graded, try again shortly"), 503, {
+        "Retry-After": str(RETRY_AFTER_SECONDS)
+    }
+
+
+@app.route('/')
+def index():
+    """
+    Serve the demo's editor page.
+
+    Returns:
+        (str): The page's HTML.
+    """
+    with open("./edukate_demo.html") as f:
+        return f.read()
+
+
+@app.route('/test', methods=["POST"])
+def test_code():
+    """
+    Grade code and tests submitted from the editor, waiting for the result.
+
+    Returns:
+        (str | tuple): The rendered feedback, or an error response if grading failed or the queue is full.
+    """
+    submission = {"code": request.form["code"], "tests": request.form["tests"]}
+    submission["cache_key"], result = cached_result(submission)
+    if result is not None:
+        return render_template("feedback.j2", **result)
+
+    # Graded by the job queue too, so synchronous requests can't overload the server or overwrite each other
+    try:
+        job_id = jobs.submit(submission)
+    except QueueFull:
+        return queue_full_response()
+    job = jobs.wait(job_id)
+    if job.status == FAILED:
+        return jsonify(error=job.error), 500
+    return render_template("feedback.j2", **job.result)
+
+
+@app.route('/jobs', methods=["POST"])
+def submit_job():
+    """
+    Queue a submission sent as JSON or a form, without waiting for it to be graded.
+
+    Returns:
+        (tuple): A 202 response with the job's id and the URL to poll for its result,
+            or an error response if the submission is incomplete or the queue is full.
+    """
+    submission = request.get_json(silent=True) or request.form
+    if "code" not in submission or "tests" not in submission:
+        return jsonify(error="A job needs 'code' and 'tests'"), 400
+    submission = {"code": submission["code"], "tests": submission["tests"]}
+    submission["cache_key"], result = cached_result(submission)
+    if result is not None:
+        job_id = jobs.add_result(result)
+    else:
+        try:
+            job_id = jobs.submit(submission)
+        except QueueFull:
+            return queue_full_response()
+    location = url_for("get_job", job_id=job_id)
+    return jsonify(id=job_id, url=location), 202, {"Location": location}
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """
+    Describe a job, with its rendered feedback once it has been graded.
+
+    Args:
+        job_id (str): The id of the job.
+
+    Returns:
+        (flask.Response): The job's status and result or error, or a 404 response if there is no such job.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify(error=f"No job {job_id}"), 404
+    description = job.to_json()
+    if job.status == DONE:
+        description["feedback"] = render_template("feedback.j2", **job.result)
+    return jsonify(description)
+
+
+@app.route('/metrics')
+def get_metrics():
+    """
+    Serve the latency histograms of each stage of grading for Prometheus to scrape.
+
+    Returns:
+        (tuple): The histograms in the Prometheus text format.
+    """
+    return metrics.prometheus_text(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
 
 with app.test_request_context():
@@ -75,4 +288,4 @@ with app.test_request_context():
     url_for("static", filename='r.js')
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000)
+    app.run(host="0.0.0.0", port=8000, threaded=True)
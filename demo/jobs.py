@@ -0,0 +1,206 @@
+"""A bounded queue of grading jobs run by a fixed pool of worker threads, each job in its own scratch directory."""
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+__author__ = "Aidan Woolley"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class Job:
+    """A job's status and, once it has finished, its result or error."""
+
+    def __init__(self, payload):
+        """
+        Create a queued job.
+
+        Args:
+            payload (Any): The arguments of the job.
+        """
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_json(self):
+        """
+        Describe the job for the API.
+
+        Returns:
+            (dict[str: Any]): The job's id and status, with its result or error once it has finished.
+        """
+        description = {"id": self.id, "status": self.status}
+        if self.status == DONE:
+            description["result"] = self.result
+        elif self.status == FAILED:
+            description["error"] = self.error
+        return description
+
+
+class JobQueue:
+    """
+    Runs jobs on a fixed number of worker threads, refusing new jobs while too many are waiting.
+
+    Every job gets a new scratch directory, deleted once it has finished, so concurrent jobs can't overwrite each
+    other's files. Finished jobs are remembered until `max_finished` newer jobs have finished.
+    """
+
+    def __init__(self, run_job, max_workers=None, max_queued=None, max_finished=1000, scratch_root=None):
+        """
+        Start the worker threads.
+
+        Args:
+            run_job (Callable[[Any, str], Any]): Runs a job given its payload and scratch directory,
+                returning its result.
+            max_workers (int | None): Number of jobs to run at once, defaults to the number of CPUs.
+            max_queued (int | None): Number of jobs which may wait to run, defaults to 4 per worker.
+            max_finished (int): Number of finished jobs to remember.
+            scratch_root (str | None): Directory to create scratch directories in, defaults to the system's.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_finished = max_finished
+        self.scratch_root = scratch_root
+        self._run_job = run_job
+        self._queue = queue.Queue(maxsize=max_queued or 4 * self.max_workers)
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, payload):
+        """
+        Queue a job.
+
+        Args:
+            payload (Any): The arguments of the job, passed to `run_job`.
+
+        Returns:
+            (str): The id of the job.
+
+        Raises:
+            QueueFull: If the queue is full; the client should retry later.
+        """
+        job = Job(payload)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFull(f"{self._queue.maxsize} jobs are already waiting")
+        return job.id
+
+    def add_result(self, result):
+        """
+        Record a job which already has its result, e.g. from a cache, without queueing it.
+
+        Args:
+            result (Any): The job's result.
+
+        Returns:
+            (str): The id of the finished job.
+        """
+        job = Job(None)
+        job.result = result
+        job.status = DONE
+        job.finished = time.time()
+        job.done.set()
+        with self._lock:
+            self._jobs[job.id] = job
+        self._forget_old_jobs(job)
+        return job.id
+
+    def get(self, job_id):
+        """
+        Find a job.
+
+        Args:
+            job_id (str): The id returned by `submit`.
+
+        Returns:
+            (Job | None): The job, or None if there is no such job or it finished too long ago.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """
+        Wait for a job to finish.
+
+        Args:
+            job_id (str): The id returned by `submit`.
+            timeout (float | None): Seconds to wait, forever if None.
+
+        Returns:
+            (Job | None): The job, which is unfinished if the timeout expired, or None if there is no such job.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def queued(self):
+        """
+        Count the jobs waiting to run.
+
+        Returns:
+            (int): The approximate number of queued jobs.
+        """
+        return self._queue.qsize()
+
+    def _work(self):
+        """Run queued jobs until the process exits."""
+        while True:
+            job = self._queue.get()
+            job.status = RUNNING
+            scratch_dir = tempfile.mkdtemp(prefix=f"job-{job.id}-", dir=self.scratch_root)
+            try:
+                job.result = self._run_job(job.payload, scratch_dir)
+                job.status = DONE
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = FAILED
+            finally:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+                job.payload = None  # Don't keep submissions in memory once they're graded
+                job.finished = time.time()
+                self._forget_old_jobs(job)
+                job.done.set()
+                self._queue.task_done()
+
+    def _forget_old_jobs(self, job):
+        """
+        Remember that `job` has finished, forgetting the oldest finished jobs beyond `max_finished`.
+
+        Args:
+            job (Job): The job which just finished.
+        """
+        with self._lock:
+            self._finished[job.id] = job
+            while len(self._finished) > self.max_finished:
+                old_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(old_id, None)
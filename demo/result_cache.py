@@ -0,0 +1,211 @@
+"""Caches of graded results keyed by the submission, its tests and the toolchain, kept in memory or on disk."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+from os.path import join as joinpath
+
+__author__ = "Aidan Woolley"
+
+
+def result_key(code, tests, toolchain_version):
+    """
+    Hash everything a graded result depends on.
+
+    Args:
+        code (str): The submitted R code.
+        tests (str): The R tests it is graded with.
+        toolchain_version (str): Identifies the grader, e.g. the id of the grading image.
+
+    Returns:
+        (str): Hex digest identifying the result.
+    """
+    digest = hashlib.sha256()
+    for part in (code, tests, toolchain_version):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MemoryResultCache:
+    """An LRU cache of results in this process, whose entries expire `ttl` seconds after they are stored."""
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int): Number of results above which the least recently used are evicted.
+            ttl (float): Seconds a result is used for.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Find a result.
+
+        Args:
+            key (str): The key from `result_key`.
+
+        Returns:
+            (Any | None): The result, or None if it isn't cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        """
+        Store a result.
+
+        Args:
+            key (str): The key from `result_key`.
+            result (Any): The result.
+        """
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskResultCache:
+    """
+    An LRU cache of JSON results in a local directory, whose entries expire `ttl` seconds after they are stored.
+
+    Several processes may share the directory. Entries are written atomically, and their modification times record
+    when they were last used.
+    """
+
+    def __init__(self, directory, max_entries=10000, ttl=3600):
+        """
+        Create a cache in `directory`, which is created if it doesn't exist.
+
+        Args:
+            directory (str): Directory to store results in.
+            max_entries (int): Number of results above which the least recently used are evicted.
+            ttl (float): Seconds a result is used for.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._count = None  # Number of entries, counted lazily on the first write
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        """
+        Get the path at which the result for `key` is stored.
+
+        Args:
+            key (str): The key from `result_key`.
+
+        Returns:
+            (str): Path to the entry.
+        """
+        return joinpath(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Find a result.
+
+        Args:
+            key (str): The key from `result_key`.
+
+        Returns:
+            (Any | None): The result, or None if it isn't cached or has expired.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            if entry["expires"] < time.time():
+                os.remove(path)
+                entry = None
+            else:
+                os.utime(path)
+        except (OSError, ValueError, KeyError):
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["result"]
+
+    def put(self, key, result):
+        """
+        Store a result.
+
+        Args:
+            key (str): The key from `result_key`.
+            result (Any): The result, which must be JSON serialisable.
+        """
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                json.dump({"expires": time.time() + self.ttl, "result": result}, tmp)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._count is None:
+                self._count = len(self._entries())
+            elif is_new:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._count = self._evict()
+
+    def _entries(self):
+        """
+        List the stored results.
+
+        Returns:
+            (list[tuple[float, str]]): The modification time and path of each entry, least recently used first.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass  # Evicted by another process
+        return sorted(entries)
+
+    def _evict(self):
+        """
+        Delete the least recently used results until at most 90% of `max_entries` are left.
+
+        Returns:
+            (int): The number of results left.
+        """
+        entries = self._entries()
+        excess = len(entries) - int(0.9 * self.max_entries)
+        for _, path in entries[:max(excess, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(entries) - max(excess, 0)
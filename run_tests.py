@@ -1,27 +1,132 @@
+import shutil
 import sys
 
+from glob import glob
 from json import dump as json_dump
-from os.path import abspath
-from subprocess import run as sp_run
+from os.path import abspath, basename, dirname, join as joinpath
 
 from tango import Linter
 from tango import Validator
+from tango import r_pool
+from tango import tracing
+from tango.config import load_config
+from tango.orchestrator import run_tests
+from tango.pipeline import FAIL_FAST
+from tango.r_pool import RWorkerPool
 
-if __name__ == '__main__':
-    config_yaml_path = abspath(sys.argv[1])
+TANGO_HOME = "/home/tango"
+TRACE_FILE = "trace.ndjson"
+
+
+def grade(config_yaml_path, out_dir, session=None):
+    """
+    Validate, lint and test a submission, writing validation.json, quality.json and evaluation.json to `out_dir`.
+
+    R commands are run by the pool enabled in `tango.r_pool`, if any, or else by one-shot Rscript processes.
+
+    Args:
+        config_yaml_path (str): Path to the exercise's config.yaml, next to the submission's src/ and testcases/.
+        out_dir (str): Directory to write the results to.
+        session (RWorkerPool | None): A single worker to run the tests in, see `grade_in_session`.
 
-    v_res = Validator.validate(config_yaml_path)
-    with open("/home/tango/out/validation.json", "w") as v_file:
+    Returns:
+        (bool): False if the submission failed validation, so was neither linted nor tested.
+    """
+    # Reject submissions with the cheapest failing check, unless the exercise asks for full validation feedback
+    config = load_config(config_yaml_path)
+    policy = config.validation_policy or FAIL_FAST
+    # A session's R process is only used by this thread, so its files are validated one at a time
+    v_res = Validator.validate(config_yaml_path, max_workers=1 if session else None, policy=policy)
+    with open(joinpath(out_dir, "validation.json"), "w") as v_file:
         json_dump(v_res, v_file)
 
     if v_res["runners"][0]["errors"] or v_res["runners"][0]["failures"]:
         # Code is syntactically incorrect or using forbidden libs/funcs
-        # Exit early
-        exit(-1)
+        return False
+
+    Linter.lint_to_file(config_yaml_path, joinpath(out_dir, "quality.json"))
+
+    # Each test file is evaluated in its own R process, or in turn in the session, so a slow file only times out
+    # its own tests
+    run_tests(
+        config_yaml_path,
+        joinpath(TANGO_HOME, "tester.R"),
+        joinpath(out_dir, "evaluation.json"),
+        max_workers=config.max_workers,
+        timeout=config.test_timeout,
+        session=session
+    )
+    return True
+
+
+def grade_in_session(config_yaml_path, out_dir):
+    """
+    Grade a submission as `grade` does, running validation, linting and the tests all in one R process.
 
-    l_res = Linter.lint(config_yaml_path)
-    with open("/home/tango/out/quality.json", "w") as q_file:
-        json_dump(l_res, q_file)
+    R would otherwise start about five times. The session is only replaced if a test file times out, or it grows
+    too large.
 
-    # Actual test evaluation is handled entirely in R
-    sp_run(["Rscript", "/home/tango/tester.R"], timeout=60)
+    Args:
+        config_yaml_path (str): Path to the exercise's config.yaml, next to the submission's src/ and testcases/.
+        out_dir (str): Directory to write the results to.
+
+    Returns:
+        (bool): False if the submission failed validation, so was neither linted nor tested.
+    """
+    session = RWorkerPool(size=1)
+    try:
+        with r_pool.use_pool(session):
+            return grade(config_yaml_path, out_dir, session)
+    finally:
+        session.close()
+
+
+def serve(config_yaml_path, in_session=False):
+    """
+    Grade one job directory per line of stdin, replying with a line each, see `tango.sandbox_pool`.
+
+    A job directory holds the submission's src/ and testcases/, and its results are written to its out/.
+
+    Args:
+        config_yaml_path (str): Path to the exercise's config.yaml, copied to each job directory.
+        in_session (bool): Grade each job in its own R session, rather than validating and linting every job on
+            shared warm R workers.
+    """
+    if in_session:
+        grade_job = grade_in_session
+    else:
+        r_pool.enable_pool(size=1)
+        grade_job = grade
+    for line in sys.stdin:
+        job_dir = line.strip()
+        if not job_dir:
+            continue
+        try:
+            # The testing tools are sourced relative to the config, so each job gets its own copies
+            shutil.copy(config_yaml_path, joinpath(job_dir, "config.yaml"))
+            for tool in glob(joinpath(dirname(config_yaml_path), "*.R")):
+                shutil.copy(tool, joinpath(job_dir, basename(tool)))
+            # The spans of grading are logged with the results, for the caller's metrics
+            with open(joinpath(job_dir, "out", TRACE_FILE), "w") as trace:
+                tracing.enable_tracing(tracing.JsonLogSink(trace))
+                try:
+                    grade_job(joinpath(job_dir, "config.yaml"), joinpath(job_dir, "out"))
+                finally:
+                    tracing.disable_tracing()
+            reply = "ok"
+        except Exception as e:
+            reply = "error: " + f"{type(e).__name__}: {e}".replace("\n", " ")
+        sys.stdout.write(reply + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    config_yaml_path = abspath(sys.argv[1])
+
+    # --session grades each submission in a single R session
+    in_session = "--session" in sys.argv[2:]
+    if "--serve" in sys.argv[2:]:
+        serve(config_yaml_path, in_session)
+    elif not (grade_in_session if in_session else grade)(config_yaml_path, joinpath(TANGO_HOME, "out")):
+        # Exit early
+        exit(-1)
@@ -0,0 +1 @@
+"""Benchmarks of the grading pipeline on synthetic R exercises, run with `python -m benchmarks` in validate_lint."""
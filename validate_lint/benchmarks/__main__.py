@@ -0,0 +1,84 @@
+"""Run the benchmarks, writing their results as JSON and failing if they regressed from the baseline."""
+import argparse
+import json
+import sys
+
+from os.path import abspath, dirname, isfile, join as joinpath
+
+from .corpus import CORPORA
+from .suite import BENCHMARKS, compare, run_suite
+
+__author__ = "Aidan Woolley"
+
+# Results to compare with when no baseline is given, if they have been recorded on this machine.
+# CI passes the results of the parent commit instead, see .github/workflows
+BASELINE_FILE = joinpath(dirname(abspath(__file__)), "baseline.json")
+
+
+def _parse_args(argv):
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list[str]): The arguments, without the program name.
+
+    Returns:
+        (argparse.Namespace): The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run, default all")
+    parser.add_argument("--corpora", nargs="+", choices=list(CORPORA), help="corpora to run them on, default all")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs of each benchmark, default 5")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before them, default 1")
+    parser.add_argument("--output", help="file to write the results to, default stdout")
+    parser.add_argument(
+        "--baseline", default=BASELINE_FILE if isfile(BASELINE_FILE) else None,
+        help="results to compare with, default benchmarks/baseline.json if it exists"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.25,
+        help="fraction by which a median time may exceed the baseline's before it has regressed, default 0.25"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the benchmarks from the command line.
+
+    Args:
+        argv (list[str] | None): The arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        (int): The exit status, 1 if any benchmark regressed.
+    """
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    results = run_suite(args.benchmarks, args.corpora, args.repeats, args.warmup)
+
+    comparisons = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparisons = compare(results, json.load(f), args.threshold)
+        results["comparisons"] = comparisons
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    for result in results["results"]:
+        timing = result.get("skipped") or f"median {result['median']:.4f}s"
+        sys.stderr.write(f"{result['benchmark']:>20} {result['corpus']:>8}: {timing}\n")
+    regressions = [comparison for comparison in comparisons if comparison["regressed"]]
+    for regression in regressions:
+        sys.stderr.write(
+            f"Regression: {regression['benchmark']} on {regression['corpus']} took {regression['ratio']:.2f} times "
+            f"the baseline's {regression['baseline']:.4f}s\n"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
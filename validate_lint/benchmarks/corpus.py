@@ -0,0 +1,147 @@
+"""Synthetic R exercises to benchmark the grading pipeline on, from a single small file to many large ones."""
+import shutil
+
+from collections import OrderedDict
+from glob import glob
+from os import makedirs
+from os.path import abspath, basename, dirname, join as joinpath
+
+import yaml
+
+__author__ = "Aidan Woolley"
+
+# The R testing tools, which test files source relative to the exercise
+EVALUATION_DIR = joinpath(dirname(dirname(dirname(abspath(__file__)))), "evaluation")
+
+# Name of each corpus, with its number of files and number of functions in each file
+CORPORA = OrderedDict([
+    ("small", (1, 5)),
+    ("medium", (4, 25)),
+    ("large", (16, 100)),
+])
+
+# Each function has some loops and branches, and a few of the style errors students typically make
+_FUNCTION = '''
+# Sums the multiples of y up to x, halving large totals
+f{file}_{index} <- function(x, y = {index}) {{
+  total <- 0
+  for (k in seq_len(x)) {{
+    total <- total + k * y
+  }}
+  if (total > 100) {{
+    total = total / 2
+  }}
+  values <- c(1,2,3)
+  label <- 'total'
+  return(total + sum(values))
+}}
+'''
+
+_TEST = '''
+testF{file}_{index} <- function() {{
+    tdk_tested_name <- "f{file}_{index}"
+    tdk_test_description <- "sums the multiples of 1 up to 3"
+
+    result <- tdk_run(f{file}_{index}, 3, 1)
+    assert_equals(result, 12)
+
+    return(tdk_return())
+}}
+'''
+
+# Every file loads libraries in the ways `Validator._get_used_libraries` looks for
+_HEADER = '''library(stats)
+suppressMessages(require("utils"))
+quantiles <- stats::quantile
+'''
+
+
+def source_code(file_index, functions):
+    """
+    Generate the R code of a submitted file.
+
+    Args:
+        file_index (int): Number of the file in its corpus, which makes its function names unique.
+        functions (int): Number of functions in the file.
+
+    Returns:
+        (str): The R code.
+    """
+    return _HEADER + "".join(_FUNCTION.format(file=file_index, index=i) for i in range(functions))
+
+
+def test_code(file_index, functions):
+    """
+    Generate the R tests of a submitted file, with one test per function.
+
+    Args:
+        file_index (int): Number of the file in its corpus.
+        functions (int): Number of functions in the file.
+
+    Returns:
+        (str): The R code of the tests.
+    """
+    header = f'source("test_tools.R")\n\ntdk_file_path <- "src/file{file_index}.R"\nsource(tdk_file_path)\n'
+    return header + "".join(_TEST.format(file=file_index, index=i) for i in range(functions))
+
+
+def write_corpus(directory, files, functions):
+    """
+    Write an exercise with `files` submitted files, their tests, a config and the R testing tools to `directory`.
+
+    Args:
+        directory (str): Directory to write the exercise to, which is created if it doesn't exist.
+        files (int): Number of submitted files.
+        functions (int): Number of functions in each file.
+
+    Returns:
+        (str): Path to the exercise's config.yaml.
+    """
+    makedirs(joinpath(directory, "src"), exist_ok=True)
+    makedirs(joinpath(directory, "testcases"), exist_ok=True)
+    makedirs(joinpath(directory, "out"), exist_ok=True)
+
+    config = {"files": [], "tests": [], "restricted_libraries": {}, "restricted_functions": {}}
+    for i in range(files):
+        src = f"src/file{i}.R"
+        tests = f"testcases/test_file{i}.R"
+        with open(joinpath(directory, src), "w") as f:
+            f.write(source_code(i, functions))
+        with open(joinpath(directory, tests), "w") as f:
+            f.write(test_code(i, functions))
+        config["files"].append(src)
+        config["tests"].append(tests)
+        config["restricted_libraries"][src] = ["parallel"]
+        config["restricted_functions"][src] = ["eval", "system"]
+
+    config_yaml_file = joinpath(directory, "config.yaml")
+    with open(config_yaml_file, "w") as f:
+        yaml.safe_dump(config, f)
+    for tool in glob(joinpath(EVALUATION_DIR, "*.R")):
+        shutil.copy(tool, joinpath(directory, basename(tool)))
+    return config_yaml_file
+
+
+def checkstyle_output(file_path, errors):
+    """
+    Generate lintr's checkstyle XML for a file with `errors` style errors, as `Linter._parse_lintr_output` reads.
+
+    Args:
+        file_path (str): Path of the linted file.
+        errors (int): Number of errors.
+
+    Returns:
+        (str): The checkstyle XML.
+    """
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<checkstyle version="lintr-2.0.1">',
+        f'  <file name="{file_path}">'
+    ]
+    for i in range(errors):
+        lines.append(
+            f'    <error line="{i + 1}" column="{i % 80 + 1}" severity="style" '
+            'message="Commas should always have a space after." source="commas_linter"/>'
+        )
+    lines += ['  </file>', '</checkstyle>', '']
+    return "\n".join(lines)
@@ -0,0 +1,303 @@
+"""Time each stage of grading on the synthetic corpora, and compare the timings with a baseline."""
+import importlib.util
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+
+from collections import OrderedDict, namedtuple
+from os.path import dirname, join as joinpath
+
+from tango import Linter, Validator
+from tango.config import load_config
+from tango.scoring import IGNORE_MULTIPLE_POLICY, LintColumns
+
+from .corpus import CORPORA, EVALUATION_DIR, checkstyle_output, write_corpus
+
+__author__ = "Aidan Woolley"
+
+RESULTS_VERSION = 1
+
+# The full grading flow, as run in the grading image
+RUN_TESTS_SCRIPT = joinpath(dirname(EVALUATION_DIR), "run_tests.py")
+
+# A benchmark's `prepare` is given the path to a corpus' config.yaml and returns the function to time
+Benchmark = namedtuple("Benchmark", ["name", "needs_r", "prepare"])
+
+
+def _corpus_files(config_yaml_file):
+    """
+    List the submitted files of a corpus with their restricted functions.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (list[tuple[str, list[str]]]): The path of each file and its restricted functions.
+    """
+    config = load_config(config_yaml_file)
+    return [(joinpath(config.directory, file), config.restricted_functions[file]) for file in config.files]
+
+
+def _cold(func):
+    """
+    Wrap `func` so each call forgets the lintr output memoised by previous calls.
+
+    Args:
+        func (Callable[[], Any]): The function to time.
+
+    Returns:
+        (Callable[[], Any]): The wrapped function.
+    """
+    def cold():
+        with Linter._lint_memo_lock:
+            Linter._lint_memo.clear()
+        return func()
+    return cold
+
+
+def _prepare_get_used_libraries(config_yaml_file):
+    """
+    Benchmark finding the libraries each file loads.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    texts = [Linter._read_file(file) for file, _ in _corpus_files(config_yaml_file)]
+    return lambda: [Validator._get_used_libraries(text) for text in texts]
+
+
+def _prepare_parse_lintr_output(config_yaml_file):
+    """
+    Benchmark parsing lintr output for each file, with about one style error for every other line.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    outputs = [
+        checkstyle_output(file, Linter._read_file(file).count("\n") // 2)
+        for file, _ in _corpus_files(config_yaml_file)
+    ]
+    return lambda: [list(Linter._parse_lintr_output(output)) for output in outputs]
+
+
+def _prepare_score(config_yaml_file):
+    """
+    Benchmark scoring the parsed lintr output of every file as a batch of submissions, under both of lint's policies.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    columns = LintColumns()
+    for file, _ in _corpus_files(config_yaml_file):
+        columns.add(Linter._parse_lintr_output(checkstyle_output(file, Linter._read_file(file).count("\n") // 2)))
+    return lambda: (columns.score(), columns.score(IGNORE_MULTIPLE_POLICY))
+
+
+def _prepare_invoke_R(config_yaml_file):
+    """
+    Benchmark starting R and parsing every file in it.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    files = ", ".join(f'"{file}"' for file, _ in _corpus_files(config_yaml_file))
+    return lambda: Linter._invoke_R(f"invisible(lapply(c({files}), parse))")
+
+
+def _prepare_check_errors(config_yaml_file):
+    """
+    Benchmark checking each file for unknown libraries and lint errors.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    files = _corpus_files(config_yaml_file)
+    return _cold(lambda: [Validator._check_errors(file, restricted) for file, restricted in files])
+
+
+def _prepare_lint(config_yaml_file):
+    """
+    Benchmark linting the corpus.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    return _cold(lambda: Linter.lint(config_yaml_file))
+
+
+def _prepare_validate(config_yaml_file):
+    """
+    Benchmark validating the corpus.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    return _cold(lambda: Validator.validate(config_yaml_file))
+
+
+def _prepare_run_tests(config_yaml_file):
+    """
+    Benchmark grading the corpus as run_tests.py does, from validation to running its tests.
+
+    Args:
+        config_yaml_file (str): Path to the corpus' config.yaml.
+
+    Returns:
+        (Callable[[], Any]): The function to time.
+    """
+    spec = importlib.util.spec_from_file_location("run_tests", RUN_TESTS_SCRIPT)
+    run_tests = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run_tests)
+    exercise_dir = dirname(config_yaml_file)
+    # The R testing tools were copied to the corpus
+    run_tests.TANGO_HOME = exercise_dir
+    return _cold(lambda: run_tests.grade(config_yaml_file, joinpath(exercise_dir, "out")))
+
+
+BENCHMARKS = OrderedDict((benchmark.name, benchmark) for benchmark in [
+    Benchmark("get_used_libraries", False, _prepare_get_used_libraries),
+    Benchmark("parse_lintr_output", False, _prepare_parse_lintr_output),
+    Benchmark("score", False, _prepare_score),
+    Benchmark("invoke_R", True, _prepare_invoke_R),
+    Benchmark("check_errors", True, _prepare_check_errors),
+    Benchmark("lint", True, _prepare_lint),
+    Benchmark("validate", True, _prepare_validate),
+    Benchmark("run_tests", True, _prepare_run_tests),
+])
+
+
+def time_calls(func, repeats, warmup=1):
+    """
+    Time calls to `func`.
+
+    Args:
+        func (Callable[[], Any]): The function to time.
+        repeats (int): Number of timed calls.
+        warmup (int): Number of calls made first, which aren't timed.
+
+    Returns:
+        (list[float]): Seconds taken by each timed call.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def environment():
+    """
+    Describe what the benchmarks are run on, since timings are only comparable on the same machine and toolchain.
+
+    Returns:
+        (dict[str: Any]): The Python, R and platform versions, and the number of CPUs.
+    """
+    r_version = None
+    if shutil.which("Rscript") is not None:
+        r_version = Linter._invoke_R("cat(R.version.string)").strip()
+    return OrderedDict([
+        ("python", platform.python_version()),
+        ("r", r_version),
+        ("platform", platform.platform()),
+        ("cpu_count", os.cpu_count()),
+    ])
+
+
+def run_suite(benchmarks=None, corpora=None, repeats=5, warmup=1):
+    """
+    Run benchmarks on corpora, each generated in a temporary directory.
+
+    Benchmarks which need R are reported as skipped if Rscript isn't installed.
+
+    Args:
+        benchmarks (list[str] | None): Names of the benchmarks to run, defaults to all of `BENCHMARKS`.
+        corpora (list[str] | None): Names of the corpora to run them on, defaults to all of `CORPORA`.
+        repeats (int): Number of timed runs of each benchmark on each corpus.
+        warmup (int): Number of untimed runs before them.
+
+    Returns:
+        (dict[str: Any]): The results, with the environment and a result for every benchmark on every corpus.
+    """
+    have_r = shutil.which("Rscript") is not None
+    results = []
+    for corpus in corpora or CORPORA:
+        files, functions = CORPORA[corpus]
+        corpus_dir = tempfile.mkdtemp(prefix=f"tango-benchmark-{corpus}-")
+        try:
+            config_yaml_file = write_corpus(corpus_dir, files, functions)
+            for name in benchmarks or BENCHMARKS:
+                result = OrderedDict([("benchmark", name), ("corpus", corpus), ("files", files),
+                                      ("functions", files * functions)])
+                if BENCHMARKS[name].needs_r and not have_r:
+                    result["skipped"] = "Rscript not found"
+                else:
+                    times = time_calls(BENCHMARKS[name].prepare(config_yaml_file), repeats, warmup)
+                    result["times"] = times
+                    result["min"] = min(times)
+                    result["median"] = statistics.median(times)
+                    result["mean"] = statistics.mean(times)
+                results.append(result)
+        finally:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+    return OrderedDict([("version", RESULTS_VERSION), ("environment", environment()), ("results", results)])
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Compare the median time of each benchmark on each corpus with the baseline's.
+
+    Args:
+        results (dict[str: Any]): Results from `run_suite`.
+        baseline (dict[str: Any]): Earlier results from `run_suite`.
+        threshold (float): Fraction by which a benchmark may be slower than the baseline before it has regressed.
+
+    Returns:
+        (list[dict[str: Any]]): The benchmark, corpus, both medians, their ratio and whether it has regressed, for
+            every benchmark run on the same corpus in both.
+    """
+    baseline_medians = {
+        (result["benchmark"], result["corpus"]): result["median"]
+        for result in baseline["results"] if "median" in result
+    }
+    comparisons = []
+    for result in results["results"]:
+        baseline_median = baseline_medians.get((result["benchmark"], result["corpus"]))
+        if "median" not in result or not baseline_median:
+            continue
+        ratio = result["median"] / baseline_median
+        comparisons.append(OrderedDict([
+            ("benchmark", result["benchmark"]),
+            ("corpus", result["corpus"]),
+            ("baseline", baseline_median),
+            ("median", result["median"]),
+            ("ratio", ratio),
+            ("regressed", ratio > 1 + threshold),
+        ]))
+    return comparisons
@@ -0,0 +1,238 @@
+"""Validate and lint many submissions to the same exercise in one call, streaming the results."""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from os.path import abspath, dirname, isdir, join as joinpath, normpath
+
+from .config import load_config
+from .findings import Finding, json_default
+from .linter import Linter
+from .pipeline import FAIL_FAST
+from .validation import Validator
+
+__author__ = "Aidan Woolley"
+
+# Number of distinct files whose results are kept for identical files, so memory doesn't grow with the batch
+_DEDUPLICATED_FILES = 1024
+
+
+def _file_digest(file):
+    """
+    Hash the contents of a file.
+
+    Args:
+        file (str): Path to the file.
+
+    Returns:
+        (str): The sha256 hex digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _relocate(results, old_path, new_path):
+    """
+    Copy EDUKATE results found for one file so that they refer to an identical file at another path.
+
+    Args:
+        results (Any): Lists, tuples, dicts and findings of results for the file at `old_path`.
+        old_path (str): The path the results were found for.
+        new_path (str): The path of the identical file.
+
+    Returns:
+        (Any): A copy of `results` with every `file_path` of `old_path` replaced by `new_path`.
+    """
+    if isinstance(results, Finding):
+        return results.replace(file_path=new_path) if results.file_path == old_path else results
+    if isinstance(results, dict):
+        return {k: (new_path if k == "file_path" and v == old_path else v) for k, v in results.items()}
+    if isinstance(results, (list, tuple)):
+        return type(results)(_relocate(item, old_path, new_path) for item in results)
+    return results
+
+
+class _Deduplicator:
+    """Runs a check once per distinct file contents, sharing the result with identical files checked soon after."""
+
+    def __init__(self, max_entries=_DEDUPLICATED_FILES):
+        """
+        Create an empty deduplicator.
+
+        Args:
+            max_entries (int): Number of finished checks to remember, least recently used first to be forgotten.
+        """
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, key, file_path, check):
+        """
+        Run `check` for a file unless a file with the same key is being, or was recently, checked.
+
+        Args:
+            key (tuple): Identifies the file contents and the check's parameters.
+            file_path (str): Path of the file being checked.
+            check (Callable[[], Any]): Runs the check on `file_path`.
+
+        Returns:
+            (Any): The result of the check, referring to `file_path`.
+        """
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+                self._evict()
+            else:
+                self._results.move_to_end(key)
+
+        if owner:
+            try:
+                future.set_result((file_path, check()))
+            except BaseException as e:
+                future.set_exception(e)
+                with self._lock:
+                    if self._results.get(key) is future:
+                        del self._results[key]  # Don't remember failures, e.g. a missing file
+                raise
+
+        original_path, results = future.result()
+        return _relocate(results, original_path, file_path)
+
+    def _evict(self):
+        """Forget the least recently used finished checks while there are too many, keeping those in progress."""
+        finished = []
+        excess = len(self._results) - self.max_entries
+        for key, future in self._results.items():
+            if len(finished) >= excess:
+                break
+            if future.done():
+                finished.append(key)
+        for key in finished:
+            del self._results[key]
+
+
+def find_submissions(submissions):
+    """
+    List the submissions in a directory or manifest.
+
+    A directory's submissions are each of its subdirectories, in name order.
+    A manifest is a text file listing one submission directory per line, relative to the manifest.
+    Blank lines and lines starting with # are ignored.
+
+    Args:
+        submissions (str): Path to the directory or manifest.
+
+    Returns:
+        (Iterator[tuple[str, str]]): The name and directory of each submission.
+    """
+    if isdir(submissions):
+        for name in sorted(os.listdir(submissions)):
+            if isdir(joinpath(submissions, name)):
+                yield name, abspath(joinpath(submissions, name))
+        return
+
+    with open(submissions) as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield normpath(line), abspath(joinpath(dirname(submissions), line))
+
+
+def grade_submissions(config_yaml_file, submissions, max_workers=4, ignore_multiple_for_score=False):
+    """
+    Validate and lint every submission to the exercise described by `config_yaml_file`.
+
+    The config is read once and used for every submission, whose files are found relative to its own directory.
+    Files with identical contents are only validated and linted once, unless over a thousand other distinct files
+    were checked in between, and each file is only read once.
+    Submissions are graded concurrently, but at most a few more than `max_workers` are held in memory at a time.
+    As in run_tests.py, submissions which fail validation are not linted, and each file's validation stops at the
+    first stage to fail unless the config sets `validation_policy: collect_all`.
+
+    Args:
+        config_yaml_file (str): Path to the exercise's config.yaml.
+        submissions (Iterable[tuple[str, str]]): The name and directory of each submission, see `find_submissions`.
+        max_workers (int): Number of submissions to grade concurrently.
+        ignore_multiple_for_score (bool): whether to count repeats of the same style error only once.
+
+    Yields:
+        (tuple[str, dict[str: Any]]): The name of each submission, in order, with its "validation" and "quality"
+        EDUKATE reports. "quality" is None if the submission failed validation. What is found is kept as
+        `findings.Finding`s, which are written as JSON with `json.dump(..., default=findings.json_default)`.
+    """
+    config = load_config(config_yaml_file)
+    policy = config.validation_policy or FAIL_FAST
+    deduplicator = _Deduplicator()
+
+    def check_file(submission_dir, file, kind, check):
+        file_path = joinpath(submission_dir, file)
+        return deduplicator.run((kind, file, _file_digest(file_path)), file_path, lambda: check(file_path))
+
+    def validate_file(submission_dir, file):
+        restricted_libraries, restricted_functions = config.restrictions(file)
+        return check_file(submission_dir, file, "validate", lambda file_path: Validator._validate_file(
+            file_path, restricted_libraries, restricted_functions, policy
+        ))
+
+    def lint_file(submission_dir, file):
+        restricted_functions = Linter._lint_restrictions(config.restricted_functions.get(file, frozenset()))
+        return check_file(submission_dir, file, "lint", lambda file_path: list(Linter._style_errors(
+            Linter._lint_file(file_path, restricted_functions)
+        )))
+
+    def grade(submission_dir):
+        validation = Validator._validation_report([validate_file(submission_dir, file) for file in config.files])
+        quality = None
+        if validation["passed"]:
+            errors_list = [error for file in config.files for error in lint_file(submission_dir, file)]
+            quality = Linter._lint_report(errors_list, ignore_multiple_for_score)
+        return {"validation": validation, "quality": quality}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for name, submission_dir in submissions:
+            in_flight.append((name, executor.submit(grade, submission_dir)))
+            if len(in_flight) > 2 * max_workers:
+                name, future = in_flight.popleft()
+                yield name, future.result()
+        while in_flight:
+            name, future = in_flight.popleft()
+            yield name, future.result()
+
+
+def main(argv=None):
+    """
+    Grade a batch of submissions, writing one JSON object per submission to stdout as each is finished.
+
+    Args:
+        argv (list[str]): Command line arguments, defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Validate and lint many submissions to one exercise.")
+    parser.add_argument("config", help="the exercise's config.yaml")
+    parser.add_argument("submissions", help="a directory of submission directories, or a manifest listing them")
+    parser.add_argument("--workers", type=int, default=4, help="number of submissions to grade concurrently")
+    parser.add_argument("--ignore-multiple", action="store_true", help="count repeated style errors only once")
+    args = parser.parse_args(argv)
+
+    results = grade_submissions(
+        args.config, find_submissions(args.submissions), args.workers, args.ignore_multiple
+    )
+    for name, result in results:
+        result["submission"] = name
+        json.dump(result, sys.stdout, default=json_default)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""The parsed config.yaml of an exercise, checked once and cached so every part of grading reuses it."""
+import os
+import threading
+
+from collections import OrderedDict
+from os.path import abspath, dirname
+from types import MappingProxyType
+
+import yaml
+
+from .pipeline import POLICIES
+
+__author__ = "Aidan Woolley"
+
+# Number of parsed configs kept, enough for every exercise graded by one process
+_CACHE_SIZE = 64
+
+
+class ConfigError(ValueError):
+    """Raised when a config.yaml is missing a required key or has a value of the wrong type."""
+
+
+class ExerciseConfig:
+    """
+    An exercise's config.yaml, with the restrictions on each file precompiled to frozensets.
+
+    Instances are shared between threads through `load_config`'s cache, so they are read-only.
+
+    Attributes:
+        path (str): Absolute path to the config.yaml.
+        directory (str): Directory of the config.yaml, which the files and tests are relative to.
+        files (tuple[str]): The submitted files to validate and lint.
+        tests (tuple[str]): The R test files.
+        restricted_libraries (Mapping[str, frozenset[str]]): Libraries each file must not load.
+        restricted_functions (Mapping[str, frozenset[str]]): Functions each file must not call.
+        max_workers (int | None): Number of files or test files to process concurrently.
+        validation_policy (str | None): "fail_fast" or "collect_all", None for the caller's default.
+        test_timeout (float): Seconds each test file may take.
+        function_timeout (float | None): Seconds each function under test may take, which tester.R reads itself.
+        measure_memory (bool): Whether tester.R records the peak memory of each test, which costs a full garbage
+            collection before every test.
+    """
+
+    __slots__ = (
+        "path", "directory", "files", "tests", "restricted_libraries", "restricted_functions", "max_workers",
+        "validation_policy", "test_timeout", "function_timeout", "measure_memory"
+    )
+
+    def __init__(self, path, raw):
+        """
+        Check a parsed config.yaml and compile it.
+
+        Args:
+            path (str): Path to the config.yaml.
+            raw (Any): The YAML as parsed by `yaml.safe_load`.
+
+        Raises:
+            ConfigError: If a required key is missing or a value has the wrong type.
+        """
+        self.path = abspath(path)
+        self.directory = dirname(self.path)
+        if not isinstance(raw, dict):
+            raise ConfigError(f"{path}: expected a mapping of settings")
+
+        self.files = self._names(raw, "files", required=True)
+        self.tests = self._names(raw, "tests")
+        self.restricted_libraries = self._restrictions(raw, "restricted_libraries")
+        self.restricted_functions = self._restrictions(raw, "restricted_functions")
+        self.max_workers = self._number(raw, "max_workers", int, None)
+        self.test_timeout = self._number(raw, "test_timeout", (int, float), 60)
+        self.function_timeout = self._number(raw, "function_timeout", (int, float), None)
+        self.measure_memory = raw.get("measure_memory", False)
+        if not isinstance(self.measure_memory, bool):
+            raise ConfigError(f"{path}: 'measure_memory' must be true or false")
+        self.validation_policy = raw.get("validation_policy")
+        if self.validation_policy is not None and self.validation_policy not in POLICIES:
+            raise ConfigError(
+                f"{path}: unknown validation_policy {self.validation_policy!r}, expected one of {', '.join(POLICIES)}"
+            )
+
+    def _names(self, raw, key, required=False):
+        """
+        Get a list of file names from the config.
+
+        Args:
+            raw (dict[str: Any]): The parsed config.
+            key (str): The key of the list.
+            required (bool): Whether the key must be present.
+
+        Returns:
+            (tuple[str]): The names, empty if an optional key is missing.
+        """
+        if key not in raw:
+            if required:
+                raise ConfigError(f"{self.path}: missing required key {key!r}")
+            return ()
+        names = raw[key] or []
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ConfigError(f"{self.path}: {key!r} must be a list of file names")
+        return tuple(names)
+
+    def _restrictions(self, raw, key):
+        """
+        Get the restrictions on each file from the config.
+
+        Args:
+            raw (dict[str: Any]): The parsed config.
+            key (str): "restricted_libraries" or "restricted_functions".
+
+        Returns:
+            (Mapping[str, frozenset[str]]): The restricted names of each file listed under `key`.
+        """
+        by_file = raw.get(key) or {}
+        if not isinstance(by_file, dict):
+            raise ConfigError(f"{self.path}: {key!r} must map each file to a list of names")
+        compiled = {}
+        for file, names in by_file.items():
+            if not isinstance(names or [], list):
+                raise ConfigError(f"{self.path}: {key!r} of {file!r} must be a list of names")
+            compiled[file] = frozenset(names or ())
+        return MappingProxyType(compiled)
+
+    def _number(self, raw, key, kind, default):
+        """
+        Get an optional number from the config.
+
+        Args:
+            raw (dict[str: Any]): The parsed config.
+            key (str): The key of the number.
+            kind (type | tuple[type]): The allowed types.
+            default (Any): The value if the key is missing or null.
+
+        Returns:
+            (Any): The number.
+        """
+        value = raw.get(key)
+        if value is None:
+            return default
+        if isinstance(value, bool) or not isinstance(value, kind):
+            raise ConfigError(f"{self.path}: {key!r} must be a number")
+        return value
+
+    def restrictions(self, file):
+        """
+        Get the restrictions on a file, which validation requires the config to list.
+
+        Args:
+            file (str): The file, as listed under `files`.
+
+        Returns:
+            (tuple[frozenset[str], frozenset[str]]): The restricted libraries and restricted functions of the file.
+
+        Raises:
+            ConfigError: If either restriction isn't listed for the file.
+        """
+        for key, by_file in (("restricted_libraries", self.restricted_libraries),
+                             ("restricted_functions", self.restricted_functions)):
+            if file not in by_file:
+                raise ConfigError(f"{self.path}: {key!r} has no entry for {file!r}")
+        return self.restricted_libraries[file], self.restricted_functions[file]
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_config(config_yaml_file):
+    """
+    Parse an exercise's config.yaml, reusing the parsed config until the file changes.
+
+    Args:
+        config_yaml_file (str): Path to the config.yaml.
+
+    Returns:
+        (ExerciseConfig): The config.
+
+    Raises:
+        FileNotFoundError: If the config doesn't exist.
+        ConfigError: If the config is invalid.
+    """
+    path = abspath(config_yaml_file)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        config = _cache.get(key)
+        if config is not None:
+            _cache.move_to_end(key)
+            return config
+
+    with open(path) as f:
+        config = ExerciseConfig(path, yaml.safe_load(f))
+    with _cache_lock:
+        _cache[key] = config
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return config
+
+
+def clear_cache():
+    """Forget every parsed config."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,129 @@
+"""Evaluate many submissions to one exercise by forking an R process which has the exercise preloaded."""
+import json
+import os
+import tempfile
+import threading
+
+from os.path import abspath, dirname
+
+from .manifest import update_manifest
+from .orchestrator import _with_unfinished
+from .r_pool import RWorker, RWorkerError, _r_string
+from .results import fold_records, read_records
+
+__author__ = "Aidan Woolley"
+
+# eval_server.R and the files it sources are alongside tester.R, as in the tango Docker image
+DEFAULT_SERVER_SCRIPT = "/home/tango/eval_server.R"
+
+# Extra seconds the R worker is given to fork, kill and reap an evaluation which times out
+_GRACE_SECONDS = 10
+
+
+class EvalServer:
+    """
+    A zygote R process for one exercise which evaluates each submission in a fork of itself.
+
+    Packages, the testing tools and the definitions in the test files are loaded once, so each submission only pays
+    for a fork and sourcing its own files. Submissions are evaluated one at a time; use several servers to evaluate
+    more at once.
+    """
+
+    def __init__(self, config_yaml_file, server_script=DEFAULT_SERVER_SCRIPT, timeout=60):
+        """
+        Start an R process and load the exercise into it.
+
+        Args:
+            config_yaml_file (str): Path to the exercise's config.yaml.
+            server_script (str): Path to eval_server.R, which must be alongside tester.R and test_tools.R.
+            timeout (float): Seconds each submission's tests may take.
+        """
+        self.timeout = timeout
+        self._manifest = update_manifest(config_yaml_file)
+        self._lock = threading.Lock()
+        self._worker = RWorker(preload=(), timeout=timeout + _GRACE_SECONDS)
+        try:
+            output, status = self._worker.run(
+                f"source({_r_string(abspath(server_script))}, chdir = TRUE);"
+                f"zygote_init({_r_string(dirname(abspath(config_yaml_file)))})"
+            )
+        except RWorkerError:
+            self._worker.close()
+            raise
+        if status != 0:
+            self._worker.close()
+            raise RWorkerError(f"Failed to load the exercise into R: {output.strip()}")
+
+    def evaluate(self, submission_dir):
+        """
+        Evaluate a submission in a fork of the server.
+
+        Tests which finished keep their results even if the evaluation times out or fails.
+
+        Args:
+            submission_dir (str): Directory the student's files are found relative to, like the exercise's.
+
+        Returns:
+            (dict[str: Any]): The evaluation JSON, as tester.R and `results.finalize` would write it.
+        """
+        fd, records_path = tempfile.mkstemp(suffix=".ndjson")
+        os.close(fd)
+        try:
+            with self._lock:
+                output, status = self._worker.run(
+                    f"zygote_run({_r_string(abspath(submission_dir))}, {_r_string(records_path)}, {self.timeout})"
+                )
+            if status != 0:
+                raise RWorkerError(f"Failed to evaluate {submission_dir}: {output.strip()}")
+            reply = output.strip().splitlines()[-1] if output.strip() else "error: no reply"
+            records = list(read_records(records_path))
+        finally:
+            os.remove(records_path)
+
+        if reply == "ok":
+            info, details = "error", "the test did not report a result"
+        elif reply == "timeout":
+            info, details = "timeout", f"the tests did not finish within {self.timeout} seconds"
+        else:
+            info, details = "error", reply[len("error: "):]
+
+        for entry in self._manifest["tests"].values():
+            records = _with_unfinished(records, entry, info, details)
+        return fold_records(records)
+
+    def evaluate_to_file(self, submission_dir, out_path):
+        """
+        Evaluate a submission and write its evaluation.json.
+
+        Args:
+            submission_dir (str): Directory the student's files are found relative to.
+            out_path (str): Where to write evaluation.json.
+
+        Returns:
+            (dict[str: Any]): The evaluation JSON which was written.
+        """
+        evaluation = self.evaluate(submission_dir)
+        with open(out_path, "w") as out:
+            json.dump(evaluation, out)
+        return evaluation
+
+    def alive(self):
+        """
+        Check whether the server's R process is still running.
+
+        Returns:
+            (bool): True if the process has not exited.
+        """
+        return self._worker.alive()
+
+    def close(self):
+        """Stop the server's R process."""
+        self._worker.close()
+
+    def __enter__(self):
+        """Use the server as a context manager which closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the server."""
+        self.close()
@@ -0,0 +1,125 @@
+"""Summarise the time and memory each test used across many evaluation.json files, to tune timeouts from data."""
+import argparse
+import json
+import math
+import sys
+
+from collections import OrderedDict
+
+__author__ = "Aidan Woolley"
+
+# Resources tester.R records for each test
+RESOURCES = ("wall_time", "cpu_time", "peak_memory")
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+RECORD_KINDS = ("successes", "failures", "errors")
+
+
+def percentile(sorted_values, p):
+    """
+    Find a percentile by linear interpolation between the closest ranks.
+
+    Args:
+        sorted_values (list[float]): The values, in ascending order.
+        p (float): The percentile, between 0 and 100.
+
+    Returns:
+        (float | None): The percentile, or None if there are no values.
+    """
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def iter_test_records(evaluation):
+    """
+    List every test record in an evaluation document.
+
+    Args:
+        evaluation (dict[str: Any]): The contents of an evaluation.json.
+
+    Yields:
+        (tuple[str, dict[str: Any]]): Whether each record is a success, failure or error, and the record.
+    """
+    for runner in evaluation.get("runners", []):
+        for kind in RECORD_KINDS:
+            for record in runner.get(kind) or []:
+                yield kind, record
+
+
+def summarise(evaluations, percentiles=DEFAULT_PERCENTILES):
+    """
+    Compute percentiles of the resources each test used.
+
+    Records without resources, such as those of tests which timed out, count towards a test's outcomes only.
+
+    Args:
+        evaluations (Iterable[dict[str: Any]]): The contents of each evaluation.json.
+        percentiles (tuple[float]): The percentiles to compute.
+
+    Returns:
+        (OrderedDict[str: dict[str: Any]]): For each test name, in order of first appearance, the number of
+        "runs", the count of each outcome, and for each resource a dict from e.g. "p90" to that percentile.
+    """
+    samples = OrderedDict()
+    for evaluation in evaluations:
+        for kind, record in iter_test_records(evaluation):
+            test = samples.setdefault(record.get("test_name", ""), {
+                "outcomes": dict.fromkeys(RECORD_KINDS, 0),
+                "resources": {resource: [] for resource in RESOURCES},
+            })
+            test["outcomes"][kind] += 1
+            for resource in RESOURCES:
+                if isinstance(record.get(resource), (int, float)):
+                    test["resources"][resource].append(record[resource])
+
+    summary = OrderedDict()
+    for test_name, test in samples.items():
+        summary[test_name] = {"runs": sum(test["outcomes"].values()), **test["outcomes"]}
+        for resource, values in test["resources"].items():
+            values.sort()
+            summary[test_name][resource] = {f"p{p:g}": percentile(values, p) for p in percentiles}
+            summary[test_name][resource]["max"] = values[-1] if values else None
+    return summary
+
+
+def _load_evaluations(paths):
+    """
+    Read evaluation.json files one at a time, skipping any which are missing or not valid JSON.
+
+    Args:
+        paths (Iterable[str]): Paths of the files.
+
+    Yields:
+        (dict[str: Any]): The contents of each readable file.
+    """
+    for path in paths:
+        try:
+            with open(path) as f:
+                yield json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+
+
+def main(argv=None):
+    """
+    Print the percentiles of each test's resources across evaluation.json files as JSON.
+
+    Args:
+        argv (list[str]): Command line arguments, defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Summarise the time and memory tests used across evaluations.")
+    parser.add_argument("evaluations", nargs="+", help="evaluation.json files")
+    parser.add_argument(
+        "--percentiles", type=float, nargs="+", default=DEFAULT_PERCENTILES, help="percentiles to compute"
+    )
+    args = parser.parse_args(argv)
+
+    json.dump(summarise(_load_evaluations(args.evaluations), tuple(args.percentiles)), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Compact records of what validation and linting found, converted to EDUKATE JSON only when output."""
+import sys
+
+from collections.abc import Mapping
+
+__author__ = "Aidan Woolley"
+
+# The EDUKATE keys a finding can have, in the order they are output
+_FIELDS = ("file_path", "line_number", "type", "info", "column_number", "linter")
+
+
+def _intern(text):
+    """
+    Intern a string which repeats across findings, so it is stored once.
+
+    Args:
+        text (str | None): The string.
+
+    Returns:
+        (str | None): The interned string.
+    """
+    return None if text is None else sys.intern(text)
+
+
+class Finding(Mapping):
+    """
+    A success, failure or error found in a file, read like the EDUKATE dict it is output as.
+
+    The same finding is shared by cached lint results and every report which includes it, so it must not be changed.
+    Fields which are None are absent from the mapping, e.g. a restricted library has no "column_number".
+
+    Attributes:
+        file_path (str | None): Path of the file the finding is in.
+        line_number (int | None): Line of the finding, starting at 1.
+        type (str): The kind of finding, e.g. "restricted library", or a lintr severity such as "style".
+        info (str): Description of the finding.
+        column_number (int | None): Column of the finding, starting at 1.
+        linter (str | None): The lintr linter which reported the finding, only kept until it is reported.
+    """
+
+    __slots__ = _FIELDS
+
+    def __init__(self, type, info, file_path=None, line_number=None, column_number=None, linter=None):
+        """
+        Create a finding, interning its strings.
+
+        Args:
+            type (str): The kind of finding.
+            info (str): Description of the finding.
+            file_path (str | None): Path of the file the finding is in.
+            line_number (int | None): Line of the finding.
+            column_number (int | None): Column of the finding.
+            linter (str | None): The lintr linter which reported the finding.
+        """
+        self.file_path = _intern(file_path)
+        self.line_number = line_number
+        self.type = _intern(type)
+        self.info = _intern(info)
+        self.column_number = column_number
+        self.linter = _intern(linter)
+
+    def __getitem__(self, key):
+        """
+        Get a field by its EDUKATE key.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            (str | int): The value.
+
+        Raises:
+            KeyError: If the finding doesn't have the field.
+        """
+        value = getattr(self, key, None) if key in _FIELDS else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        """
+        Iterate over the EDUKATE keys of the fields the finding has.
+
+        Yields:
+            (str): Each key.
+        """
+        for field in _FIELDS:
+            if getattr(self, field) is not None:
+                yield field
+
+    def __len__(self):
+        """
+        Count the fields the finding has.
+
+        Returns:
+            (int): The number of fields.
+        """
+        return sum(getattr(self, field) is not None for field in _FIELDS)
+
+    def __repr__(self):
+        """
+        Describe the finding.
+
+        Returns:
+            (str): The finding's class and fields.
+        """
+        return f"{type(self).__name__}({', '.join(f'{key}={value!r}' for key, value in self.items())})"
+
+    def replace(self, **changes):
+        """
+        Copy the finding with some fields changed.
+
+        Args:
+            **changes (Any): The new value of each field to change, None to remove it.
+
+        Returns:
+            (Finding): The copy.
+        """
+        fields = {field: getattr(self, field) for field in _FIELDS}
+        fields.update(changes)
+        return Finding(**fields)
+
+    def to_json(self):
+        """
+        Convert the finding to EDUKATE JSON.
+
+        Returns:
+            (dict[str: (str | int)]): The fields the finding has.
+        """
+        return dict(self.items())
+
+
+def to_json(results):
+    """
+    Convert the findings in a report to EDUKATE JSON.
+
+    Args:
+        results (Any): Dicts, lists and tuples of findings and other JSON values.
+
+    Returns:
+        (Any): A copy of `results` with every finding converted to a dict.
+    """
+    if isinstance(results, Finding):
+        return results.to_json()
+    if isinstance(results, dict):
+        return {key: to_json(value) for key, value in results.items()}
+    if isinstance(results, (list, tuple)):
+        return type(results)(to_json(item) for item in results)
+    return results
+
+
+def json_default(value):
+    """
+    Convert findings as they are written by `json.dump`, which calls this for values it can't write itself.
+
+    Args:
+        value (Any): The value.
+
+    Returns:
+        (dict[str: (str | int)]): The EDUKATE JSON of a finding.
+
+    Raises:
+        TypeError: If `value` isn't a finding.
+    """
+    if isinstance(value, Finding):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
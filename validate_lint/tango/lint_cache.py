@@ -0,0 +1,222 @@
+"""An on-disk, content-addressed cache of lintr output which can be shared by concurrent graders."""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+from os.path import join as joinpath
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+__author__ = "Aidan Woolley"
+
+# The linted file's path is the only part of lintr's checkstyle output which depends on where the file is, so it's
+# replaced by a placeholder when stored to let identical files at different paths share an entry.
+_FILE_NAME_PLACEHOLDER = "\0tango-linted-file\0"
+_FILE_NAME_ATTR = re.compile(r'<file name="[^"]*"')
+
+
+def _is_checkstyle(output):
+    """
+    Check whether lintr output is a complete checkstyle document, rather than what is left when R fails.
+
+    Args:
+        output (str): The output.
+
+    Returns:
+        (bool): Whether `output` parses as checkstyle XML.
+    """
+    try:
+        return ElementTree.fromstring(output).tag == "checkstyle"
+    except ElementTree.ParseError:
+        return False
+
+
+class LintCache:
+    """A size-bounded LRU cache of lintr output keyed by file contents, lint options and toolchain version."""
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+        Create a cache in `directory`, which is created if it doesn't exist.
+
+        Args:
+            directory (str): Directory to store cache entries in. Several processes may share it.
+            max_bytes (int): Total size of the entries above which the least recently used are evicted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Total size of entries, computed lazily on the first write
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _key(file_to_lint, options):
+        """
+        Hash the contents of `file_to_lint` together with the lint options.
+
+        Args:
+            file_to_lint (str): Path to the file which will be linted.
+            options (str): Everything other than the file contents which affects the lintr output.
+
+        Returns:
+            (str): Hex digest identifying the lint result.
+        """
+        digest = hashlib.sha256()
+        with open(file_to_lint, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        digest.update(b"\0")
+        digest.update(options.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        """
+        Get the path at which the entry for `key` is stored.
+
+        Args:
+            key (str): Hex digest from `_key`.
+
+        Returns:
+            (str): Path to the entry.
+        """
+        return joinpath(self.directory, key[:2], key)
+
+    def lookup(self, file_to_lint, options, invoke_lintr):
+        """
+        Return the cached lintr output for `file_to_lint`, running `invoke_lintr` to produce it on a miss.
+
+        Output which isn't a complete checkstyle document is returned but not stored, so a failure of R isn't
+        remembered.
+
+        Args:
+            file_to_lint (str): Path to the file to lint.
+            options (str): Lint options and toolchain versions which the output depends on.
+            invoke_lintr (Callable[[], str]): Runs lintr, returning its checkstyle XML output.
+
+        Returns:
+            (str): The checkstyle XML output, naming `file_to_lint` as the linted file.
+        """
+        key = self._key(file_to_lint, options)
+        path = self._path(key)
+        file_name_attr = '<file name="' + escape(file_to_lint, {'"': "&quot;"}) + '"'
+        try:
+            with open(path, "r", encoding="utf-8") as entry:
+                output = entry.read()
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            output = invoke_lintr()
+            if _is_checkstyle(output):
+                self._store(path, _FILE_NAME_ATTR.sub(lambda _: f'<file name="{_FILE_NAME_PLACEHOLDER}"', output))
+            return output
+
+        with self._lock:
+            self.hits += 1
+        return output.replace(f'<file name="{_FILE_NAME_PLACEHOLDER}"', file_name_attr)
+
+    def _store(self, path, output):
+        """
+        Atomically write an entry, so concurrent readers never see a partial file, then evict if over size.
+
+        Args:
+            path (str): Path of the entry.
+            output (str): Contents of the entry.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                tmp.write(output)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """
+        List every entry in the cache.
+
+        Returns:
+            (list[tuple[float, int, str]]): The last use time, size and path of each entry.
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                path = joinpath(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is 10% under its size limit."""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= 0.9 * self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def stats(self):
+        """
+        Report the cache's hit and miss counters.
+
+        Returns:
+            (dict[str: int]): Number of hits and misses since the cache was created.
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+
+
+def enable_cache(directory, **cache_options):
+    """
+    Cache all lintr output from `Linter` and `Validator` in `directory`.
+
+    Args:
+        directory (str): Directory to store the cache in.
+        **cache_options: Further keyword arguments for `LintCache`.
+
+    Returns:
+        (LintCache): The newly enabled cache.
+    """
+    global _cache
+    _cache = LintCache(directory, **cache_options)
+    return _cache
+
+
+def disable_cache():
+    """Stop caching lintr output."""
+    global _cache
+    _cache = None
+
+
+def get_cache():
+    """
+    Get the enabled cache, if there is one.
+
+    Returns:
+        (LintCache | None): The cache, or None if lintr output isn't cached.
+    """
+    return _cache
@@ -1,16 +1,53 @@
 """The class to perform static analysis of R code."""
+import io
+import json
+import os
 import subprocess
+import sys
+import tempfile
+import threading
 import xml.etree.ElementTree as xmlTree
 
-from os.path import isfile, join as joinpath, dirname as dirname
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from os.path import abspath, isfile, join as joinpath
 
-import yaml
+from . import lint_cache, r_pool, scoring, tracing
+from .config import load_config
+from .findings import Finding, json_default, to_json
 __author__ = 'Kacper Walentynowicz'
 
 
+# Name lintr gives to the linter reporting uses of restricted functions in the combined lint pass
+RESTRICTED_FUNCTION_LINTER = "undesirable_function_linter"
+
+# Lints from these linters (and any parse errors) are what the Validator reports as errors
+ERROR_LINTERS = ("object_usage_linter", "error")
+
+RUNNER_KEY = "Hadley Wickham's R Style Guide"
+
+# Number of characters of error output from a failed R process kept in its span
+_STDERR_TRACE_LIMIT = 2000
+
+# Seconds an R process whose output stream has been closed gets to exit before it is killed
+_STREAM_EXIT_GRACE_SECONDS = 1
+
+
 class Linter:
     """The class to perform static analysis of R code."""
 
+    # Results of the combined lint pass for recently linted files, so validation and linting share one lintr run
+    _lint_memo = OrderedDict()
+    _lint_memo_lock = threading.Lock()
+    _lint_memo_size = 64
+
+    # R and lintr versions, which are part of the key for cached lintr output
+    _toolchain = None
+
+    # Whether restricted functions are found by lintr in R, rather than by the Python tokenizer
+    find_restricted_functions_in_r = False
+
     @staticmethod
     def _read_file(file):
         """
@@ -26,19 +63,6 @@ class Linter:
             out = f.read()
         return out
 
-    @staticmethod
-    def _read_config(config_yaml_file):
-        """
-        Parses the yaml file using the pyyaml library.
-
-        Args:
-            config_yaml_file (str): the path to the config.yaml file
-
-        Returns:
-            (dict[str: Any]): dictionary containing the configuration.
-        """
-        return yaml.safe_load(Linter._read_file(config_yaml_file))
-
     @staticmethod
     def _score_file_by_errors(errors, ignore_multiple):
         """
@@ -47,101 +71,377 @@ class Linter:
         The default scoring formula of deducting 0.05 per error.
         An enhancement is proposed in which ignore_multiple tells to ignore multiple occurrences of the same error -
         if f.ex "Only use double-quotes." error appears twice it is calculated only once in the final score.
+        Only errors of the "info" severity are counted then. See `scoring` for other policies.
 
         Args:
-            errors (list[str]): list of errors returned by the linter
+            errors (Iterable[dict[str: (str | int)]]): errors returned by the linter, which are iterated over once
             ignore_multiple (bool): whether to ignore multiple occurences of the same kind of error in calculating score
 
         Returns:
             (float): score of user's code
         """
-        if not ignore_multiple:
-            return max(0, 1.0 - len(errors) * 0.05)
-
-        found_style_errors = set()
-        score = 1.0
-        for error in errors:
-            if error["type"] == 'info':
-                if not error["info"] in found_style_errors:
-                    score -= 0.05
-                    found_style_errors.add(error["info"])
-
-        return max(0, score)
+        return scoring.score_errors(errors, scoring.policy_for(ignore_multiple))
 
     @staticmethod
-    def _invoke_R(r_cmd):
+    def _invoke_R(r_cmd, kind="R", file=None):
         """
         Invoke Rscript to execute the R command provided.
 
         The command can be many commands, separatedby semicolons.
         The command is executed with LANG=POSIX to ensure only ascii characters.
+        If a pool of warm R workers has been enabled with `r_pool.enable_pool` the command is sent to one of those,
+        otherwise a fresh Rscript process is started.
+        The call is traced as an "invoke_R" span with its exit status, and R's error output if it failed.
 
         Args:
             r_cmd (str): The R command to execute.
+            kind (str): What the command does, e.g. "lintr", for tracing.
+            file (str | None): The file the command is about, for tracing.
 
         Returns:
             (str): The output of the command decoded with utf-8.
         """
-        return subprocess.run(
-            ["Rscript", "-e", r_cmd],
-            stdout=subprocess.PIPE,
-            encoding="utf-8"
-        ).stdout.replace('‘', '\'').replace('’', '\'')  # Replace fixes non-ascii quotes
+        with tracing.span("invoke_R", kind=kind, file=file) as span:
+            pool = r_pool.get_pool()
+            if pool is not None:
+                output, status = pool.run_with_status(r_cmd)
+                span.set(exit_status=status, pooled=True)
+            else:
+                process = subprocess.run(
+                    ["Rscript", "-e", r_cmd],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    encoding="utf-8"
+                )
+                Linter._record_exit(span, process.returncode, process.stderr)
+                output = process.stdout
+        return output.replace('‘', '\'').replace('’', '\'')  # Replace fixes non-ascii quotes
 
     @staticmethod
-    def _invoke_lintr(file_to_lint, lint_options=None):
+    def _record_exit(span, exit_status, stderr):
         """
-        Invoke the R lintr on `file_to_lint`.
+        Record how an Rscript process exited on its span, passing on its error output if it failed.
+
+        Args:
+            span (tracing.Span): The span of the process.
+            exit_status (int): The exit status of the process.
+            stderr (str): Everything the process wrote to stderr.
+        """
+        span.set(exit_status=exit_status)
+        if exit_status != 0:
+            span.set(stderr=stderr[-_STDERR_TRACE_LIMIT:])
+            sys.stderr.write(stderr)
+
+    @staticmethod
+    @contextmanager
+    def _stream_R(r_cmd, kind="R", file=None):
+        """
+        Invoke Rscript to execute the R command provided, giving its output as a stream while it runs.
+
+        If a pool of R workers is enabled the command runs there and its output is buffered as usual.
+        The span of the call lasts until the stream is closed.
+
+        Args:
+            r_cmd (str): The R command to execute.
+            kind (str): What the command does, e.g. "lintr", for tracing.
+            file (str | None): The file the command is about, for tracing.
+
+        Yields:
+            (BinaryIO): The stdout of the command.
+        """
+        if r_pool.get_pool() is not None:
+            yield io.BytesIO(Linter._invoke_R(r_cmd, kind, file).encode("utf-8"))
+            return
+
+        with tracing.span("invoke_R", kind=kind, file=file, streamed=True) as span, tempfile.TemporaryFile() as stderr:
+            # stderr goes to a file so that R can't block writing to it while stdout is being read
+            process = subprocess.Popen(["Rscript", "-e", r_cmd], stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                yield process.stdout
+            finally:
+                process.stdout.close()
+                try:
+                    # R exits as soon as its output has been read, unless the stream was abandoned
+                    process.wait(timeout=_STREAM_EXIT_GRACE_SECONDS)
+                    stderr.seek(0)
+                    Linter._record_exit(span, process.returncode, stderr.read().decode("utf-8", "replace"))
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                    span.set(killed=True)
+
+    @staticmethod
+    def _toolchain_version():
+        """
+        Get the versions of R and lintr, which R is only asked for once per process.
+
+        Returns:
+            (str): The R version string followed by the lintr version.
+        """
+        if Linter._toolchain is None:
+            Linter._toolchain = Linter._invoke_R(
+                'cat(R.version.string, as.character(packageVersion("lintr")))', kind="toolchain"
+            )
+        return Linter._toolchain
+
+    @staticmethod
+    def _cached_lintr(file_to_lint, options, r_cmd):
+        """
+        Run a lintr command, returning cached output instead if `lint_cache.enable_cache` has been called.
+
+        Args:
+            file_to_lint (str): Path to the file `r_cmd` lints.
+            options (str): Everything other than the file which determines the output of `r_cmd`.
+            r_cmd (str): The R command which lints `file_to_lint`.
+
+        Returns:
+            (str): The output of `r_cmd`.
+        """
+        cache = lint_cache.get_cache()
+        if cache is None:
+            return Linter._invoke_R(r_cmd, "lintr", file_to_lint)
+        return cache.lookup(
+            file_to_lint,
+            f'{options}\0{Linter._toolchain_version()}',
+            lambda: Linter._invoke_R(r_cmd, "lintr", file_to_lint)
+        )
+
+    @staticmethod
+    def _invoke_combined_lintr(file_to_lint, restricted_functions=()):
+        """
+        Invoke the R lintr on `file_to_lint` once with the union of every linter Linter and Validator need.
+
+        Args:
+            file_to_lint (str): Path to the file to lint
+            restricted_functions (list[str]): Functions which `file_to_lint` must not use.
+
+        Returns:
+            (str): linter output of the R linter in checkstyle XML, tagged with the linter of each error.
+        """
+        return Linter._cached_lintr(file_to_lint, *Linter._combined_lintr_command(file_to_lint, restricted_functions))
+
+    @staticmethod
+    @contextmanager
+    def _stream_combined_lintr(file_to_lint, restricted_functions=()):
+        """
+        Like `_invoke_combined_lintr`, but stream the output from lintr as it is written if it isn't cached.
+
+        Args:
+            file_to_lint (str): Path to the file to lint
+            restricted_functions (list[str]): Functions which `file_to_lint` must not use.
+
+        Yields:
+            (BinaryIO): linter output of the R linter in checkstyle XML, tagged with the linter of each error.
+        """
+        options, r_cmd = Linter._combined_lintr_command(file_to_lint, restricted_functions)
+        if lint_cache.get_cache() is not None:
+            yield io.BytesIO(Linter._cached_lintr(file_to_lint, options, r_cmd).encode("utf-8"))
+        else:
+            with Linter._stream_R(r_cmd, "lintr", file_to_lint) as output:
+                yield output
+
+    @staticmethod
+    def _combined_lintr_command(file_to_lint, restricted_functions=()):
+        """
+        Create the R command to lint `file_to_lint` with the union of every linter Linter and Validator need.
+
+        This is the default linters plus, if any functions are restricted, an undesirable_function_linter for them.
+        The checkstyle output is written by hand so that each error records the linter which produced it in its
+        `source` attribute.
 
         Args:
             file_to_lint (str): Path to the file to lint
+            restricted_functions (list[str]): Functions which `file_to_lint` must not use.
 
         Returns:
-            (str): linter output of the R linter in checkstyle XML
+            (tuple[str, str]): The lint options, as a cache key, and the R command.
         """
         if not isfile(file_to_lint):
             raise FileNotFoundError(file_to_lint)
 
-        # If any options are provided, format them as opt1=val1, opt2=val2 with a prepended ', ' for the filename.
-        options_str = (', ' + ', '.join([f'{k}={v}' for k, v in lint_options.items()])) if lint_options else ''
+        linters = 'default_linters'
+        if restricted_functions:
+            restricted_functions_string = ', '.join([f'"{fun}"=""' for fun in sorted(restricted_functions)])
+            linters = (
+                f'c(default_linters, list({RESTRICTED_FUNCTION_LINTER}='
+                f'undesirable_function_linter(c({restricted_functions_string}))))'
+            )
 
-        # checkstyle_output is XML which is easier to parse and guaranteed consistent
         # It must be written to a file, /proc/self/fd/1 is stdout!
-        r_cmd = f'library("lintr"); checkstyle_output(lint("{file_to_lint}"{options_str}), "/proc/self/fd/1")'
-        return Linter._invoke_R(r_cmd)
+        r_cmd = (
+            f'library("lintr");'
+            f'lints <- lint("{file_to_lint}", linters={linters});'
+            f'root <- xml2::xml_new_root("checkstyle", version=paste0("lintr-", packageVersion("lintr")));'
+            f'if (length(lints) > 0) {{'
+            f'  file_node <- xml2::xml_add_child(root, "file", name=lints[[1]]$filename);'
+            f'  for (l in lints) xml2::xml_add_child('
+            f'    file_node, "error", line=as.character(l$line_number), column=as.character(l$column_number),'
+            f'    severity=l$type, message=l$message, source=if (is.null(l$linter)) "" else l$linter'
+            f'  )'
+            f'}};'
+            f'xml2::write_xml(root, "/proc/self/fd/1")'
+        )
+        return f'combined:{linters}', r_cmd
 
     @staticmethod
-    def _parse_lintr_output(linter_output):
+    def _lint_file(file_to_lint, restricted_functions=()):
         """
-        Parses the multiline string `linter_output` and returns a list of errors.
+        Lint `file_to_lint` with every linter in a single pass, reusing the result if the file was just linted.
 
         Args:
-            linter_output (str): The checkstyle XML output from lintr.
+            file_to_lint (str): Path to the file to lint
+            restricted_functions (list[str]): Functions which `file_to_lint` must not use.
 
         Returns:
-            (list[dict[str: (str | int)]]): Errors in a format suitable for the EDUKATE platform.
+            (list[findings.Finding]): All the errors, each with a "linter" key naming the linter which produced
+            it. The list is shared, so callers must not modify it.
         """
-        lintr_xml = xmlTree.fromstring(linter_output)
-        try:
-            linted_file = lintr_xml[0].attrib["name"]
-        except IndexError:
-            return []  # No first child (which is node representing file) means no errors
+        key = Linter._lint_memo_key(file_to_lint, restricted_functions)
+        with Linter._lint_memo_lock:
+            if key in Linter._lint_memo:
+                Linter._lint_memo.move_to_end(key)
+                return Linter._lint_memo[key]
+
+        errors = list(Linter._parse_lintr_output(
+            Linter._invoke_combined_lintr(file_to_lint, key[3]),
+            with_linter=True
+        ))
+
+        with Linter._lint_memo_lock:
+            Linter._lint_memo[key] = errors
+            while len(Linter._lint_memo) > Linter._lint_memo_size:
+                Linter._lint_memo.popitem(last=False)
+        return errors
+
+    @staticmethod
+    def _lint_memo_key(file_to_lint, restricted_functions):
+        """
+        Identify a combined lint pass over the current version of a file.
+
+        Args:
+            file_to_lint (str): Path to the file to lint
+            restricted_functions (list[str]): Functions which `file_to_lint` must not use.
+
+        Returns:
+            (tuple): The path, mtime and size of the file, and the sorted restricted functions.
+        """
+        stat = os.stat(file_to_lint)
+        return abspath(file_to_lint), stat.st_mtime_ns, stat.st_size, tuple(sorted(set(restricted_functions)))
 
-        def create_err_dict(error):
-            ret = {}
-            ret["file_path"] = linted_file
-            ret["line_number"] = int(error["line"])
-            ret["type"] = error["severity"]
-            ret["info"] = error["message"]
-            ret["column_number"] = int(error["column"])
-            return ret
+    @staticmethod
+    def _iter_lint_file(file_to_lint, restricted_functions=()):
+        """
+        Like `_lint_file`, but if the file hasn't just been linted stream the errors from lintr without keeping them.
+
+        Args:
+            file_to_lint (str): Path to the file to lint
+            restricted_functions (list[str]): Functions which `file_to_lint` must not use.
+
+        Yields:
+            (findings.Finding): Each error, with a "linter" key naming the linter which produced it.
+        """
+        key = Linter._lint_memo_key(file_to_lint, restricted_functions)
+        with Linter._lint_memo_lock:
+            errors = Linter._lint_memo.get(key)
+        if errors is not None:
+            yield from errors
+            return
+
+        with Linter._stream_combined_lintr(file_to_lint, key[3]) as output:
+            yield from Linter._parse_lintr_output(output, with_linter=True)
+
+    @staticmethod
+    def _lint_restrictions(restricted_functions):
+        """
+        Get the restricted functions the shared lint pass should look for.
 
-        errors_list = [create_err_dict(error.attrib) for error in lintr_xml[0]]
+        Args:
+            restricted_functions (list[str]): Functions restricted in a file.
 
-        return errors_list
+        Returns:
+            (list[str]): `restricted_functions` if they are found by lintr, otherwise nothing.
+        """
+        return restricted_functions if Linter.find_restricted_functions_in_r else ()
 
     @staticmethod
-    def lint(config_yaml_file, ignore_multiple_for_score=False):
+    def _style_errors(tagged_errors):
+        """
+        Select the errors from a combined lint pass which `lint` reports, i.e. those from the default linters.
+
+        Args:
+            tagged_errors (Iterable[findings.Finding]): Output of `_lint_file` or `_iter_lint_file`.
+
+        Yields:
+            (findings.Finding): The errors in the same format as `_parse_lintr_output`.
+        """
+        for error in tagged_errors:
+            if error["linter"] != RESTRICTED_FUNCTION_LINTER:
+                yield error.replace(linter=None)
+
+    @staticmethod
+    def _parse_lintr_output(linter_output, with_linter=False):
+        """
+        Incrementally parses the checkstyle XML `linter_output`, yielding each error as it is read.
+
+        Parsed elements are discarded as soon as their error is yielded, so memory use doesn't grow with the number of
+        errors when `linter_output` is a stream.
+
+        Args:
+            linter_output (str | BinaryIO): The checkstyle XML output from lintr, as a string or a binary stream.
+            with_linter (bool): Whether to tag each error with the linter which produced it, under the key "linter".
+
+        Yields:
+            (findings.Finding): Errors in a format suitable for the EDUKATE platform.
+        """
+        if isinstance(linter_output, str):
+            linter_output = io.BytesIO(linter_output.encode("utf-8"))
+
+        linted_file = None
+        file_element = None
+        for event, element in xmlTree.iterparse(linter_output, events=("start", "end")):
+            if event == "start":
+                if element.tag == "file":
+                    linted_file = element.attrib["name"]
+                    file_element = element
+                continue
+            if element.tag != "error":
+                continue
+
+            error = element.attrib
+            finding = Finding(
+                type=error["severity"],
+                info=error["message"].replace('‘', '\'').replace('’', '\''),  # Fixes non-ascii quotes
+                file_path=linted_file,
+                line_number=int(error["line"]),
+                column_number=int(error["column"]),
+                linter=error.get("source", "") if with_linter else None
+            )
+            if file_element is not None:
+                file_element.remove(element)
+            yield finding
+
+    @staticmethod
+    def _map_files(func, files, max_workers=None):
+        """
+        Apply `func` to every file, concurrently on up to `max_workers` threads if more than one is allowed.
+
+        Threads are enough since the work is done by R subprocesses.
+
+        Args:
+            func (Callable[[str], Any]): The function to apply to each file.
+            files (list[str]): The files, in config order.
+            max_workers (int | None): Maximum number of files to process at once. None or 1 processes them in turn.
+
+        Returns:
+            (list[Any]): The result for each file, in the same order as `files`.
+        """
+        if not max_workers or max_workers <= 1 or len(files) <= 1:
+            return [func(file) for file in files]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+            return list(executor.map(func, files))
+
+    @staticmethod
+    def lint(config_yaml_file, ignore_multiple_for_score=False, max_workers=None):
         """
         The function to perform static analysis of R code.
 
@@ -153,6 +453,8 @@ class Linter:
 
         Args:
             config_yamk_file: (str): Path to the config yaml detailing which files to lint.
+            ignore_multiple_for_score (bool): whether to count repeats of the same style error only once.
+            max_workers (int | None): Number of files to lint concurrently, overriding `max_workers` in the config.
 
         Returns:
             JSON object: a JSON describing errors in format suitable for EDUKATE platform
@@ -174,18 +476,134 @@ class Linter:
                 ]
             }
         """
-        files_to_lint = [
-            joinpath(dirname(config_yaml_file), file)
-            for file
-            in Linter._read_config(config_yaml_file)["files"]
-        ]
+        config = load_config(config_yaml_file)
+
+        def lint_file(file):
+            return list(Linter._iter_config_file_errors(config, file))
+
+        if max_workers is None:
+            max_workers = config.max_workers
         errors_list = []
-        for file_to_lint in files_to_lint:
-            errors_list += Linter._parse_lintr_output(Linter._invoke_lintr(file_to_lint))
+        for file_errors in Linter._map_files(lint_file, config.files, max_workers):
+            errors_list += file_errors
+
+        return to_json(Linter._lint_report(errors_list, ignore_multiple_for_score))
+
+    @staticmethod
+    def _lint_report(errors_list, ignore_multiple_for_score=False):
+        """
+        Score the style errors of a submission and wrap them in the EDUKATE format.
 
+        Args:
+            errors_list (list[findings.Finding]): Errors from all of the submission's files.
+            ignore_multiple_for_score (bool): whether to count repeats of the same style error only once.
+
+        Returns:
+            JSON object: the JSON returned by `lint`, with the errors still as findings.
+        """
         score = Linter._score_file_by_errors(errors_list, ignore_multiple=ignore_multiple_for_score)
         out = {"runners": [{}]}
         out["runners"][0]["errors"] = errors_list
         out["runners"][0]["score"] = score
-        out["runners"][0]["runner_key"] = "Hadley Wickham's R Style Guide"
+        out["runners"][0]["runner_key"] = RUNNER_KEY
         return out
+
+    @staticmethod
+    def _iter_config_file_errors(config, file):
+        """
+        Lint one of the files in a config, streaming its style errors.
+
+        The file is traced as a "lint" span, which lasts until its last error has been consumed.
+
+        Args:
+            config (config.ExerciseConfig): The exercise's config, which the files are relative to.
+            file (str): The file to lint, as listed in the config.
+
+        Yields:
+            (findings.Finding): The style errors in the file.
+        """
+        # Lint with the same restrictions as the Validator so the lint pass it already ran is reused
+        restricted_functions = Linter._lint_restrictions(config.restricted_functions.get(file, frozenset()))
+        file_to_lint = joinpath(config.directory, file)
+        with tracing.span("lint", kind="style", file=file_to_lint) as span:
+            count = 0
+            for error in Linter._style_errors(Linter._iter_lint_file(file_to_lint, restricted_functions)):
+                count += 1
+                yield error
+            span.set(errors=count)
+
+    @staticmethod
+    def lint_to_file(config_yaml_file, out_file, ignore_multiple_for_score=False):
+        """
+        Lint the files in a config like `lint`, streaming the JSON to `out_file` as the errors are read from lintr.
+
+        Files are linted one at a time, so that memory use stays flat however many errors they have.
+        Given a path, the JSON is written to a temporary file alongside it which replaces it once linting succeeds, so
+        a failure never leaves a partial file.
+
+        Args:
+            config_yaml_file (str): Path to the config yaml detailing which files to lint.
+            out_file (str | TextIO): Path of the file to write the JSON to, or an open file.
+            ignore_multiple_for_score (bool): whether to count repeats of the same style error only once.
+        """
+        config = load_config(config_yaml_file)
+        errors = (
+            error
+            for file in config.files
+            for error in Linter._iter_config_file_errors(config, file)
+        )
+        if not isinstance(out_file, str):
+            Linter._write_lint_json(errors, out_file, ignore_multiple_for_score)
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(abspath(out_file)), prefix=".tmp-")
+        try:
+            # mkstemp creates the file readable only by its owner, which os.replace would keep
+            os.fchmod(fd, Linter._new_file_mode())
+            with os.fdopen(fd, "w") as tmp:
+                Linter._write_lint_json(errors, tmp, ignore_multiple_for_score)
+            os.replace(tmp_path, out_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _new_file_mode():
+        """
+        Get the mode `open` creates files with, which is 0o666 masked by the process' umask.
+
+        Returns:
+            (int): The mode.
+        """
+        try:
+            with open("/proc/self/status") as status:
+                for line in status:
+                    if line.startswith("Umask:"):
+                        return 0o666 & ~int(line.split()[1], 8)
+        except OSError:
+            pass
+        # The umask can only be read by setting it, so it is briefly changed for other threads
+        umask = os.umask(0o022)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+    @staticmethod
+    def _write_lint_json(errors, out_file, ignore_multiple_for_score=False):
+        """
+        Write the JSON returned by `lint` for a stream of errors, scoring them as they are written.
+
+        Args:
+            errors (Iterable[findings.Finding]): The style errors.
+            out_file (TextIO): File to write the JSON to.
+            ignore_multiple_for_score (bool): whether to count repeats of the same style error only once.
+        """
+        def write_each(errors):
+            for i, error in enumerate(errors):
+                if i:
+                    out_file.write(", ")
+                json.dump(error, out_file, default=json_default)
+                yield error
+
+        out_file.write('{"runners": [{"errors": [')
+        score = Linter._score_file_by_errors(write_each(errors), ignore_multiple=ignore_multiple_for_score)
+        out_file.write(f'], "score": {json.dumps(score)}, "runner_key": {json.dumps(RUNNER_KEY)}}}]}}')
@@ -0,0 +1,248 @@
+"""Describe an exercise's test files once, so the evaluator doesn't have to source each one again to find its tests."""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+from os.path import abspath, dirname, join as joinpath
+
+from . import tokenizer
+from .config import load_config
+
+__author__ = "Aidan Woolley"
+
+# Written alongside config.yaml, and read by evaluator() in tester.R
+MANIFEST_FILE = "tango_manifest.json"
+MANIFEST_VERSION = 1
+
+ASSIGNMENT_OPERATORS = frozenset({"<-", "<<-", "="})
+
+
+def _assignment_at(tokens, i):
+    """
+    Find the name and value of an assignment starting at `tokens[i]`, such as `x <- "a"` or `"x" = function`.
+
+    Args:
+        tokens (list[Token]): Significant tokens, as from `tokenizer.significant_tokens`.
+        i (int): Index of the token which may be the name being assigned to.
+
+    Returns:
+        (tuple[str, Token] | None): The name assigned to and the first token of the value,
+        or None if there is no assignment to a plain name at `i`.
+    """
+    if tokens[i].type not in (tokenizer.SYMBOL, tokenizer.STRING) or i + 2 >= len(tokens):
+        return None
+    if tokens[i + 1].value not in ASSIGNMENT_OPERATORS or (i > 0 and tokens[i - 1].value in ("$", "@")):
+        return None
+    return tokenizer.unquote(tokens[i]), tokens[i + 2]
+
+
+def _string_value(token):
+    """
+    Get the text of a string literal.
+
+    Args:
+        token (Token): Any token.
+
+    Returns:
+        (str | None): The contents of the string, or None if the token isn't a string.
+    """
+    return tokenizer.unquote(token) if token.type == tokenizer.STRING else None
+
+
+def _describe_top_level_assignment(description, tokens, i):
+    """
+    Add a top-level assignment in a test file to its description.
+
+    Args:
+        description (dict[str: Any]): The description being built by `describe_test_file`.
+        tokens (list[Token]): Significant tokens of the test file.
+        i (int): Index of the name being assigned to.
+
+    Returns:
+        (str | None): The name of the function being defined, if a function is assigned.
+    """
+    name, value = _assignment_at(tokens, i)
+    if value.value == "function":
+        if not name.startswith("."):
+            description["functions"].append(name)
+        return name
+    if name == "tdk_file_path" and _string_value(value) is not None:
+        description["file_path"] = _string_value(value)
+    elif name == ".descriptions" and value.value == "list" and tokenizer.is_call(tokens, i + 2):
+        description["descriptions"] = {
+            tokenizer.unquote(arg[0]): _string_value(arg[2])
+            for arg in tokenizer.call_arguments(tokens, i + 3)
+            if len(arg) == 3 and arg[1].value == "=" and _string_value(arg[2]) is not None
+        }
+    return None
+
+
+def describe_test_file(file_text):
+    """
+    Statically describe the tests in an R test file, as evaluator() in tester.R would find them.
+
+    Test functions are the functions assigned at the top level of the file whose names don't start with '.'.
+    The tested name and description of each test are the first strings assigned to `tdk_tested_name` and
+    `tdk_test_description` in its body.
+
+    Args:
+        file_text (str): R code of the test file.
+
+    Returns:
+        (dict[str: Any]): The sorted "functions", with the "tested_names" and "test_descriptions" of each,
+        the "file_path" assigned to `tdk_file_path`, and the "descriptions" in `.descriptions` if it is defined.
+    """
+    tokens = tokenizer.significant_tokens(file_text)
+    description = {"functions": [], "tested_names": {}, "test_descriptions": {}, "file_path": ""}
+    body_keys = {"tdk_tested_name": "tested_names", "tdk_test_description": "test_descriptions"}
+    current_function = None
+    depth = 0
+    for i, token in enumerate(tokens):
+        if token.type == tokenizer.PUNCTUATION and token.value in "([{":
+            depth += 1
+            continue
+        if token.type == tokenizer.PUNCTUATION and token.value in ")]}":
+            depth = max(0, depth - 1)
+            continue
+
+        assignment = _assignment_at(tokens, i)
+        if assignment is None:
+            continue
+        name, value = assignment
+        if depth == 0:
+            current_function = _describe_top_level_assignment(description, tokens, i)
+        elif current_function is not None and name in body_keys and _string_value(value) is not None:
+            description[body_keys[name]].setdefault(current_function, _string_value(value))
+
+    description["functions"] = sorted(set(description["functions"]), key=lambda name: (name.lower(), name))
+    return description
+
+
+def find_test_functions(file_text):
+    """
+    Statically find the test functions defined in an R test file.
+
+    Args:
+        file_text (str): R code of the test file.
+
+    Returns:
+        (list[str]): Names of the test functions, sorted as R's ls() would list them.
+    """
+    return describe_test_file(file_text)["functions"]
+
+
+def _describe(test_file, exercise_dir):
+    """
+    Describe a test file, with the md5 of its contents.
+
+    Args:
+        test_file (str): The test file, relative to `exercise_dir` as listed in config.yaml.
+        exercise_dir (str): Directory containing config.yaml.
+
+    Returns:
+        (dict[str: Any]): The description of the test file, see `describe_test_file`, and its "md5".
+    """
+    with open(joinpath(exercise_dir, test_file), "rb") as f:
+        contents = f.read()
+    description = describe_test_file(contents.decode("utf-8", errors="replace"))
+    # md5 since R can check it with tools::md5sum without any extra packages
+    description["md5"] = hashlib.md5(contents).hexdigest()
+    return description
+
+
+def _file_md5(file):
+    """
+    Hash the contents of a file.
+
+    Args:
+        file (str): Path to the file.
+
+    Returns:
+        (str): The md5 hex digest of the file.
+    """
+    with open(file, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def load_manifest(config_yaml_file):
+    """
+    Read the manifest of an exercise, if it has one.
+
+    Args:
+        config_yaml_file (str): Path to the exercise's config.yaml.
+
+    Returns:
+        (dict[str: Any] | None): The manifest, or None if there isn't one or it was written by another version.
+    """
+    try:
+        with open(joinpath(dirname(abspath(config_yaml_file)), MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def _save_manifest(manifest, exercise_dir):
+    """
+    Atomically write a manifest alongside config.yaml.
+
+    Args:
+        manifest (dict[str: Any]): The manifest.
+        exercise_dir (str): Directory containing config.yaml.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=exercise_dir, prefix=".tmp-")
+    with os.fdopen(fd, "w") as tmp:
+        json.dump(manifest, tmp, indent=2)
+    os.replace(tmp_path, joinpath(exercise_dir, MANIFEST_FILE))
+
+
+def update_manifest(config_yaml_file, write=True):
+    """
+    Describe every test file of an exercise which isn't already described by an up-to-date manifest entry.
+
+    Entries are matched to files by md5, so a manifest can be built once per exercise and is rebuilt for any test
+    file which changes. The manifest is only written if an entry changed.
+
+    Args:
+        config_yaml_file (str): Path to the exercise's config.yaml, which lists the test files under `tests`.
+        write (bool): Whether to write the manifest alongside config.yaml if it changed. A manifest which
+        can't be written, e.g. in a read-only exercise directory, is still returned.
+
+    Returns:
+        (dict[str: Any]): The manifest, with the description of each test file under "tests".
+    """
+    exercise_dir = dirname(abspath(config_yaml_file))
+    old_manifest = load_manifest(config_yaml_file) or {}
+    old_tests = old_manifest.get("tests", {})
+    manifest = {"version": MANIFEST_VERSION, "tests": {}}
+    for test_file in load_config(config_yaml_file).tests:
+        entry = old_tests.get(test_file)
+        if entry is None or entry.get("md5") != _file_md5(joinpath(exercise_dir, test_file)):
+            entry = _describe(test_file, exercise_dir)
+        manifest["tests"][test_file] = entry
+
+    if write and manifest != old_manifest:
+        try:
+            _save_manifest(manifest, exercise_dir)
+        except OSError:
+            pass  # The exercise directory may be read-only, the evaluator then sources the test files itself
+    return manifest
+
+
+def main(argv=None):
+    """
+    Build or refresh the manifest of an exercise.
+
+    Args:
+        argv (list[str]): Command line arguments, defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Describe an exercise's test files for the evaluator.")
+    parser.add_argument("config", help="the exercise's config.yaml")
+    args = parser.parse_args(argv)
+    update_manifest(args.config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Run an exercise's R test files in parallel, each in its own Rscript process with its own timeout."""
+import json
+import os
+import subprocess
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath
+
+from . import tracing
+from .config import load_config
+from .manifest import update_manifest
+from .r_pool import RWorkerError, RWorkerTimeout, _r_string
+from .results import fold_records, read_records
+
+__author__ = "Aidan Woolley"
+
+
+def _error_records(entry, test_names, info, details):
+    """
+    Create error records, in the format tester.R writes, for tests which didn't produce a result.
+
+    Args:
+        entry (dict[str: Any]): The manifest entry of the test file, see `manifest.describe_test_file`.
+        test_names (list[str]): Names of the tests.
+        info (str): Short description of what went wrong.
+        details (str): More information, such as R's error output.
+
+    Returns:
+        (list[dict[str: str]]): One error record per test.
+    """
+    records = []
+    for test_name in test_names:
+        record = {
+            "outcome": "errors",
+            "test_description": entry["test_descriptions"].get(test_name, ""),
+            "file_path": entry["file_path"],
+            "test_type": "primary",
+            "function_tested__name": entry["tested_names"].get(test_name, ""),
+            "info": info,
+            "details": details,
+            "test_name": test_name,
+        }
+        if "descriptions" in entry:
+            record["function_tested__description"] = entry["descriptions"].get(record["function_tested__name"], "")
+        records.append(record)
+    return records
+
+
+def _with_unfinished(records, entry, info, details):
+    """
+    Add errors for the tests of a file which didn't finish to the records of those which did.
+
+    Args:
+        records (list[dict[str: Any]]): The records of the tests which finished.
+        entry (dict[str: Any]): The manifest entry of the test file, see `manifest.describe_test_file`.
+        info (str): Short description of why the other tests didn't finish.
+        details (str): More information, such as R's error output.
+
+    Returns:
+        (list[dict[str: Any]]): The record of every test in the file.
+    """
+    finished = {record.get("test_name") for record in records}
+    unfinished = [name for name in entry["functions"] if name not in finished]
+    return records + _error_records(entry, unfinished, info, details)
+
+
+def _run_tester_process(test_file, tester, exercise_dir, timeout, records_path, span):
+    """
+    Run tester.R on one test file in a new Rscript process.
+
+    Args:
+        test_file (str): The test file, relative to `exercise_dir`.
+        tester (str): Path to tester.R.
+        exercise_dir (str): Directory containing config.yaml, which R is run in.
+        timeout (float): Seconds the file's tests may take.
+        records_path (str): Where tester.R writes the records.
+        span (tracing.Span): The span of the run, which is given its exit status.
+
+    Returns:
+        (tuple[str, str]): The info and details of errors for tests which didn't finish.
+    """
+    try:
+        process = subprocess.run(
+            ["Rscript", tester, records_path, test_file],
+            cwd=exercise_dir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            encoding="utf-8",
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        span.set(error="timeout")
+        return "timeout", f"{test_file} did not finish within {timeout} seconds"
+    span.set(exit_status=process.returncode)
+    return "error", process.stderr.strip()
+
+
+def _run_tester_in_session(test_file, tester, exercise_dir, timeout, records_path, span, session):
+    """
+    Run tester.R's evaluator on one test file in an R session.
+
+    tester.R is sourced for every file, so a session whose worker was killed by a timeout can carry on with a new one.
+
+    Args:
+        test_file (str): The test file, relative to `exercise_dir`.
+        tester (str): Path to tester.R.
+        exercise_dir (str): Directory containing config.yaml, which R is run in.
+        timeout (float): Seconds the file's tests may take.
+        records_path (str): Where tester.R writes the records.
+        span (tracing.Span): The span of the run, which is given its exit status.
+        session (r_pool.RWorkerPool): The session.
+
+    Returns:
+        (tuple[str, str]): The info and details of errors for tests which didn't finish.
+    """
+    r_cmd = (
+        f"local({{ old_wd <- setwd({_r_string(exercise_dir)}); on.exit(setwd(old_wd)); "
+        f"source({_r_string(tester)}); evaluator({_r_string(records_path)}, {_r_string(test_file)}) }})"
+    )
+    try:
+        _, status = session.run_with_status(r_cmd, timeout)
+    except RWorkerTimeout:
+        span.set(error="timeout")
+        return "timeout", f"{test_file} did not finish within {timeout} seconds"
+    except RWorkerError as e:
+        span.set(error="RWorkerError")
+        return "error", str(e)
+    span.set(exit_status=status)
+    return "error", f"R raised an error while running {test_file}"
+
+
+def run_test_file(test_file, tester, exercise_dir, timeout, entry, session=None):
+    """
+    Run the tests in one file in a new Rscript process, or in an R session.
+
+    Tests which finished keep their results even if the process times out or crashes.
+    Every test in the file which didn't finish is reported as an error.
+    The run is traced as a "tester" span.
+
+    Args:
+        test_file (str): The test file, relative to `exercise_dir` as listed in config.yaml.
+        tester (str): Path to tester.R.
+        exercise_dir (str): Directory containing config.yaml, which R is run in.
+        timeout (float): Seconds the file's tests may take.
+        entry (dict[str: Any]): The manifest entry of the test file, see `manifest.describe_test_file`.
+        session (r_pool.RWorkerPool | None): Pool of R workers to run the tests in instead of a new process.
+
+    Returns:
+        (list[dict[str: Any]]): The record of each test in the file, see `results.read_records`.
+    """
+    fd, records_path = tempfile.mkstemp(suffix=".ndjson")
+    os.close(fd)
+    try:
+        with tracing.span("tester", kind="tester", file=test_file, session=session is not None) as span:
+            if session is None:
+                info, details = _run_tester_process(test_file, tester, exercise_dir, timeout, records_path, span)
+            else:
+                info, details = _run_tester_in_session(
+                    test_file, tester, exercise_dir, timeout, records_path, span, session
+                )
+        records = list(read_records(records_path))
+    finally:
+        os.remove(records_path)
+
+    return _with_unfinished(records, entry, info, details)
+
+
+def run_tests(config_yaml_file, tester, out_path, max_workers=None, timeout=60, session=None):
+    """
+    Run every test file listed in config.yaml, several at a time, and write the merged results to `out_path`.
+
+    Each file gets its own Rscript process and timeout, so one slow file only loses its own unfinished tests.
+    Given a session, the files are instead run one after another in it, each still with its own timeout.
+    tester.R's helper scripts are sourced relative to the config's directory, so they must be alongside it.
+
+    Args:
+        config_yaml_file (str): Path to the exercise's config.yaml, which lists the test files under `tests`.
+        tester (str): Path to tester.R.
+        out_path (str): Where to write evaluation.json.
+        max_workers (int | None): Number of test files to run at once, defaults to the number of CPUs.
+        timeout (float): Seconds each test file may take.
+        session (r_pool.RWorkerPool | None): Pool of R workers to run the test files in, see `run_test_file`.
+
+    Returns:
+        (dict[str: Any]): The evaluation JSON which was written.
+    """
+    config = load_config(config_yaml_file)
+    exercise_dir = config.directory
+    test_files = config.tests
+    tester = abspath(tester)
+    # Lets R skip sourcing each test file a second time just to list its tests
+    manifest = update_manifest(config_yaml_file)
+
+    def run(test_file):
+        return run_test_file(test_file, tester, exercise_dir, timeout, manifest["tests"][test_file], session)
+
+    if session is not None:
+        evaluation = fold_records(record for test_file in test_files for record in run(test_file))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            evaluation = fold_records(record for records in executor.map(run, test_files) for record in records)
+
+    with open(out_path, "w") as out:
+        json.dump(evaluation, out)
+    return evaluation
@@ -0,0 +1,93 @@
+"""Run checks over a submission's files in stages ordered by cost, optionally stopping at the first stage to fail."""
+from collections import namedtuple
+
+from . import tracing
+
+__author__ = "Aidan Woolley"
+
+# Stop after the first stage which finds any failures or errors, so later (more expensive) stages never run
+FAIL_FAST = "fail_fast"
+# Run every stage to give full feedback
+COLLECT_ALL = "collect_all"
+POLICIES = (FAIL_FAST, COLLECT_ALL)
+
+Stage = namedtuple("Stage", ["name", "group", "check"])
+Stage.__doc__ = """
+A check run on every file.
+
+`check` takes a file and returns its (failures, errors). A file gets the success of a `group` of stages if every
+stage in the group ran and found nothing.
+"""
+
+StageTiming = namedtuple("StageTiming", ["stage", "file_path", "seconds"])
+
+
+def _timed(stage, file, path):
+    """
+    Run a stage's check on `file`, tracing it as a "validate" span.
+
+    Args:
+        stage (Stage): The stage.
+        file (Any): The file to check.
+        path (str): Path of the file.
+
+    Returns:
+        (tuple[list, list, float]): The failures and errors found, and the time taken in seconds.
+    """
+    with tracing.span("validate", kind=stage.name, file=path) as span:
+        failures, errors = stage.check(file)
+        span.set(failures=len(failures), errors=len(errors))
+    return failures, errors, span.duration
+
+
+def run_stages(stages, files, group_success, file_path=lambda file: file, policy=COLLECT_ALL, map_files=None):
+    """
+    Run each stage, cheapest first, over all the files before moving on to the next stage.
+
+    Args:
+        stages (list[Stage]): The stages, in the order to run them.
+        files (list[Any]): The files to check, in the order results should be given.
+        group_success (Callable[[str, Any], dict]): Creates the success of a group of stages for a file.
+        file_path (Callable[[Any], str]): Gets the path of a file, for timings.
+        policy (str): FAIL_FAST or COLLECT_ALL.
+        map_files (Callable | None): Maps a function over the files, preserving order, e.g. `Linter._map_files`.
+
+    Returns:
+        (tuple[list[tuple[list, list, list]], list[StageTiming]]): The successes, failures and errors of each file,
+        and the time each stage took on each file.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown validation policy {policy!r}, expected one of {', '.join(POLICIES)}")
+    if map_files is None:
+        def map_files(func, items):
+            return [func(item) for item in items]
+
+    results = [([], [], []) for _ in files]
+    dirty_groups = [set() for _ in files]
+    timings = []
+    stages_run = 0
+    for stage in stages:
+        stages_run += 1
+        stage_failed = False
+        checked = map_files(lambda file: _timed(stage, file, file_path(file)), files)
+        for i, (failures, errors, seconds) in enumerate(checked):
+            results[i][1].extend(failures)
+            results[i][2].extend(errors)
+            timings.append(StageTiming(stage.name, file_path(files[i]), seconds))
+            if failures or errors:
+                dirty_groups[i].add(stage.group)
+                stage_failed = True
+        if stage_failed and policy == FAIL_FAST:
+            break
+
+    # A group only succeeds if all of its stages ran
+    groups_run = [stage.group for stage in stages[:stages_run]]
+    groups_skipped = {stage.group for stage in stages[stages_run:]}
+    complete_groups = [group for i, group in enumerate(groups_run) if group not in groups_run[:i]]
+    for i, file in enumerate(files):
+        results[i][0].extend(
+            group_success(group, file)
+            for group in complete_groups
+            if group not in groups_skipped and group not in dirty_groups[i]
+        )
+    return results, timings
@@ -0,0 +1,399 @@
+"""A pool of long-lived R worker processes which execute commands sent to them over a pipe."""
+import json
+import os
+import queue
+import selectors
+import subprocess
+import threading
+import time
+import uuid
+
+from contextlib import contextmanager
+
+__author__ = "Aidan Woolley"
+
+# Commands are sent hex-encoded on a single line so that newlines and quotes in the R code survive the pipe.
+# Every command is evaluated in a fresh environment, shared by its top-level expressions but not with other commands,
+# so variables don't leak between jobs, and visible results are printed just as `Rscript -e` would. Output is
+# terminated by the sentinel followed by the exit status of the command.
+_WORKER_LOOP = r'''
+tango_worker_loop <- function(sentinel) {
+    stdin_con <- file("stdin", "r")
+    repeat {
+        line <- readLines(stdin_con, n = 1)
+        if (length(line) == 0) break
+        n <- nchar(line)
+        cmd <- if (n == 0) "" else rawToChar(as.raw(strtoi(substring(line, seq(1, n, 2), seq(2, n, 2)), 16L)))
+        status <- tryCatch({
+            env <- new.env(parent = globalenv())
+            for (expr in parse(text = cmd)) {
+                res <- withVisible(eval(expr, envir = env))
+                if (res$visible) print(res$value)
+            }
+            0
+        }, error = function(e) {
+            message("Error: ", conditionMessage(e))
+            1
+        })
+        flush(stdout())
+        flush(stderr())
+        cat(sentinel, status, "\n", sep = "")
+        flush(stdout())
+    }
+}
+'''
+
+
+class RWorkerError(RuntimeError):
+    """Raised when an R worker dies or fails to answer a command in time."""
+
+
+class RWorkerTimeout(RWorkerError):
+    """Raised when an R worker fails to answer a command in time, after which it is killed."""
+
+
+def _r_string(value):
+    """
+    Quote a string as an R string literal.
+
+    Args:
+        value (str): The string.
+
+    Returns:
+        (str): R code for the string. JSON string escapes are all valid in R.
+    """
+    return json.dumps(value)
+
+
+class RWorker:
+    """A single long-lived Rscript process with packages preloaded, executing one command at a time."""
+
+    def __init__(self, preload=("lintr",), timeout=60):
+        """
+        Start a new R worker process.
+
+        Args:
+            preload (tuple[str]): Libraries to load once when the worker starts.
+            timeout (float): Default number of seconds to wait for a command to complete.
+        """
+        self.timeout = timeout
+        self.jobs_run = 0
+        self._sentinel = f"<<tango-{uuid.uuid4().hex}>>"
+        libraries = ''.join(f'suppressMessages(library("{lib}"));' for lib in preload)
+        self._process = subprocess.Popen(
+            ["Rscript", "-e", f'{_WORKER_LOOP}{libraries}tango_worker_loop("{self._sentinel}")'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+    @property
+    def pid(self):
+        """(int): The process id of the R process."""
+        return self._process.pid
+
+    def alive(self):
+        """
+        Check whether the R process is still running.
+
+        Returns:
+            (bool): True if the process has not exited.
+        """
+        return self._process.poll() is None
+
+    def memory_mb(self):
+        """
+        Read the resident memory of the R process from /proc.
+
+        Returns:
+            (float): Resident set size in megabytes, or 0 if it can't be determined.
+        """
+        try:
+            with open(f"/proc/{self.pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError):
+            pass
+        return 0.0
+
+    def run(self, r_cmd, timeout=None):
+        """
+        Execute `r_cmd` in the worker and wait for its output.
+
+        Args:
+            r_cmd (str): The R command to execute, as would be passed to `Rscript -e`.
+            timeout (float): Seconds to wait for the command, defaults to the worker's timeout.
+
+        Returns:
+            (tuple[str, int]): Everything the command wrote to stdout, and 0 on success or 1 if R raised an error.
+        """
+        if not self.alive():
+            raise RWorkerError(f"R worker {self.pid} has exited")
+        try:
+            self._process.stdin.write(r_cmd.encode("utf-8").hex().encode("ascii") + b"\n")
+            self._process.stdin.flush()
+        except BrokenPipeError:
+            raise RWorkerError(f"R worker {self.pid} has exited")
+
+        output, status = self._read_until_sentinel(self.timeout if timeout is None else timeout)
+        self.jobs_run += 1
+        return output, status
+
+    def _read_until_sentinel(self, timeout):
+        """
+        Read stdout of the worker until the sentinel line marking the end of a command.
+
+        Args:
+            timeout (float): Seconds to wait before giving up and killing the worker.
+
+        Returns:
+            (tuple[str, int]): The command output and its exit status.
+        """
+        sentinel = self._sentinel.encode("ascii")
+        deadline = time.monotonic() + timeout
+        buffer = bytearray()
+        fd = self._process.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                idx = buffer.find(sentinel)
+                if idx != -1:
+                    end = buffer.find(b"\n", idx)
+                    if end != -1:
+                        status = int(buffer[idx + len(sentinel):end] or 0)
+                        return buffer[:idx].decode("utf-8"), status
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    self.close()
+                    raise RWorkerTimeout(f"R worker timed out after {timeout} seconds")
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self.close()
+                    raise RWorkerError("R worker exited while running a command")
+                buffer += chunk
+
+    def ping(self, timeout=5):
+        """
+        Health check the worker by running a no-op command.
+
+        Args:
+            timeout (float): Seconds to wait for the reply.
+
+        Returns:
+            (bool): True if the worker answered in time.
+        """
+        try:
+            self.run("invisible(NULL)", timeout=timeout)
+        except RWorkerError:
+            return False
+        self.jobs_run -= 1  # Health checks aren't jobs
+        return True
+
+    def close(self):
+        """Stop the R process, killing it if it doesn't exit promptly."""
+        if self.alive():
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+                self._process.wait()
+        self._process.stdout.close()
+
+    def __enter__(self):
+        """Use the worker as a context manager which closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the worker."""
+        self.close()
+
+
+class RWorkerPool:
+    """A bounded, thread-safe pool of warm R workers which are recycled after too many jobs or too much memory."""
+
+    def __init__(self, size=2, max_jobs=200, max_memory_mb=1024, timeout=60, preload=("lintr",)):
+        """
+        Create a pool. Workers are started lazily, up to `size` at a time.
+
+        Args:
+            size (int): Maximum number of concurrently running workers.
+            max_jobs (int): Number of commands after which a worker is replaced.
+            max_memory_mb (float): Resident memory after which a worker is replaced.
+            timeout (float): Seconds to wait for any one command.
+            preload (tuple[str]): Libraries every worker loads at startup.
+        """
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_memory_mb = max_memory_mb
+        self.timeout = timeout
+        self.preload = preload
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _acquire(self):
+        """
+        Take an idle, healthy worker from the pool, starting a new one if there are none.
+
+        Returns:
+            (RWorker): A worker reserved for the caller.
+        """
+        if self._closed:
+            raise RWorkerError("The R worker pool has been closed")
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    return RWorker(self.preload, self.timeout)
+                if worker.alive():
+                    return worker
+                worker.close()
+        except BaseException:
+            # A worker which failed to start mustn't hold its slot, or the pool would eventually deadlock
+            self._slots.release()
+            raise
+
+    def _release(self, worker):
+        """
+        Return `worker` to the pool, or retire it if it is dead or due for recycling.
+
+        Args:
+            worker (RWorker): A worker previously returned by `_acquire`.
+        """
+        try:
+            worn_out = worker.jobs_run >= self.max_jobs or worker.memory_mb() >= self.max_memory_mb
+            if self._closed or worn_out or not worker.alive():
+                worker.close()
+            else:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+    def run(self, r_cmd):
+        """
+        Execute `r_cmd` on a pooled worker.
+
+        Args:
+            r_cmd (str): The R command to execute.
+
+        Returns:
+            (str): Everything the command wrote to stdout.
+        """
+        output, _ = self.run_with_status(r_cmd)
+        return output
+
+    def run_with_status(self, r_cmd, timeout=None):
+        """
+        Execute `r_cmd` on a pooled worker, also giving whether it succeeded.
+
+        Args:
+            r_cmd (str): The R command to execute.
+            timeout (float | None): Seconds to wait for the command, defaults to the pool's timeout.
+
+        Returns:
+            (tuple[str, int]): Everything the command wrote to stdout, and 0 on success or 1 if R raised an error.
+        """
+        worker = self._acquire()
+        try:
+            return worker.run(r_cmd, timeout)
+        finally:
+            self._release(worker)
+
+    def check_health(self):
+        """
+        Ping every idle worker, closing any which don't answer.
+
+        Returns:
+            (int): The number of healthy idle workers.
+        """
+        healthy = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker.ping():
+                healthy.append(worker)
+            else:
+                worker.close()
+        for worker in healthy:
+            self._idle.put(worker)
+        return len(healthy)
+
+    def close(self):
+        """Stop all idle workers. Workers in use are stopped when they are released."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# A pool used by one thread instead of the shared pool, see `use_pool`
+_thread_pool = threading.local()
+
+
+def enable_pool(**pool_options):
+    """
+    Route all `Linter._invoke_R` calls through a shared pool of warm R workers.
+
+    Args:
+        **pool_options: Keyword arguments for `RWorkerPool`.
+
+    Returns:
+        (RWorkerPool): The newly enabled pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = RWorkerPool(**pool_options)
+        return _pool
+
+
+def disable_pool():
+    """Close the shared pool so that R commands are run by one-shot Rscript processes again."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def get_pool():
+    """
+    Get the pool this thread's R commands are run by: the one given to `use_pool`, or the shared pool if enabled.
+
+    Returns:
+        (RWorkerPool | None): The pool, or None if R commands should be run one-shot.
+    """
+    pool = getattr(_thread_pool, "pool", None)
+    return _pool if pool is None else pool
+
+
+@contextmanager
+def use_pool(pool):
+    """
+    Route the `Linter._invoke_R` calls made by this thread in a `with` block through `pool`.
+
+    Commands run by other threads, such as those started by `max_workers`, aren't affected.
+
+    Args:
+        pool (RWorkerPool): The pool, e.g. with a single worker to grade a submission in one R session.
+
+    Yields:
+        (RWorkerPool): The pool.
+    """
+    previous = getattr(_thread_pool, "pool", None)
+    _thread_pool.pool = pool
+    try:
+        yield pool
+    finally:
+        _thread_pool.pool = previous
@@ -0,0 +1,103 @@
+"""Fold the test records tester.R streams, one JSON object per line, into an EDUKATE evaluation document."""
+import argparse
+import json
+import sys
+
+__author__ = "Aidan Woolley"
+
+# The runner list each outcome's records go in
+OUTCOMES = ("successes", "failures", "errors")
+
+
+def read_records(records_file):
+    """
+    Read the records of the tests which finished.
+
+    The last line is skipped if it is incomplete, since the process writing it may have been killed.
+
+    Args:
+        records_file (str | TextIO): Path to the records, or the open file.
+
+    Yields:
+        (dict[str: Any]): Each test's record, with its "outcome".
+    """
+    if isinstance(records_file, str):
+        with open(records_file) as f:
+            yield from read_records(f)
+        return
+
+    for line in records_file:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if line.endswith("\n"):
+                raise
+            return
+        if record.get("outcome") not in OUTCOMES:
+            raise ValueError(f"Unknown test outcome {record.get('outcome')!r} for {record.get('test_name')!r}")
+        yield record
+
+
+def fold_records(records):
+    """
+    Create the evaluation document of the tests which have records.
+
+    Args:
+        records (Iterable[dict[str: Any]]): Each test's record, with its "outcome".
+
+    Returns:
+        (dict[str: Any]): The evaluation JSON, in EDUKATE format.
+    """
+    runner = {outcome: [] for outcome in OUTCOMES}
+    for record in records:
+        record = dict(record)
+        runner[record.pop("outcome")].append(record)
+
+    tests_run = sum(len(runner[outcome]) for outcome in OUTCOMES)
+    if tests_run == 0:
+        # This doesn't make sense, alert the developer
+        raise ValueError("zero tests supplied")
+    runner["tests_run"] = tests_run
+    runner["runner_key"] = "testcases"
+    return {"passed": not runner["failures"] and not runner["errors"], "runners": [runner]}
+
+
+def finalize(records_file, out_file):
+    """
+    Write the evaluation document of the tests which have records.
+
+    Args:
+        records_file (str | TextIO): Path to the records, or the open file.
+        out_file (str | TextIO): Path to write evaluation.json to, or the open file.
+
+    Returns:
+        (dict[str: Any]): The evaluation JSON which was written.
+    """
+    evaluation = fold_records(read_records(records_file))
+    if isinstance(out_file, str):
+        with open(out_file, "w") as out:
+            json.dump(evaluation, out)
+    else:
+        json.dump(evaluation, out_file)
+    return evaluation
+
+
+def main(argv=None):
+    """
+    Turn the records written by `Rscript tester.R` into evaluation.json.
+
+    Args:
+        argv (list[str]): Command line arguments, defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Fold tester.R's test records into an evaluation document.")
+    parser.add_argument("records", help="the records written by tester.R")
+    parser.add_argument("out", nargs="?", help="where to write evaluation.json, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    finalize(args.records, args.out or sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
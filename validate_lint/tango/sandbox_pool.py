@@ -0,0 +1,336 @@
+"""A pool of pre-started grading sandboxes, each grading one job directory at a time over a line protocol."""
+import os
+import queue
+import selectors
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+
+from os.path import abspath, isdir, join as joinpath
+
+__author__ = "Aidan Woolley"
+
+# A sandbox runs `run_tests.py <config> --serve`. It is sent the path of a job directory on a line of its stdin,
+# grades the submission in it, writing the results to its out/, and replies on a line of its stdout with "ok" or
+# "error: " and why grading failed.
+DEMO_IMAGE = "awoolley10/tango-demo"
+# Where a container sees the one job directory mounted into it
+CONTAINER_JOB_DIR = "/home/tango/job"
+
+
+class SandboxError(RuntimeError):
+    """Raised when a sandbox dies, fails to grade a job or doesn't reply in time."""
+
+
+class ProcessSandbox:
+    """A grading process which serves jobs over its stdin and stdout, one at a time."""
+
+    def __init__(self, command, timeout=120):
+        """
+        Start the sandbox.
+
+        Args:
+            command (list[str]): Command which serves jobs, such as `python3 run_tests.py config.yaml --serve`.
+            timeout (float): Seconds to wait for a job to be graded.
+        """
+        self.timeout = timeout
+        self.jobs_run = 0
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._buffer = bytearray()
+
+    @property
+    def pid(self):
+        """(int): The process id of the sandbox."""
+        return self._process.pid
+
+    def alive(self):
+        """
+        Check whether the sandbox is still running.
+
+        Returns:
+            (bool): True if the process has not exited.
+        """
+        return self._process.poll() is None
+
+    def job_path(self, job_dir):
+        """
+        Get the path the sandbox sees a job directory at.
+
+        Args:
+            job_dir (str): The job directory.
+
+        Returns:
+            (str): The path to send the sandbox.
+        """
+        return abspath(job_dir)
+
+    def run(self, job_dir, timeout=None):
+        """
+        Grade the submission in a job directory.
+
+        Args:
+            job_dir (str): Directory holding the submission's src/ and testcases/, and an out/ for the results.
+            timeout (float): Seconds to wait, defaults to the sandbox's timeout.
+
+        Raises:
+            SandboxError: If grading failed. The sandbox is stopped if it died or timed out.
+        """
+        if not self.alive():
+            raise SandboxError(f"Sandbox {self.pid} has exited")
+        try:
+            self._process.stdin.write(self.job_path(job_dir).encode("utf-8") + b"\n")
+            self._process.stdin.flush()
+        except BrokenPipeError:
+            raise SandboxError(f"Sandbox {self.pid} has exited")
+
+        reply = self._read_line(self.timeout if timeout is None else timeout)
+        self.jobs_run += 1
+        if reply != "ok":
+            raise SandboxError(f"Sandbox {self.pid} failed to grade {job_dir}: {reply}")
+
+    def _read_line(self, timeout):
+        """
+        Read the sandbox's reply.
+
+        Args:
+            timeout (float): Seconds to wait before giving up and stopping the sandbox.
+
+        Returns:
+            (str): The reply, without its newline.
+        """
+        deadline = time.monotonic() + timeout
+        fd = self._process.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                end = self._buffer.find(b"\n")
+                if end != -1:
+                    line = self._buffer[:end].decode("utf-8")
+                    del self._buffer[:end + 1]
+                    return line.strip()
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    self.close()
+                    raise SandboxError(f"Sandbox timed out after {timeout} seconds")
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self.close()
+                    raise SandboxError("Sandbox exited while grading")
+                self._buffer += chunk
+
+    def close(self):
+        """Stop the sandbox, killing it if it doesn't exit promptly."""
+        if self.alive():
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+                self._process.wait()
+        self._process.stdout.close()
+
+    def __enter__(self):
+        """Use the sandbox as a context manager which closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the sandbox."""
+        self.close()
+
+
+class DockerSandbox(ProcessSandbox):
+    """
+    A grading container, started before its job arrives, which can only see that job's files.
+
+    The container is given a job directory of its own, in which the submission's src/ and testcases/ are read-only.
+    A job's submission is copied in when it is run, and its results copied out again afterwards. Student code runs in
+    the container, so it should grade a single job (`max_jobs=1` in a pool): a later job's grade could be faked.
+    """
+
+    def __init__(self, jobs_dir, host_jobs_dir=None, image=DEMO_IMAGE, timeout=120):
+        """
+        Start a container.
+
+        Args:
+            jobs_dir (str): Directory to create the container's job directory in.
+            host_jobs_dir (str | None): Path of `jobs_dir` on the docker host, if it differs, e.g. when this process
+                is itself in a container.
+            image (str): The grading image, whose entrypoint is `run_tests.py` with the exercise's config.
+            timeout (float): Seconds to wait for a job to be graded.
+        """
+        self.name = f"tango-sandbox-{uuid.uuid4().hex}"
+        self.sandbox_dir = joinpath(abspath(jobs_dir), self.name)
+        for directory in ("src", "testcases", "out"):
+            os.makedirs(joinpath(self.sandbox_dir, directory))
+        host_dir = joinpath(host_jobs_dir or abspath(jobs_dir), self.name)
+        try:
+            super().__init__([
+                "docker", "run", "--rm", "--interactive", "--name", self.name,
+                "--mount", f"type=bind,src={host_dir},dst={CONTAINER_JOB_DIR}",
+                "--mount", f"type=bind,src={host_dir}/src,dst={CONTAINER_JOB_DIR}/src,readonly=true",
+                "--mount", f"type=bind,src={host_dir}/testcases,dst={CONTAINER_JOB_DIR}/testcases,readonly=true",
+                image, "--serve"
+            ], timeout)
+        except BaseException:
+            shutil.rmtree(self.sandbox_dir, ignore_errors=True)
+            raise
+
+    def job_path(self, job_dir):
+        """
+        Get the path the container sees a job directory at.
+
+        Args:
+            job_dir (str): The job directory, whose submission is copied to the container's own.
+
+        Returns:
+            (str): The path of the container's job directory.
+        """
+        return CONTAINER_JOB_DIR
+
+    @staticmethod
+    def _copy_contents(source_dir, destination_dir):
+        """
+        Copy the files and directories in one directory into another.
+
+        Args:
+            source_dir (str): The directory to copy from, which may not exist.
+            destination_dir (str): The existing directory to copy into.
+        """
+        if not isdir(source_dir):
+            return
+        for name in os.listdir(source_dir):
+            source = joinpath(source_dir, name)
+            if isdir(source):
+                shutil.copytree(source, joinpath(destination_dir, name))
+            else:
+                shutil.copy2(source, joinpath(destination_dir, name))
+
+    def run(self, job_dir, timeout=None):
+        """
+        Grade the submission in a job directory, by copying it into the container's job directory.
+
+        Args:
+            job_dir (str): Directory holding the submission's src/ and testcases/, and an out/ for the results.
+            timeout (float): Seconds to wait, defaults to the sandbox's timeout.
+
+        Raises:
+            SandboxError: If grading failed. The sandbox is stopped if it died or timed out.
+        """
+        for directory in ("src", "testcases"):
+            self._copy_contents(joinpath(job_dir, directory), joinpath(self.sandbox_dir, directory))
+        try:
+            super().run(job_dir, timeout)
+        finally:
+            self._copy_contents(joinpath(self.sandbox_dir, "out"), joinpath(job_dir, "out"))
+
+    def close(self):
+        """Stop the container, which would outlive a killed `docker run`, and delete its job directory."""
+        if self.alive():
+            subprocess.run(["docker", "kill", self.name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        super().close()
+        shutil.rmtree(self.sandbox_dir, ignore_errors=True)
+
+
+class SandboxPool:
+    """
+    Keeps `size` sandboxes started and idle, hands one to each job, and replaces sandboxes after `max_jobs` jobs.
+
+    Replacements are started in the background so that a started sandbox is usually waiting for the next job.
+    """
+
+    def __init__(self, start_sandbox, size=2, max_jobs=50, start_attempts=3, retry_delay=1):
+        """
+        Start the pool's sandboxes.
+
+        Args:
+            start_sandbox (Callable[[], ProcessSandbox]): Starts a new sandbox.
+            size (int): Number of sandboxes to keep.
+            max_jobs (int): Number of jobs after which a sandbox is replaced, 1 to use a new sandbox for every job.
+            start_attempts (int): Number of times to try starting a replacement sandbox.
+            retry_delay (float): Seconds to wait before trying again, doubled after each failed attempt.
+        """
+        self.size = size
+        self.max_jobs = max_jobs
+        self.start_attempts = start_attempts
+        self.retry_delay = retry_delay
+        self._start_sandbox = start_sandbox
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(start_sandbox())
+
+    def _start_replacement(self):
+        """
+        Start a sandbox, trying again with exponential backoff if it fails.
+
+        Returns:
+            (ProcessSandbox | SandboxError): The sandbox, or the error to give the job which takes its place in the
+                pool if every attempt failed.
+        """
+        delay = self.retry_delay
+        for attempt in range(1, self.start_attempts + 1):
+            try:
+                return self._start_sandbox()
+            except Exception as e:
+                error = SandboxError(f"Couldn't start a sandbox after {attempt} attempts: {type(e).__name__}: {e}")
+            if attempt < self.start_attempts and not self._closed:
+                time.sleep(delay)
+                delay *= 2
+        return error
+
+    def _replace(self, sandbox):
+        """
+        Stop a sandbox and start a new one in its place, in the background.
+
+        If the new sandbox can't be started, its error is put in the pool instead so that the slot isn't lost:
+        the next job fails with it rather than waiting forever, and another replacement is started.
+
+        Args:
+            sandbox (ProcessSandbox | None): The sandbox to retire, or None if there isn't one.
+        """
+        def replace():
+            if sandbox is not None:
+                sandbox.close()
+            if not self._closed:
+                self._idle.put(self._start_replacement())
+
+        threading.Thread(target=replace, daemon=True).start()
+
+    def run(self, job_dir, timeout=None):
+        """
+        Grade the submission in a job directory on an idle sandbox, waiting for one if they are all busy.
+
+        Args:
+            job_dir (str): Directory holding the submission's src/ and testcases/, and an out/ for the results.
+            timeout (float | None): Seconds to wait for grading, defaults to the sandbox's timeout.
+
+        Raises:
+            SandboxError: If grading failed.
+        """
+        if self._closed:
+            raise SandboxError("The sandbox pool has been closed")
+        sandbox = self._idle.get()
+        if isinstance(sandbox, SandboxError):
+            self._replace(None)
+            raise sandbox
+        try:
+            sandbox.run(job_dir, timeout)
+        finally:
+            if self._closed or sandbox.jobs_run >= self.max_jobs or not sandbox.alive():
+                self._replace(sandbox)
+            else:
+                self._idle.put(sandbox)
+
+    def close(self):
+        """Stop all idle sandboxes. Busy sandboxes are stopped when their job finishes."""
+        self._closed = True
+        while True:
+            try:
+                sandbox = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(sandbox, SandboxError):
+                sandbox.close()
@@ -0,0 +1,278 @@
+"""Score style errors under configurable policies, over whole batches of submissions at once."""
+import argparse
+import json
+import sys
+
+from array import array
+from collections import Counter
+
+__author__ = "Aidan Woolley"
+
+# Score deducted for each style error by default
+DEDUCTION = 0.05
+
+
+class ScoringPolicy:
+    """
+    How much each style error costs a submission, whose score starts at 1 and is never below 0.
+
+    Attributes:
+        weights (dict[str: float]): Deduction for an error of each severity, e.g. "style", "warning" or "info".
+        default_weight (float): Deduction for an error of a severity not in `weights`.
+        rule_caps (dict[str: int]): Most errors with each message which are deducted for, per submission, whatever
+            their severities. The most costly of them are deducted for.
+        default_cap (int | None): Most errors with a message not in `rule_caps` which are deducted for, None for no
+            limit.
+    """
+
+    __slots__ = ("weights", "default_weight", "rule_caps", "default_cap")
+
+    def __init__(self, weights=None, default_weight=DEDUCTION, rule_caps=None, default_cap=None):
+        """
+        Create a policy.
+
+        Args:
+            weights (dict[str: float]): Deduction for an error of each severity.
+            default_weight (float): Deduction for an error of any other severity.
+            rule_caps (dict[str: int]): Most errors with each message which are deducted for.
+            default_cap (int | None): Most errors with any other message which are deducted for.
+        """
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self.rule_caps = dict(rule_caps or {})
+        self.default_cap = default_cap
+
+    def weight(self, severity):
+        """
+        Get the deduction for an error.
+
+        Args:
+            severity (str): The error's severity.
+
+        Returns:
+            (float): The deduction.
+        """
+        return self.weights.get(severity, self.default_weight)
+
+    def cap(self, rule):
+        """
+        Get the most errors with a message which are deducted for.
+
+        Args:
+            rule (str): The error's message.
+
+        Returns:
+            (int | None): The cap, None for no limit.
+        """
+        return self.rule_caps.get(rule, self.default_cap)
+
+
+# Deduct for every error
+DEFAULT_POLICY = ScoringPolicy()
+
+# Deduct once for each distinct message of the "info" severity, as `ignore_multiple_for_score` asks
+IGNORE_MULTIPLE_POLICY = ScoringPolicy(weights={"info": DEDUCTION}, default_weight=0, default_cap=1)
+
+
+def policy_for(ignore_multiple):
+    """
+    Get the policy `Linter.lint` scores with.
+
+    Args:
+        ignore_multiple (bool): whether to count repeats of the same style error only once.
+
+    Returns:
+        (ScoringPolicy): The policy.
+    """
+    return IGNORE_MULTIPLE_POLICY if ignore_multiple else DEFAULT_POLICY
+
+
+class LintColumns:
+    """
+    The style errors of many submissions, stored as columns of codes so they can be scored again cheaply.
+
+    Each error is a row of the `submissions`, `severities` and `rules` arrays. Severities and messages are interned in
+    tables, so each distinct string is stored once however many errors have it.
+
+    Attributes:
+        submission_count (int): Number of submissions added.
+        submissions (array.array): Index of each error's submission.
+        severities (array.array): Code of each error's severity in `severity_names`.
+        rules (array.array): Code of each error's message in `rule_names`.
+        severity_names (list[str]): Each distinct severity, by code.
+        rule_names (list[str]): Each distinct message, by code.
+    """
+
+    __slots__ = (
+        "submission_count", "submissions", "severities", "rules", "severity_names", "rule_names", "_severity_codes",
+        "_rule_codes"
+    )
+
+    def __init__(self):
+        """Create empty columns."""
+        self.submission_count = 0
+        self.submissions = array("I")
+        self.severities = array("H")
+        self.rules = array("I")
+        self.severity_names = []
+        self.rule_names = []
+        self._severity_codes = {}
+        self._rule_codes = {}
+
+    @staticmethod
+    def _code(name, codes, names):
+        """
+        Intern a string in a table.
+
+        Args:
+            name (str): The string.
+            codes (dict[str: int]): Code of each string in the table.
+            names (list[str]): Each string in the table, by code.
+
+        Returns:
+            (int): The string's code.
+        """
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(sys.intern(name))
+        return code
+
+    def add(self, errors):
+        """
+        Add a submission's style errors.
+
+        Args:
+            errors (Iterable[findings.Finding | Mapping[str: (str | int)]]): The errors, as found by `Linter.lint`,
+                iterated over once.
+
+        Returns:
+            (int): The index of the submission.
+        """
+        submission = self.submission_count
+        self.submission_count += 1
+        for error in errors:
+            self.submissions.append(submission)
+            self.severities.append(self._code(error["type"], self._severity_codes, self.severity_names))
+            self.rules.append(self._code(error["info"], self._rule_codes, self.rule_names))
+        return submission
+
+    def score(self, policy=DEFAULT_POLICY):
+        """
+        Score every submission under a policy.
+
+        Errors are counted per submission, severity and message in one pass over the columns, so a policy costs one
+        lookup per distinct error rather than per error. A message's cap applies to its errors of every severity in a
+        submission together. Errors of equal weight are totalled before being multiplied, so the default policy scores
+        exactly 1 - 0.05 * errors.
+
+        Args:
+            policy (ScoringPolicy): How much each error costs.
+
+        Returns:
+            (list[float]): The score of each submission, in the order they were added.
+        """
+        weights = [policy.weight(severity) for severity in self.severity_names]
+        class_weights = sorted(set(weights))
+        classes = {weight: i for i, weight in enumerate(class_weights)}
+        severity_class = array("H", (classes[weight] for weight in weights))
+        caps = [policy.cap(rule) for rule in self.rule_names]
+
+        counted = [array("L", [0]) * len(class_weights) for _ in range(self.submission_count)]
+        capped = {}
+        for (submission, severity, rule), count in Counter(zip(self.submissions, self.severities, self.rules)).items():
+            if caps[rule] is None:
+                counted[submission][severity_class[severity]] += count
+            else:
+                if (submission, rule) not in capped:
+                    capped[submission, rule] = array("L", [0]) * len(class_weights)
+                capped[submission, rule][severity_class[severity]] += count
+
+        for (submission, rule), counts in capped.items():
+            remaining = caps[rule]
+            # Classes are sorted by weight, so the most costly errors are deducted for first
+            for weight_class in reversed(range(len(class_weights))):
+                deducted = min(counts[weight_class], remaining)
+                counted[submission][weight_class] += deducted
+                remaining -= deducted
+
+        return [
+            max(0, 1.0 - sum(weight * count for weight, count in zip(class_weights, counts) if count))
+            for counts in counted
+        ]
+
+
+def score_errors(errors, policy=DEFAULT_POLICY):
+    """
+    Score a single submission's style errors.
+
+    Args:
+        errors (Iterable[findings.Finding | Mapping[str: (str | int)]]): The errors, iterated over once.
+        policy (ScoringPolicy): How much each error costs.
+
+    Returns:
+        (float): The submission's score, between 0 and 1.
+    """
+    columns = LintColumns()
+    columns.add(errors)
+    return columns.score(policy)[0]
+
+
+def _parse_assignment(text, convert):
+    """
+    Parse a NAME=VALUE command line argument.
+
+    Args:
+        text (str): The argument. The name may itself contain "=".
+        convert (Callable[[str], Any]): Converts the value.
+
+    Returns:
+        (tuple[str, Any]): The name and value.
+    """
+    name, separator, value = text.rpartition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, not {text!r}")
+    return name, convert(value)
+
+
+def main(argv=None):
+    """
+    Rescore the output of tango.batch under a policy, writing each submission's new score as a line of JSON.
+
+    Args:
+        argv (list[str]): Command line arguments, defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Rescore batch grading results under a different scoring policy.")
+    parser.add_argument("results", help="the output of tango.batch, one JSON object per submission, or - for stdin")
+    parser.add_argument(
+        "--weight", action="append", default=[], type=lambda text: _parse_assignment(text, float),
+        metavar="SEVERITY=DEDUCTION", help="deduction for each error of a severity"
+    )
+    parser.add_argument("--default-weight", type=float, default=DEDUCTION, help="deduction for other severities")
+    parser.add_argument(
+        "--rule-cap", action="append", default=[], type=lambda text: _parse_assignment(text, int),
+        metavar="MESSAGE=COUNT", help="most errors with a message which are deducted for"
+    )
+    parser.add_argument("--cap", type=int, default=None, help="most errors with any other message deducted for")
+    args = parser.parse_args(argv)
+    policy = ScoringPolicy(dict(args.weight), args.default_weight, dict(args.rule_cap), args.cap)
+
+    columns = LintColumns()
+    names = []
+    linted = []
+    with (sys.stdin if args.results == "-" else open(args.results)) as results:
+        for line in results:
+            if line.strip():
+                result = json.loads(line)
+                names.append(result.get("submission"))
+                quality = result.get("quality")
+                linted.append(quality is not None)
+                columns.add(quality["runners"][0]["errors"] if quality is not None else ())
+
+    for name, was_linted, score in zip(names, linted, columns.score(policy)):
+        json.dump({"submission": name, "score": score if was_linted else None}, sys.stdout)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Submitted source files, read through a memory map and decoded once for every check of a submission."""
+import hashlib
+import mmap
+import os
+import threading
+
+from collections import OrderedDict
+from os.path import abspath
+
+from . import tokenizer
+
+__author__ = "Aidan Woolley"
+
+# Number of sources kept, enough for every file of the submissions graded at once
+_CACHE_SIZE = 256
+
+
+class Source:
+    """
+    The contents of a source file, with the tokens which checks of it need.
+
+    Instances are shared between threads through `load_source`'s cache, so they are read-only once created.
+
+    Attributes:
+        path (str): Absolute path to the file.
+        text (str): The file decoded as UTF-8, with line endings translated to newlines as when reading in text mode.
+    """
+
+    __slots__ = ("path", "text", "_tokens")
+
+    def __init__(self, path, data):
+        """
+        Decode a file's contents.
+
+        Args:
+            path (str): Path to the file.
+            data (bytes-like): The file's bytes, such as an mmap of it.
+        """
+        self.path = abspath(path)
+        text = str(data, "utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        self.text = text
+        self._tokens = None
+
+    @property
+    def tokens(self):
+        """(list[tokenizer.Token]): The significant tokens of the code, found the first time they are needed."""
+        if self._tokens is None:
+            # Concurrent first uses may both tokenize, but they find the same tokens
+            self._tokens = tokenizer.significant_tokens(self.text)
+        return self._tokens
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached_source(path, data):
+    """
+    Get the source of a file's contents, decoding them only if no earlier check has.
+
+    Args:
+        path (str): Absolute path to the file.
+        data (bytes-like): The file's bytes, such as an mmap of it.
+
+    Returns:
+        (Source): The file's source.
+    """
+    # Keyed by the contents, as a file rewritten within the mtime's resolution keeps its size and mtime
+    key = (path, hashlib.sha256(data).digest())
+    with _cache_lock:
+        source = _cache.get(key)
+        if source is not None:
+            _cache.move_to_end(key)
+            return source
+
+    source = Source(path, data)
+    with _cache_lock:
+        _cache[key] = source
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return source
+
+
+def load_source(file):
+    """
+    Read a source file through a memory map, reusing the source an earlier check decoded if its contents are the same.
+
+    Args:
+        file (str): Path to the file.
+
+    Returns:
+        (Source): The file's source.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+        UnicodeDecodeError: If the file isn't UTF-8.
+    """
+    path = abspath(file)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _cached_source(path, b"")  # Empty files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as data:
+                return _cached_source(path, data)
+
+
+def clear_cache():
+    """Forget every source read."""
+    with _cache_lock:
+        _cache.clear()
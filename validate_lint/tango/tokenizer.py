@@ -0,0 +1,290 @@
+"""A linear-time lexer for R source code, producing tokens with their line and column."""
+import re
+
+from collections import namedtuple
+
+__author__ = "Aidan Woolley"
+
+Token = namedtuple("Token", ["type", "value", "line", "column", "offset"])
+Token.__doc__ = """A lexical token of R code. Lines and columns start at 1, as in lintr's output."""
+
+# Token types
+COMMENT = "comment"
+NEWLINE = "newline"
+NUMBER = "number"
+OPERATOR = "operator"
+PUNCTUATION = "punctuation"
+STRING = "string"
+SYMBOL = "symbol"
+WHITESPACE = "whitespace"
+UNKNOWN = "unknown"
+
+# Tokens which don't affect the meaning of code between brackets
+INSIGNIFICANT = frozenset({COMMENT, NEWLINE, WHITESPACE})
+
+# Tokens other than NEWLINE which can contain newlines
+_MULTILINE = frozenset({STRING, SYMBOL})
+
+_RAW_STRING_START = r'[rR](?P<raw_quote>["\'])(?P<raw_dashes>-*)(?P<raw_bracket>[(\[{])'
+_RAW_STRING_START_PATTERN = re.compile(_RAW_STRING_START)
+_CLOSING_BRACKET = {"(": ")", "[": "]", "{": "}"}
+
+# Alternatives are tried in order, so longer operators come before their prefixes.
+# Unterminated strings and backticks run to the end of the file, like R reports them.
+# Only the start of a raw string can be matched by a regex, its end is found by `_raw_string_end`.
+_TOKEN_PATTERN = re.compile(
+    r'(?P<whitespace>[ \t\r\f\v]+)'
+    r'|(?P<newline>\n)'
+    r'|(?P<raw>' + _RAW_STRING_START + r')'
+    r'|(?P<comment>#[^\n]*)'
+    r'|(?P<string>"(?:[^"\\]|\\.)*(?:"|\\?\Z)|\'(?:[^\'\\]|\\.)*(?:\'|\\?\Z))'
+    r'|(?P<backtick>`(?:[^`\\]|\\.)*(?:`|\\?\Z))'
+    r'|(?P<number>(?:0[xX][0-9a-fA-F]*(?:\.[0-9a-fA-F]*)?(?:[pP][+-]?[0-9]+)?'
+    r'|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)[Li]?)'
+    r'|(?P<symbol>(?:[^\W\d_]|\.(?![0-9]))[\w.]*)'
+    r'|(?P<operator>:::|::|<<-|->>|<-|->|<=|>=|==|!=|&&|\|\||\|>|\*\*|%[^%\n]*%|[-+*/^<>!&|~?:$@=\\])'
+    r'|(?P<punctuation>[()\[\]{},;])'
+    r'|(?P<unknown>.)',
+    re.DOTALL
+)
+
+
+def _raw_string_end(text, match):
+    """
+    Find where a raw string such as r"(...)" or R"--[...]--" ends.
+
+    Args:
+        text (str): The R code.
+        match (re.Match): Match of `_RAW_STRING_START` at the start of the raw string.
+
+    Returns:
+        (int): Offset just after the closing quote, or the end of `text` if the raw string is unterminated.
+    """
+    dashes = match.group("raw_dashes")
+    end = text.find(_CLOSING_BRACKET[match.group("raw_bracket")] + dashes + match.group("raw_quote"), match.end())
+    return len(text) if end == -1 else end + len(dashes) + 2
+
+
+def tokenize(text):
+    """
+    Split R code into tokens in a single pass.
+
+    Backtick-quoted names are symbols and raw strings are strings. Invalid characters become UNKNOWN tokens rather
+    than raising, since student code is not guaranteed to be valid R.
+
+    Args:
+        text (str): R code as a multi-line string.
+
+    Yields:
+        (Token): Every token in the code, including whitespace, newlines and comments.
+    """
+    line = 1
+    line_start = 0
+    pos = 0
+    while pos < len(text):
+        # Matches are contiguous since every character matches some alternative.
+        # The iterator is only restarted after a raw string, whose end the regex can't find.
+        for match in _TOKEN_PATTERN.finditer(text, pos):
+            token_type = match.lastgroup
+            end = match.end()
+            if token_type == "raw":
+                token_type = STRING
+                end = _raw_string_end(text, match)
+            elif token_type == "backtick":
+                token_type = SYMBOL
+
+            value = text[pos:end]
+            yield Token(token_type, value, line, pos - line_start + 1, pos)
+
+            if token_type == NEWLINE:
+                line += 1
+                line_start = end
+            elif token_type in _MULTILINE:
+                newlines = value.count("\n")
+                if newlines:
+                    line += newlines
+                    line_start = pos + value.rindex("\n") + 1
+
+            pos = end
+            if match.lastgroup == "raw":
+                break
+
+
+def significant_tokens(text):
+    """
+    Tokenize R code, dropping whitespace, newlines and comments.
+
+    Args:
+        text (str): R code as a multi-line string.
+
+    Returns:
+        (list[Token]): The tokens which affect the meaning of the code.
+    """
+    return [token for token in tokenize(text) if token.type not in INSIGNIFICANT]
+
+
+def unquote(token):
+    """
+    Get the name or text a symbol or string token stands for.
+
+    Args:
+        token (Token): A SYMBOL or STRING token.
+
+    Returns:
+        (str): The symbol name without backticks, or the contents of the string without quotes.
+    """
+    value = token.value
+    raw_start = _RAW_STRING_START_PATTERN.match(value)
+    if raw_start:
+        return value[raw_start.end():-(len(raw_start.group("raw_dashes")) + 2)]
+    if value[:1] in ('"', "'", "`"):
+        return re.sub(r'\\(.)', r'\1', value[1:-1] if len(value) > 1 and value[-1] == value[0] else value[1:])
+    return value
+
+
+def call_arguments(tokens, open_paren):
+    """
+    Split the arguments of a call into lists of tokens.
+
+    Args:
+        tokens (list[Token]): Significant tokens, as from `significant_tokens`.
+        open_paren (int): Index in `tokens` of the opening bracket of the call.
+
+    Returns:
+        (list[list[Token]]): The tokens of each argument, excluding the separating commas.
+        If the brackets aren't closed the arguments run to the end of the code.
+    """
+    args = [[]]
+    depth = 0
+    for i in range(open_paren + 1, len(tokens)):
+        token = tokens[i]
+        if token.type == PUNCTUATION:
+            if token.value in "([{":
+                depth += 1
+            elif token.value in ")]}":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif token.value == "," and depth == 0:
+                args.append([])
+                continue
+        args[-1].append(token)
+    return args if args != [[]] else []
+
+
+def argument_value(args, position, name):
+    """
+    Find the argument of a call which would be matched to a parameter, if it is a plain name or string.
+
+    Only exact parameter names are matched, and positional matching only considers unnamed arguments.
+
+    Args:
+        args (list[list[Token]]): The arguments, as from `call_arguments`.
+        position (int): Index of the parameter among the unnamed arguments.
+        name (str): Name of the parameter.
+
+    Returns:
+        (tuple[Token, str] | None): The token of the argument's value and the name or string it stands for,
+        or None if there is no such argument or it is a more complex expression.
+    """
+    unnamed = []
+    for arg in args:
+        if len(arg) >= 2 and arg[0].type in (SYMBOL, STRING) and arg[1].value == "=":
+            if unquote(arg[0]) == name:
+                value = arg[2:]
+                break
+        else:
+            unnamed.append(arg)
+    else:
+        if position >= len(unnamed):
+            return None
+        value = unnamed[position]
+
+    if len(value) != 1 or value[0].type not in (SYMBOL, STRING):
+        return None
+    return value[0], unquote(value[0])
+
+
+def is_call(tokens, i):
+    """
+    Check whether the token at `i` is the name of a function being called.
+
+    Names accessed with $ or @, such as `x$library(...)`, are not considered calls.
+
+    Args:
+        tokens (list[Token]): Significant tokens, as from `significant_tokens`.
+        i (int): Index of the token.
+
+    Returns:
+        (bool): True if the token is a symbol or string directly followed by an opening bracket.
+    """
+    if tokens[i].type not in (SYMBOL, STRING) or i + 1 >= len(tokens) or tokens[i + 1].value != "(":
+        return False
+    return i == 0 or tokens[i - 1].value not in ("$", "@")
+
+
+# Functions which call the function named by one of their arguments, as (position, name) of that argument
+INDIRECT_CALLERS = {
+    "do.call": (0, "what"),
+    "match.fun": (0, "FUN"),
+}
+
+
+def _names_something_else(tokens, i, in_formals):
+    """
+    Check whether the symbol at `i` names something other than a variable or function, like lintr's SYMBOL_SUB.
+
+    Args:
+        tokens (list[Token]): Significant tokens, as from `significant_tokens`.
+        i (int): Index of the symbol.
+        in_formals (bool): Whether the symbol is directly inside the parameter list of a function definition.
+
+    Returns:
+        (bool): True if the symbol is a member accessed with $ or @, a package before :: or :::, the name of an
+        argument, or the name of a parameter.
+    """
+    before = tokens[i - 1].value if i > 0 else None
+    after = tokens[i + 1].value if i + 1 < len(tokens) else None
+    if before in ("$", "@") or after in ("::", ":::"):
+        return True
+    return before in ("(", ",") and (after == "=" or in_formals and after in (",", ")"))
+
+
+def find_uses(tokens, names):
+    """
+    Find every use of any of `names` as a function or variable, like lintr's undesirable_function_linter.
+
+    A function can be called through another name or passed to another function, as in `f <- eval; f(1)` or
+    `sapply(1, eval)`, so every symbol with one of the names is found, including namespaced and backtick quoted
+    names, but not argument names or members such as `x$eval`. Calls through strings, such as `"eval"(1)` and
+    do.call("eval", ...), are also found.
+
+    Args:
+        tokens (list[Token]): Significant tokens, as from `significant_tokens`.
+        names (frozenset[str]): Names of the functions to find.
+
+    Yields:
+        (tuple[Token, str]): The token naming the function and its name, in the order they appear.
+    """
+    # Whether each open bracket starts the parameters of a function definition
+    in_formals = []
+    for i, token in enumerate(tokens):
+        if token.type == PUNCTUATION:
+            if token.value in "([{":
+                in_formals.append(token.value == "(" and i > 0 and tokens[i - 1].value in ("function", "\\"))
+            elif token.value in ")]}" and in_formals:
+                in_formals.pop()
+            continue
+
+        name = unquote(token) if token.type in (SYMBOL, STRING) else None
+        if token.type == SYMBOL and name in names:
+            if not _names_something_else(tokens, i, bool(in_formals) and in_formals[-1]):
+                yield token, name
+        elif token.type == STRING and name in names and is_call(tokens, i):
+            yield token, name
+
+        if name in INDIRECT_CALLERS and is_call(tokens, i):
+            called = argument_value(call_arguments(tokens, i + 1), *INDIRECT_CALLERS[name])
+            # Functions passed as symbols are already found as symbols
+            if called is not None and called[0].type == STRING and called[1] in names:
+                yield called
@@ -0,0 +1,311 @@
+"""Spans timing each R subprocess and stage of grading, sent to pluggable sinks such as JSON logs or histograms."""
+import bisect
+import json
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+__author__ = "Aidan Woolley"
+
+# Upper bounds in seconds of the histogram buckets, from a quick lintr run to a test file which times out
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Span:
+    """
+    A timed piece of work, such as one R subprocess or one stage of validating a file.
+
+    Its attributes describe the work, e.g. its `kind` of command, the `file` it is about and the `exit_status` of R.
+    """
+
+    def __init__(self, name, attributes=None, start=None, duration=None):
+        """
+        Create a span.
+
+        Args:
+            name (str): What was done, e.g. "invoke_R".
+            attributes (dict[str: Any] | None): JSON serialisable description of the work.
+            start (float | None): Unix time the work started at, defaults to now.
+            duration (float | None): Seconds the work took, None until it has finished.
+        """
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = time.time() if start is None else start
+        self.duration = duration
+
+    def set(self, **attributes):
+        """
+        Add to or overwrite the span's attributes.
+
+        Args:
+            **attributes: The attributes to set.
+        """
+        self.attributes.update(attributes)
+
+    @property
+    def kind(self):
+        """(str): The kind of work, which spans with the same name are grouped by in histograms."""
+        return str(self.attributes.get("kind", ""))
+
+    @property
+    def failed(self):
+        """(bool): Whether the work raised an error or R exited with a non-zero status."""
+        return "error" in self.attributes or self.attributes.get("exit_status") not in (None, 0)
+
+    def to_json(self):
+        """
+        Describe the span as a JSON object.
+
+        Returns:
+            (dict[str: Any]): The span's name, start, duration and attributes.
+        """
+        out = OrderedDict([("name", self.name), ("start", self.start), ("duration", self.duration)])
+        out.update(self.attributes)
+        return out
+
+    @staticmethod
+    def from_json(span_json):
+        """
+        Recreate a span from `to_json`, e.g. to record spans logged by another process.
+
+        Args:
+            span_json (dict[str: Any]): The JSON object.
+
+        Returns:
+            (Span): The span.
+        """
+        attributes = {key: value for key, value in span_json.items() if key not in ("name", "start", "duration")}
+        return Span(span_json["name"], attributes, span_json.get("start"), span_json.get("duration"))
+
+
+class JsonLogSink:
+    """Writes each span as a line of JSON."""
+
+    def __init__(self, stream):
+        """
+        Create a sink writing to `stream`.
+
+        Args:
+            stream (TextIO): The file to write to, which is flushed after each span.
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        """
+        Write a span.
+
+        Args:
+            span (Span): The finished span.
+        """
+        line = json.dumps(span.to_json()) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+def read_spans(stream):
+    """
+    Read spans written by a `JsonLogSink`, skipping an incomplete last line from a process which was killed.
+
+    Args:
+        stream (TextIO): The log.
+
+    Yields:
+        (Span): Each span in the log.
+    """
+    for line in stream:
+        if not line.endswith("\n"):
+            break
+        if line.strip():
+            yield Span.from_json(json.loads(line))
+
+
+class _Histogram:
+    """Counts of durations in buckets, with their sum."""
+
+    def __init__(self, buckets):
+        """
+        Create an empty histogram.
+
+        Args:
+            buckets (tuple[float]): Increasing upper bounds of the buckets in seconds.
+        """
+        self.counts = [0] * (len(buckets) + 1)  # The last bucket is everything above the largest bound
+        self.sum = 0.0
+        self.count = 0
+        self.failures = 0
+
+
+class HistogramRegistry:
+    """Histograms of span durations in this process, by the name and kind of the span."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Create an empty registry.
+
+        Args:
+            buckets (tuple[float]): Increasing upper bounds of the buckets in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self._histograms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        """
+        Count a span's duration.
+
+        Args:
+            span (Span): The finished span.
+        """
+        with self._lock:
+            histogram = self._histograms.get((span.name, span.kind))
+            if histogram is None:
+                histogram = self._histograms[(span.name, span.kind)] = _Histogram(self.buckets)
+            histogram.counts[bisect.bisect_left(self.buckets, span.duration)] += 1
+            histogram.sum += span.duration
+            histogram.count += 1
+            histogram.failures += span.failed
+
+    def percentile(self, name, p, kind=None):
+        """
+        Estimate a percentile of the durations of spans, interpolating within the bucket it falls in.
+
+        Args:
+            name (str): Name of the spans.
+            p (float): The percentile, from 0 to 100.
+            kind (str | None): Kind of the spans, None for spans of every kind.
+
+        Returns:
+            (float | None): The estimated duration in seconds, the largest bucket bound if it is above that, or
+                None if there are no such spans.
+        """
+        with self._lock:
+            counts = [0] * (len(self.buckets) + 1)
+            for (span_name, span_kind), histogram in self._histograms.items():
+                if span_name == name and kind in (None, span_kind):
+                    counts = [total + count for total, count in zip(counts, histogram.counts)]
+        total = sum(counts)
+        if not total:
+            return None
+
+        rank = p / 100 * total
+        seen = 0
+        for i, count in enumerate(counts[:-1]):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def prometheus_text(self):
+        """
+        Render the histograms in the Prometheus text exposition format.
+
+        Returns:
+            (str): A `tango_span_duration_seconds` histogram and a `tango_span_failures_total` counter, labelled by
+                the name and kind of the spans.
+        """
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count, h.failures) for key, h in self._histograms.items()]
+
+        lines = [
+            "# HELP tango_span_duration_seconds Time taken by R subprocesses and stages of grading.",
+            "# TYPE tango_span_duration_seconds histogram",
+        ]
+        for (name, kind), counts, total, count, _ in histograms:
+            labels = f'span="{_escape_label(name)}",kind="{_escape_label(kind)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'tango_span_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'tango_span_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"tango_span_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"tango_span_duration_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP tango_span_failures_total Spans which raised an error or whose R process exited with an error.",
+            "# TYPE tango_span_failures_total counter",
+        ]
+        for (name, kind), _, _, _, failures in histograms:
+            lines.append(f'tango_span_failures_total{{span="{_escape_label(name)}",kind="{_escape_label(kind)}"}} '
+                         f'{failures}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    """
+    Escape a Prometheus label value.
+
+    Args:
+        value (str): The value.
+
+    Returns:
+        (str): The value with backslashes, quotes and newlines escaped.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_sinks = ()
+
+
+def enable_tracing(*sinks):
+    """
+    Send spans from `Linter`, `Validator` and the orchestrator to `sinks`, replacing any enabled before.
+
+    Args:
+        *sinks: Objects with a `record(span)` method, such as `JsonLogSink` or `HistogramRegistry`.
+
+    Returns:
+        (tuple): The enabled sinks.
+    """
+    global _sinks
+    _sinks = tuple(sinks)
+    return _sinks
+
+
+def disable_tracing():
+    """Stop sending spans to sinks."""
+    global _sinks
+    _sinks = ()
+
+
+def get_sinks():
+    """
+    Get the enabled sinks.
+
+    Returns:
+        (tuple): The sinks, empty if tracing is disabled.
+    """
+    return _sinks
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the work done in a `with` block, sending the span to the enabled sinks when it finishes.
+
+    An exception raised in the block is recorded under the "error" attribute and re-raised.
+
+    Args:
+        name (str): What is being done.
+        **attributes: Description of the work, e.g. `kind`, `file` and `exit_status`.
+
+    Yields:
+        (Span): The span, whose attributes may be set in the block.
+    """
+    current = Span(name, attributes)
+    start = time.perf_counter()
+    try:
+        yield current
+    except GeneratorExit:
+        raise  # A generator traced in the block was closed early, which isn't an error
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        for sink in _sinks:
+            sink.record(current)
@@ -1,110 +1,177 @@
 """This class takes the static analysis from produces output in relevant format."""
+import json
 import os
 import re
+import tempfile
+import threading
 
-from os.path import isfile, abspath, join as joinpath, dirname
-from string import whitespace
-
-from .linter import Linter
+from os.path import abspath, join as joinpath, dirname
+from . import tokenizer
+from .sources import load_source
+from .config import load_config
+from .findings import Finding, to_json
+from .linter import ERROR_LINTERS, RESTRICTED_FUNCTION_LINTER, Linter
+from .pipeline import COLLECT_ALL, Stage, run_stages
 
 __author__ = "Anish_Das_ad945"
 
 PATH = os.getcwd() + '/validation'
 
+# Functions which load the library named by their first argument, or their `package` argument
+LIBRARY_LOADERS = frozenset({"library", "require", "requireNamespace", "loadNamespace"})
+
+# The success a file gets for each group of validation stages that find nothing
+_SUCCESS_INFO = {
+    "restricted library": "No restricted libraries used",
+    "restricted function": "No restricted functions used",
+    "syntax": "No syntax errors found",
+}
+
 
 class Validator(Linter):
     """The class uses the static analysis performed by Linter to produce required JSON."""
 
+    # Installed packages, which R is asked for at most once per process
+    _installed_libraries = None
+    _installed_libraries_lock = threading.Lock()
+
+    # Path of a JSON snapshot of the installed packages shared between processes, None to not persist them.
+    # The snapshot is invalidated when the mtime of any of the R library directories changes.
+    installed_libraries_snapshot = None
+
     @staticmethod
     def _get_installed_libraries():
         """
-        Runs an R script to return all the installed.packages() on the machine.
+        Return all the installed.packages() on the machine, running R only the first time.
 
         Returns:
-        (list[str]): All the available libraries on the machine.
+        (frozenset[str]): All the available libraries on the machine.
+        """
+        with Validator._installed_libraries_lock:
+            if Validator._installed_libraries is None:
+                installed_libs = Validator._load_installed_libraries_snapshot()
+                if installed_libs is None:
+                    lib_paths, installed_libs = Validator._query_installed_libraries()
+                    Validator._save_installed_libraries_snapshot(lib_paths, installed_libs)
+                Validator._installed_libraries = installed_libs
+            return Validator._installed_libraries
+
+    @staticmethod
+    def _query_installed_libraries():
         """
-        lib_list_string = Validator._invoke_R("installed.packages()[, c()]")
+        Runs an R script to list the library directories and the packages installed in them.
 
-        # List is 1 lib per line, awkwardly padded and starting with a blank line
-        return [lib.strip() for lib in lib_list_string.splitlines()][1:]
+        Returns:
+            (tuple[list[str], frozenset[str]]): The library directories and all the available libraries.
+
+        Raises:
+            RuntimeError: If R failed to list them.
+        """
+        output = Validator._invoke_R(
+            'cat(.libPaths(), "--", rownames(installed.packages()), sep="\\n")', kind="installed_packages"
+        )
+        lines = [line.strip() for line in output.splitlines()]
+        if "--" not in lines:
+            raise RuntimeError(f"Couldn't list the installed R packages, R printed: {output[-200:]!r}")
+        separator = lines.index("--")
+        return lines[:separator], frozenset(lib for lib in lines[separator + 1:] if lib)
 
     @staticmethod
-    def _invoke_lintr_restricted_functions(file_to_check, restricted_functions):
+    def _library_mtimes(lib_paths):
         """
-        Specialized lintr call to only highlight the use of restricted functions.
-        
-        Can't use _invoke_lintr because of stupid line-length limit for function call in R lintr
+        Get the modification times of the R library directories.
 
-        Params:
-            file_to_check (str): the file to check use of any restricted functions in.
-            restricted_functions (list[str]): functions which `file_to_check` must not use.
+        Args:
+            lib_paths (list[str]): The library directories.
 
         Returns:
-            (str) Lintr output containing errors for each inappropriate function use.
-        """
-
-        if not isfile(file_to_check):
-            raise FileNotFoundError(file_to_check)
-        # checkstyle_output is XML which is easier to parse and guaranteed consistent
-        # It must be written to a file, /proc/self/fd/1 is stdout!
-        restricted_functions_string = ', '.join([f'"{fun}"=""' for fun in restricted_functions])
-        undesirable_functions_linter = f'undesirable_function_linter(c({restricted_functions_string}))'
-        r_cmd = (
-            f'library("lintr");'
-            f'ufl <- {undesirable_functions_linter};'
-            f'checkstyle_output(lint("{file_to_check}", linters=ufl), "/proc/self/fd/1")'
-        )
-        return Validator._invoke_R(r_cmd)
+            (dict[str: int]): Modification time in ns of each directory, -1 if it doesn't exist.
+        """
+        mtimes = {}
+        for lib_path in lib_paths:
+            try:
+                mtimes[lib_path] = os.stat(lib_path).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[lib_path] = -1
+        return mtimes
+
+    @staticmethod
+    def _load_installed_libraries_snapshot():
+        """
+        Read the installed packages from the snapshot, if there is one and it is still valid.
+
+        Returns:
+            (frozenset[str] | None): The installed libraries, or None if they need to be found by R.
+        """
+        if Validator.installed_libraries_snapshot is None:
+            return None
+        try:
+            with open(Validator.installed_libraries_snapshot) as f:
+                snapshot = json.load(f)
+            if Validator._library_mtimes(snapshot["lib_paths"]) != snapshot["lib_paths"]:
+                return None
+            return frozenset(snapshot["libraries"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None  # Missing, unreadable or from an older version, so R is asked again
+
+    @staticmethod
+    def _save_installed_libraries_snapshot(lib_paths, installed_libs):
+        """
+        Atomically write the installed packages to the snapshot, if one is configured.
+
+        Args:
+            lib_paths (list[str]): The R library directories.
+            installed_libs (frozenset[str]): The libraries installed in them.
+        """
+        if Validator.installed_libraries_snapshot is None:
+            return
+        snapshot = {"lib_paths": Validator._library_mtimes(lib_paths), "libraries": sorted(installed_libs)}
+        snapshot_dir = dirname(abspath(Validator.installed_libraries_snapshot))
+        fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=".tmp-")
+        with os.fdopen(fd, "w") as tmp:
+            json.dump(snapshot, tmp)
+        os.replace(tmp_path, Validator.installed_libraries_snapshot)
 
     @staticmethod
     def _get_used_libraries(file_text):
         """
-        Create a set of all the libraries loaded in the provided R code.
+        Create a list of all the libraries loaded in the provided R code.
 
-        Libraries can be imported by 2 functions: library() and require()
+        Libraries can be loaded by 4 functions: library(), require(), requireNamespace() and loadNamespace().
         The library can either be the 1st argument (without an explicit keyword) or is specified out-of-order with the
-        keyword 'package'.
-        Library importing is found by a combination of regex and case splitting.
+        keyword 'package'. Libraries are also used through namespace access, as in pkg::fn or pkg:::fn.
+        Library loading is found from the tokenized code, so calls may span lines, and comments and strings which
+        look like calls are ignored. Calls whose package is an expression rather than a name or string are skipped.
         There is no guarantee that returned library names refer to real (or even possibly valid) libraries.
+
         Args:
         file_text (str): R code as a multi-line string
 
         Returns:
-            (list[tuple[int, str]]) Line numbers and library names from the text.
-        """
-        # NOTE:
-        # This regex doesn't guarantee the R is valid (doesn't check quotes or brackets match)
-        # R package naming standard don't allow brackets in package names, they will cause incorrect matches!!
-        # R allows whitespace before function brackets
-        # R has implicit line continuation inside brackets
-        load_lib_exp = (
-            r'(^|\s|;)'                 # Require a separator char to start so as not to match test_library, etc
-            r'(library|require)\s*'     # Packages can be loaded by library or require.
-            r'\((?P<body>.*?)\)'        # Matches function call part, validity of R not guaranteed.
-        )
-
-        # Match all the variants of package=...
-        package_arg_pattern = re.compile(r'''\s*(\"package\"|\'package\'|package)\s*=''')
-
-        def extract_lib_from_call(call_body: str):
-            args = call_body.split(",")
-
-            # First arg is package if there's no keyword
-            if "=" not in args[0]:
-                return args[0].strip('\'\"' + whitespace)
+            (list[tuple[int, str]]) Line numbers and library names from the text, in the order they appear.
+        """
+        return Validator._libraries_in(tokenizer.significant_tokens(file_text))
 
-            # search for arg with key "package"
-            for arg in args:
-                if package_arg_pattern.match(arg):
-                    return arg.split("=")[1].strip('\'\"' + whitespace)
+    @staticmethod
+    def _libraries_in(tokens):
+        """
+        Find the libraries used by tokenized R code, see `_get_used_libraries`.
 
-            return ""  # No library found in call...
+        Args:
+            tokens (list[tokenizer.Token]): The significant tokens of the code.
 
-        return [
-            (file_text.count("\n", 0, call.start() + 1) + 1, extract_lib_from_call(call["body"]))
-            for call
-            in re.finditer(load_lib_exp, file_text)
-        ]
+        Returns:
+            (list[tuple[int, str]]) Line numbers and library names from the code, in the order they appear.
+        """
+        used = []
+        for i, token in enumerate(tokens):
+            if token.type == tokenizer.SYMBOL and i + 1 < len(tokens) and tokens[i + 1].value in ("::", ":::"):
+                used.append((token.line, tokenizer.unquote(token)))
+            elif tokenizer.is_call(tokens, i) and tokenizer.unquote(token) in LIBRARY_LOADERS:
+                package = tokenizer.argument_value(tokenizer.call_arguments(tokens, i + 1), 0, "package")
+                if package is not None:
+                    used.append((token.line, package[1]))
+        return used
 
     @staticmethod
     def _check_restricted_libs(file, restricted_libraries):
@@ -116,21 +183,20 @@ class Validator(Linter):
             restricted_libs (list[str]): Libraries which `file` is not permitted to use.
 
         Returns:
-            (list[dict[str: (str | int)]]) An EDUKATE-compatible list of forbidden library occurrences
+            (list[findings.Finding]) An EDUKATE-compatible list of forbidden library occurrences
         """
         file = abspath(file)
-        libs_used = Validator._get_used_libraries(Validator._read_file(file))
+        libs_used = Validator._libraries_in(load_source(file).tokens)
 
         failures = []
         for line, lib in libs_used:
             if lib in restricted_libraries:
-                item = {
-                    "type": "restricted library",
-                    "info": f"library {lib} is not allowed in this file",
-                    "file_path": file,
-                    "line_number": line
-                }
-                failures.append(item)
+                failures.append(Finding(
+                    type="restricted library",
+                    info=f"library {lib} is not allowed in this file",
+                    file_path=file,
+                    line_number=line
+                ))
         return failures
 
     @staticmethod
@@ -138,161 +204,304 @@ class Validator(Linter):
         """
         Check whether any function from `restricted_functions` appears in `file`.
 
+        Uses are found by the Python tokenizer, or by lintr if `find_restricted_functions_in_r` is set. Like lintr,
+        the tokenizer finds functions used as values, e.g. `f <- eval`, as well as calls.
+
         Args:
             file (str): Path to the file to check
             restricted_functions (list[str]): Functions which `file` is not permitted to use.
 
         Returns:
-            (list[dict[str: (str | int)]]) An EDUKATE-compatible list of forbidden function invocations
+            (list[findings.Finding]) An EDUKATE-compatible list of forbidden function invocations
         """
-        function_usage = Validator._parse_lintr_output(
-            Validator._invoke_lintr_restricted_functions(file, restricted_functions)
-        )
+        if Validator.find_restricted_functions_in_r:
+            return Validator._check_restricted_functions_in_r(file, restricted_functions)
+
+        restricted_functions = frozenset(restricted_functions)
+        if not restricted_functions:
+            return []
+
+        tokens = load_source(file).tokens
+        return [
+            Validator._restricted_function_failure(file, name, token.line, token.column)
+            for token, name in tokenizer.find_uses(tokens, restricted_functions)
+        ]
+
+    @staticmethod
+    def _check_restricted_functions_in_r(file, restricted_functions):
+        """
+        Check whether any function from `restricted_functions` appears in `file`, using lintr.
+
+        This is slower than the tokenizer, but kept as a reference to verify it against.
+
+        Args:
+            file (str): Path to the file to check
+            restricted_functions (list[str]): Functions which `file` is not permitted to use.
+
+        Returns:
+            (list[findings.Finding]) An EDUKATE-compatible list of forbidden function invocations
+        """
+        function_usage = [
+            error
+            for error in Validator._lint_file(file, restricted_functions)
+            if error["linter"] == RESTRICTED_FUNCTION_LINTER
+        ]
 
         failures = []
         for fail in function_usage:
             fun_match = re.match(r"Function \"(?P<func>.+)\" is undesirable\.", fail['info'], re.M)
             if fun_match:
-                item = {
-                    "type": "restricted function",
-                    "info": f"function {fun_match['func']} is not allowed in this file",
-                    "file_path": file
-                }
-
-                failures.append(item)
+                failures.append(Validator._restricted_function_failure(
+                    file, fun_match['func'], fail['line_number'], fail['column_number']
+                ))
         return failures
 
     @staticmethod
-    def _invoke_error_lintr(file_to_check):
+    def _restricted_function_failure(file, function, line, column):
         """
-        Invoking linter with just the object_usage_linter argument to get just the syntax errors.
+        Create the failure for a use of a restricted function.
 
         Args:
-            file_to_check (str): the relative/absolute path to the file to check.
+            file (str): Path to the file using the function.
+            function (str): Name of the restricted function.
+            line (int): Line of the use.
+            column (int): Column of the use.
 
         Returns:
-            (str) the output from the linter.
+            (findings.Finding) An EDUKATE-compatible failure.
         """
-        # TODO: Do we really think this is safe?!?!? There's a warning in the docs not to use on untrusted code
-        return Validator._invoke_lintr(file_to_check, lint_options={"linters": "c(object_usage_linter)"})
+        return Finding(
+            type="restricted function",
+            info=f"function {function} is not allowed in this file",
+            file_path=file,
+            line_number=line,
+            column_number=column
+        )
 
     @staticmethod
-    def _check_errors(file_to_check):
+    def _check_errors(file_to_check, restricted_functions=()):
         """
         Parses error from static analysis to check for syntax errors.
 
+        Args:
+            file_to_check: Path to the file to check for errors
+            restricted_functions (list[str]): Functions restricted in the file, passed so that the lint pass shared
+                with `_check_restricted_functions` is reused.
+
+        Returns:
+        (list[findings.Finding]) An EDUKATE-compatible list of syntax errors from the linter.
+        """
+        unknown_libraries = Validator._check_unknown_libraries(file_to_check)
+        return unknown_libraries + Validator._check_lint_errors(file_to_check, restricted_functions)
+
+    @staticmethod
+    def _check_unknown_libraries(file_to_check):
+        """
+        Check that every library used in `file_to_check` is installed.
+
         Args:
             file_to_check: Path to the file to check for errors
 
         Returns:
-        (list[dict[str: (str | int)]]) An EDUKATE-compatible list of syntax errors from the linter.
+        (list[findings.Finding]) An EDUKATE-compatible list of unknown libraries.
         """
         out = []
         installed_libs = Validator._get_installed_libraries()
-        libs_used = Validator._get_used_libraries(Validator._read_file(file_to_check))
+        libs_used = Validator._libraries_in(load_source(file_to_check).tokens)
 
         for line, lib in libs_used:
             if lib not in installed_libs:
-                temp = {
-                    "type": "unknown library",
-                    "info": f"the library {lib} used in not known, perhaps there is spelling mistake",
-                    "file_path": file_to_check,
-                    "line_number": line
-                }
+                out.append(Finding(
+                    type="unknown library",
+                    info=f"the library {lib} used in not known, perhaps there is spelling mistake",
+                    file_path=file_to_check,
+                    line_number=line
+                ))
+
+        return out
 
-                out.append(temp)
+    @staticmethod
+    def _check_lint_errors(file_to_check, restricted_functions=()):
+        """
+        Parses error from static analysis to check for syntax errors, unknown variables and unknown functions.
 
-        errors_list = Validator._parse_lintr_output(Validator._invoke_error_lintr(file_to_check))
+        Args:
+            file_to_check: Path to the file to check for errors
+            restricted_functions (list[str]): Functions restricted in the file, passed so that the lint pass shared
+                with `_check_restricted_functions` is reused.
+
+        Returns:
+        (list[findings.Finding]) An EDUKATE-compatible list of syntax errors from the linter.
+        """
+        out = []
+        errors_list = Validator._lint_file(file_to_check, Validator._lint_restrictions(restricted_functions))
         for error in errors_list:
+            if error["linter"] not in ERROR_LINTERS and error["type"] != "error":
+                continue
+
             # unused variables have level `warning` but we consider them style errors and ignore them here
             if re.match(r"local variable \'.*?\' assigned but may not be used", error["info"]):
                 continue
 
             if error['info'].startswith('no visible binding for global variable'):
-                temp = {
-                    'type': 'unknown variable',
-                    'info': error['info'],
-                    'file_path': file_to_check,
-                    'line_number': error['line_number']
-                }
+                temp = Finding(
+                    type='unknown variable',
+                    info=error['info'],
+                    file_path=file_to_check,
+                    line_number=error['line_number']
+                )
             elif error['info'].startswith('no visible global function definition for'):
-                temp = {
-                    'type': 'unknown function',
-                    'info': error['info'],
-                    'file_path': file_to_check,
-                    'line_number': error['line_number']
-                }
+                temp = Finding(
+                    type='unknown function',
+                    info=error['info'],
+                    file_path=file_to_check,
+                    line_number=error['line_number']
+                )
             else:
-                temp = {
-                    'type': 'syntax',
-                    'info': error['info'],
-                    'file_path': file_to_check,
-                    'line_number': error['line_number']
-                }
+                temp = Finding(
+                    type='syntax',
+                    info=error['info'],
+                    file_path=file_to_check,
+                    line_number=error['line_number']
+                )
 
             out.append(temp)
 
         return out
 
     @staticmethod
-    def validate_file(file_to_validate, restricted_libraries, restricted_functions):
+    def _validation_stages():
+        """
+        List the checks run on each file, from cheapest to most expensive.
+
+        Each file is a tuple of its path, restricted libraries and restricted functions.
+
+        Returns:
+            (list[pipeline.Stage]): The stages of validation, in the order to run them.
+        """
+        return [
+            Stage("restricted libraries", "restricted library", lambda file: (
+                Validator._check_restricted_libs(file[0], file[1]), []
+            )),
+            Stage("restricted functions", "restricted function", lambda file: (
+                Validator._check_restricted_functions(file[0], file[2]), []
+            )),
+            Stage("unknown libraries", "syntax", lambda file: (
+                [], Validator._check_unknown_libraries(file[0])
+            )),
+            Stage("lint errors", "syntax", lambda file: (
+                [], Validator._check_lint_errors(file[0], file[2])
+            )),
+        ]
+
+    @staticmethod
+    def _validate_files(files, policy=COLLECT_ALL, max_workers=None):
+        """
+        Validate files stage by stage, so that with FAIL_FAST no file reaches a stage after one that failed.
+
+        Args:
+            files (list[tuple[str, list[str], list[str]]]): The path, restricted libraries and restricted functions
+                of each file.
+            policy (str): FAIL_FAST or COLLECT_ALL.
+            max_workers (int | None): Number of files to check concurrently in each stage.
+
+        Returns:
+            (tuple[list[tuple], list[pipeline.StageTiming]]) The successes, failures and errors of each file and the
+            time each stage took on each file.
+        """
+        def group_success(group, file):
+            return Finding(type=group, info=_SUCCESS_INFO[group], file_path=file[0])
+
+        return run_stages(
+            Validator._validation_stages(),
+            files,
+            group_success,
+            file_path=lambda file: file[0],
+            policy=policy,
+            map_files=lambda func, items: Validator._map_files(func, items, max_workers)
+        )
+
+    @staticmethod
+    def validate_file(file_to_validate, restricted_libraries, restricted_functions, policy=COLLECT_ALL):
         """
         This function will validate a single file checking for errors (syntactic) and failures.
 
         If there are none then it assigns the file a success.
+        Checks run from cheapest to most expensive, and with the FAIL_FAST policy the first to fail ends validation.
 
         Args:
         file_to_validate (str): the path to the file to validate.
 
         restricted_libraries (list[str]): libraries which must not appear in `file_to_validate`.
         restricted_functions (list[str]): functions whuch must not be invoked in `file_to_validate`.
+        policy (str): FAIL_FAST or COLLECT_ALL.
 
         Returns:
             (tuple[dict[str: (str | int)], dict[str: (str | int)], dict[str: (str | int)]])
             The successes, failures, and errors in the file respectively.
             If a file has no errors then it gets the success of having no errors, etc.
         """
-        successes = []
-
-        lib_failures = Validator._check_restricted_libs(file_to_validate, restricted_libraries)
-        if len(lib_failures) == 0:
-            successes.append({
-                "type": "restricted library",
-                "info": "No restricted libraries used",
-                "file_path": file_to_validate
-            })
-
-        fun_failures = Validator._check_restricted_functions(file_to_validate, restricted_functions)
-        if len(fun_failures) == 0:
-            successes.append({
-                "type": "restricted function",
-                "info": "No restricted functions used",
-                "file_path": file_to_validate
-            })
-
-        errors = Validator._check_errors(file_to_validate)
-        if len(errors) == 0:
-            successes.append({
-                "type": "syntax",
-                "info": "No syntax errors found",
-                "file_path": file_to_validate
-            })
-
-        return successes, lib_failures + fun_failures, errors
+        return to_json(Validator._validate_file(file_to_validate, restricted_libraries, restricted_functions, policy))
+
+    @staticmethod
+    def _validate_file(file_to_validate, restricted_libraries, restricted_functions, policy=COLLECT_ALL):
+        """
+        Validate a single file like `validate_file`, keeping what is found as findings rather than JSON.
+
+        Args:
+            file_to_validate (str): the path to the file to validate.
+            restricted_libraries (list[str]): libraries which must not appear in `file_to_validate`.
+            restricted_functions (list[str]): functions which must not be invoked in `file_to_validate`.
+            policy (str): FAIL_FAST or COLLECT_ALL.
+
+        Returns:
+            (tuple[list[findings.Finding], list[findings.Finding], list[findings.Finding]])
+            The successes, failures, and errors in the file respectively.
+        """
+        results, _ = Validator._validate_files([(file_to_validate, restricted_libraries, restricted_functions)], policy)
+        return tuple(results[0])
 
     @staticmethod
-    def validate(config_yaml_file):
+    def validate(config_yaml_file, max_workers=None, policy=None, record_timings=False):
         """
         This function will decipher the requirements of the test and run validation test on each of the required files.
 
         :param config_file: a "config.yaml" file used to define which files to be tested and which
         funcitons/libraries are restricted.
+        :param max_workers: number of files to validate concurrently, overriding `max_workers` in the config.
+        Results are always merged in the order the files are listed in the config.
+        :param policy: "fail_fast" to stop at the first stage of checks which fails, or "collect_all" to run them all.
+        Overrides `validation_policy` in the config, which defaults to "collect_all".
+        :param record_timings: whether to add the time each stage took on each file to the runner, under "timings".
 
         :return: returns a json with the keys passed & runners: {runner_key, errors, failures &
         successes} to be analysed by the existing software later on.
         """
-        config = Validator._read_config(config_yaml_file)
+        config = load_config(config_yaml_file)
+        files = [(joinpath(config.directory, file), *config.restrictions(file)) for file in config.files]
+
+        if max_workers is None:
+            max_workers = config.max_workers
+        if policy is None:
+            policy = config.validation_policy or COLLECT_ALL
+        results, timings = Validator._validate_files(files, policy, max_workers)
+
+        out = to_json(Validator._validation_report(results))
+        if record_timings:
+            out["runners"][0]["timings"] = [timing._asdict() for timing in timings]
+        return out
 
+    @staticmethod
+    def _validation_report(file_results):
+        """
+        Merge the results of validating each file of a submission into the EDUKATE format.
+
+        Args:
+            file_results (list[tuple]): The successes, failures and errors of each file, as from `_validate_file`.
+
+        Returns:
+            JSON object: the JSON returned by `validate`, with the results still as findings.
+        """
         out = {
             "runners": [
                 {
@@ -305,11 +514,7 @@ class Validator(Linter):
             "passed": False
         }
 
-        for file in config["files"]:
-            file_path = joinpath(dirname(config_yaml_file), file)
-            restricted_libraries = config["restricted_libraries"][file]
-            restricted_functions = config["restricted_functions"][file]
-            successes, failures, errors = Validator.validate_file(file_path, restricted_libraries, restricted_functions)
+        for successes, failures, errors in file_results:
             out["runners"][0]["successes"].extend(successes)
             out["runners"][0]["failures"].extend(failures)
             out["runners"][0]["errors"].extend(errors)
@@ -0,0 +1,89 @@
+"""Tests for batch.py."""
+import yaml
+
+from ..tango import batch
+from ..tango.findings import Finding
+from ..tango.linter import Linter
+from ..tango.validation import Validator
+
+
+def _make_batch(tmp_path, sources):
+    """
+    Create an exercise config and a directory of submissions to it.
+
+    Args:
+        tmp_path (pathlib.Path): directory to create the batch in.
+        sources (dict[str: str]): the code of each submission, by submission name.
+
+    Returns:
+        (tuple[str, str]) paths to the config and the submissions directory
+    """
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.dump({
+        "files": ["src/main.R"],
+        "restricted_functions": {"src/main.R": ["print"]},
+        "restricted_libraries": {"src/main.R": []}
+    }))
+    for name, code in sources.items():
+        (tmp_path / "submissions" / name / "src").mkdir(parents=True)
+        (tmp_path / "submissions" / name / "src" / "main.R").write_text(code)
+    return str(config), str(tmp_path / "submissions")
+
+
+def test_grade_submissions_dedupes_identical_files(monkeypatch, tmp_path):
+    """Test that identical files are checked once, results refer to each file, and invalid code isn't linted."""
+    config, submissions = _make_batch(tmp_path, {"a": "x <- 1\n", "b": "bad(\n", "c": "x <- 1\n"})
+    validated, linted = [], []
+
+    def fake_validate_file(file_path, restricted_libraries, restricted_functions, policy):
+        validated.append(file_path)
+        with open(file_path) as f:
+            failed = "bad" in f.read()
+        failures = [Finding(type="syntax", info="bad", file_path=file_path)] if failed else []
+        return [], failures, []
+
+    def fake_lint_file(file_path, restricted_functions=()):
+        linted.append(file_path)
+        return [Finding(type="style", info="x", file_path=file_path, line_number=1, linter="l")]
+
+    monkeypatch.setattr(Validator, "_validate_file", fake_validate_file)
+    monkeypatch.setattr(Linter, "_lint_file", fake_lint_file)
+
+    results = list(batch.grade_submissions(config, batch.find_submissions(submissions), max_workers=1))
+
+    assert [name for name, _ in results] == ["a", "b", "c"]
+    assert len(validated) == 2
+    assert len(linted) == 1
+
+    a, b, c = (result for _, result in results)
+    assert a["validation"]["passed"] and c["validation"]["passed"]
+    assert not b["validation"]["passed"] and b["quality"] is None
+    assert a["quality"]["runners"][0]["errors"][0]["file_path"].endswith("/a/src/main.R")
+    assert c["quality"]["runners"][0]["errors"][0]["file_path"].endswith("/c/src/main.R")
+    assert c["quality"]["runners"][0]["score"] == 0.95
+
+
+def test_find_submissions_reads_manifest(tmp_path):
+    """Test that a manifest lists submissions relative to itself, skipping comments and blank lines."""
+    _make_batch(tmp_path, {"one": "", "two": ""})
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# submissions\nsubmissions/two\n\nsubmissions/one\n")
+
+    assert list(batch.find_submissions(str(manifest))) == [
+        ("submissions/two", str(tmp_path / "submissions" / "two")),
+        ("submissions/one", str(tmp_path / "submissions" / "one")),
+    ]
+
+
+def test_deduplicator_forgets_least_recently_used():
+    """Test that only the most recently used finished checks are remembered."""
+    deduplicator = batch._Deduplicator(max_entries=2)
+    calls = []
+
+    def check(key):
+        deduplicator.run(key, f"{key}.R", lambda: calls.append(key) or [{"file_path": f"{key}.R"}])
+
+    for key in ("a", "b", "a", "c", "a", "b"):
+        check(key)
+    assert calls == ["a", "b", "c", "b"]
+    assert list(deduplicator._results) == ["a", "b"]
@@ -0,0 +1,60 @@
+"""Tests for the benchmarks' comparison with a baseline."""
+import importlib
+import sys
+
+from collections import OrderedDict
+
+from .. import tango
+from ..tango import config, scoring  # noqa: F401 imported for benchmarks.suite
+
+
+def _import_suite(monkeypatch):
+    """
+    Import benchmarks.suite, resolving its `tango` imports to the modules these tests use.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Used to alias the modules for the duration of the test.
+
+    Returns:
+        (module) the benchmarks.suite module
+    """
+    for name, module in list(sys.modules.items()):
+        if name == tango.__name__ or name.startswith(tango.__name__ + "."):
+            monkeypatch.setitem(sys.modules, "tango" + name[len(tango.__name__):], module)
+    return importlib.import_module(f"{tango.__name__.rpartition('.')[0]}.benchmarks.suite")
+
+
+def _results(*medians):
+    """
+    Make results of the score benchmark as `run_suite` would.
+
+    Args:
+        *medians (tuple[str, float | None]): The corpus and median time of each result, None if it was skipped.
+
+    Returns:
+        (dict) the results
+    """
+    results = []
+    for corpus, median in medians:
+        result = OrderedDict([("benchmark", "score"), ("corpus", corpus)])
+        if median is None:
+            result["skipped"] = "Rscript not found"
+        else:
+            result["median"] = median
+        results.append(result)
+    return {"version": 1, "results": results}
+
+
+def test_compare_threshold(monkeypatch):
+    """Test that a benchmark has only regressed once its median exceeds the baseline's by more than the threshold."""
+    suite = _import_suite(monkeypatch)
+    baseline = _results(("small", 1.0), ("medium", 2.0), ("large", 4.0), ("huge", None))
+    results = _results(("small", 1.25), ("medium", 2.6), ("large", 1.0), ("huge", 9.0), ("tiny", 1.0))
+
+    comparisons = suite.compare(results, baseline, threshold=0.25)
+    assert [(c["corpus"], c["ratio"], c["regressed"]) for c in comparisons] == [
+        ("small", 1.25, False),
+        ("medium", 1.3, True),
+        ("large", 0.25, False),
+    ]
+    assert [c["regressed"] for c in suite.compare(results, baseline, threshold=0.1)] == [True, True, False]
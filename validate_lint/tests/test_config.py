@@ -0,0 +1,73 @@
+"""Tests for config.py."""
+import os
+
+from os.path import dirname, join as joinpath
+
+from pytest import raises as assert_raises
+
+from ..tango.config import ConfigError, load_config
+from ..tango.validation import Validator
+
+
+def _write_config(tmp_path, text):
+    """
+    Write a config.yaml.
+
+    Args:
+        tmp_path (pathlib.Path): directory to write it to.
+        text (str): the YAML.
+
+    Returns:
+        (str) the path to the config
+    """
+    config_yaml_file = tmp_path / "config.yaml"
+    config_yaml_file.write_text(text)
+    return str(config_yaml_file)
+
+
+def test_load_config():
+    """Test that the config is compiled, with restrictions as frozensets and defaults for optional settings."""
+    config = load_config(joinpath(dirname(__file__), "validation_test_res", "config.yaml"))
+    assert config.files == ("file1.R", "file2.R")
+    assert config.tests == ()
+    assert config.directory == joinpath(dirname(__file__), "validation_test_res")
+    assert config.restricted_libraries["file1.R"] == frozenset({"lib1", "lib2", "lib3"})
+    assert config.restrictions("file2.R") == (
+        frozenset({"lib4", "lib5", "lib6"}), frozenset({"func0", "func1", "func2"})
+    )
+    assert (config.max_workers, config.validation_policy, config.test_timeout) == (None, None, 60)
+    assert config.measure_memory is False
+    with assert_raises(AttributeError):
+        config.extra = 1
+
+
+def test_load_config_cached(tmp_path):
+    """Test that a config is parsed once, and again only when it changes."""
+    config_yaml_file = _write_config(tmp_path, "files: [a.R]\n")
+    config = load_config(config_yaml_file)
+    assert load_config(config_yaml_file) is config
+
+    _write_config(tmp_path, "files: [a.R, b.R]\n")
+    os.utime(config_yaml_file, ns=(0, 0))
+    assert load_config(config_yaml_file).files == ("a.R", "b.R")
+
+
+def test_invalid_configs(tmp_path):
+    """Test that missing and mistyped settings are reported as ConfigErrors naming the key."""
+    for text, key in [
+        ("tests: [test.R]\n", "files"),
+        ("files: a.R\n", "files"),
+        ("files: [a.R]\nrestricted_libraries: [stats]\n", "restricted_libraries"),
+        ("files: [a.R]\ntest_timeout: soon\n", "test_timeout"),
+        ("files: [a.R]\nvalidation_policy: sometimes\n", "validation_policy"),
+        ("files: [a.R]\nmeasure_memory: 1\n", "measure_memory"),
+    ]:
+        with assert_raises(ConfigError, match=key):
+            load_config(_write_config(tmp_path, text))
+
+
+def test_validate_missing_restrictions(tmp_path):
+    """Test that validating a file without restrictions listed names the missing key."""
+    config_yaml_file = _write_config(tmp_path, "files: [a.R]\nrestricted_libraries:\n  a.R: [stats]\n")
+    with assert_raises(ConfigError, match="restricted_functions"):
+        Validator.validate(config_yaml_file)
@@ -0,0 +1,98 @@
+"""Tests for the demo's jobs.py."""
+import importlib.util
+import os
+import threading
+
+from os.path import dirname, join as joinpath
+
+from pytest import raises as assert_raises
+
+_JOBS_SCRIPT = joinpath(dirname(dirname(dirname(os.path.abspath(__file__)))), "demo", "jobs.py")
+
+
+def _load_jobs():
+    """
+    Import the demo's jobs.py, which isn't part of a package.
+
+    Returns:
+        (module) the jobs module
+    """
+    spec = importlib.util.spec_from_file_location("jobs", _JOBS_SCRIPT)
+    jobs = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(jobs)
+    return jobs
+
+
+jobs = _load_jobs()
+
+
+def test_full_queue_rejects_jobs(tmp_path):
+    """Test that jobs are refused while the queue is full, and run once workers are free."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_job(payload, scratch_dir):
+        """Block the worker until released."""
+        started.set()
+        release.wait(10)
+        return payload
+
+    queue = jobs.JobQueue(run_job, max_workers=1, max_queued=1, scratch_root=str(tmp_path))
+    running = queue.submit(1)
+    assert started.wait(10)
+    waiting = queue.submit(2)
+    with assert_raises(jobs.QueueFull):
+        queue.submit(3)
+    assert queue.queued() == 1
+    assert len(queue._jobs) == 2
+
+    release.set()
+    assert [queue.wait(job_id, 10).result for job_id in (running, waiting)] == [1, 2]
+    assert queue.get(queue.submit(4)) is not None
+
+
+def test_job_completes(tmp_path):
+    """Test that a job's result is recorded and its scratch directory is deleted once it has finished."""
+    scratch_dirs = []
+
+    def run_job(payload, scratch_dir):
+        """Grade by doubling the payload in a file in the scratch directory."""
+        scratch_dirs.append(scratch_dir)
+        with open(joinpath(scratch_dir, "result"), "w") as f:
+            f.write(str(2 * payload))
+        with open(joinpath(scratch_dir, "result")) as f:
+            return int(f.read())
+
+    queue = jobs.JobQueue(run_job, max_workers=2, scratch_root=str(tmp_path))
+    job = queue.wait(queue.submit(21), 10)
+    assert job.to_json() == {"id": job.id, "status": jobs.DONE, "result": 42}
+    assert job.payload is None and job.finished is not None
+    assert dirname(scratch_dirs[0]) == str(tmp_path) and not os.path.exists(scratch_dirs[0])
+    assert queue.wait("no such job", 1) is None
+
+
+def test_job_fails(tmp_path):
+    """Test that an exception raised by a job is recorded as its error, and the worker carries on."""
+    def run_job(payload, scratch_dir):
+        """Fail unless the payload is "ok"."""
+        if payload != "ok":
+            raise ValueError(f"can't grade {payload}")
+        return payload
+
+    queue = jobs.JobQueue(run_job, max_workers=1, scratch_root=str(tmp_path))
+    failed = queue.wait(queue.submit("bad"), 10)
+    assert failed.to_json() == {"id": failed.id, "status": jobs.FAILED, "error": "ValueError: can't grade bad"}
+    assert queue.wait(queue.submit("ok"), 10).status == jobs.DONE
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_finished_jobs_are_forgotten(tmp_path):
+    """Test that only the most recently finished jobs are remembered."""
+    queue = jobs.JobQueue(lambda payload, scratch_dir: payload, max_workers=1, max_finished=2,
+                          scratch_root=str(tmp_path))
+    cached = queue.add_result("cached")
+    assert queue.get(cached).to_json() == {"id": cached, "status": jobs.DONE, "result": "cached"}
+    job_ids = [queue.submit(i) for i in range(3)]
+    for job_id in job_ids:
+        queue.wait(job_id, 10)
+    assert [queue.get(job_id) is not None for job_id in [cached] + job_ids] == [False, False, True, True]
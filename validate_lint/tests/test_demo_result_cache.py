@@ -0,0 +1,107 @@
+"""Tests for the demo's result_cache.py."""
+import importlib.util
+import os
+import types
+
+from os.path import dirname, join as joinpath
+
+from pytest import raises as assert_raises
+
+_RESULT_CACHE_SCRIPT = joinpath(dirname(dirname(dirname(os.path.abspath(__file__)))), "demo", "result_cache.py")
+
+
+def _load_result_cache():
+    """
+    Import the demo's result_cache.py, which isn't part of a package.
+
+    Returns:
+        (module) the result_cache module
+    """
+    spec = importlib.util.spec_from_file_location("result_cache", _RESULT_CACHE_SCRIPT)
+    result_cache = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(result_cache)
+    return result_cache
+
+
+result_cache = _load_result_cache()
+
+
+def _fake_clock(monkeypatch):
+    """
+    Replace the time the caches see with a clock the test sets.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Used to replace the clock.
+
+    Returns:
+        (list[float]) the current time, which the test may change
+    """
+    now = [1000.0]
+    monkeypatch.setattr(result_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_result_key_inputs():
+    """Test that a result's key depends on exactly its code, tests and toolchain version."""
+    key = result_cache.result_key("f <- 1", "test_f", "image-1")
+    assert key == result_cache.result_key("f <- 1", "test_f", "image-1")
+    assert len({
+        key,
+        result_cache.result_key("f <- 2", "test_f", "image-1"),
+        result_cache.result_key("f <- 1", "test_g", "image-1"),
+        result_cache.result_key("f <- 1", "test_f", "image-2"),
+        # Parts are separated, so moving text from one to the next changes the key
+        result_cache.result_key("f <- 1t", "est_f", "image-1"),
+    }) == 5
+
+
+def test_memory_cache_expiry_and_eviction(monkeypatch):
+    """Test that results in memory expire after the ttl, and the least recently used are evicted."""
+    now = _fake_clock(monkeypatch)
+    cache = result_cache.MemoryResultCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert [cache.get(key) for key in "abc"] == [1, None, 3]
+
+    now[0] += 61
+    assert cache.get("a") is None
+    cache.put("a", 4)
+    assert cache.get("a") == 4
+    assert (cache.hits, cache.misses) == (4, 2)
+
+
+def test_disk_cache_expiry(tmp_path, monkeypatch):
+    """Test that results on disk are shared between caches of a directory, and deleted once they expire."""
+    now = _fake_clock(monkeypatch)
+    cache = result_cache.DiskResultCache(str(tmp_path), ttl=60)
+    cache.put("a", {"q_score": 95})
+    assert result_cache.DiskResultCache(str(tmp_path), ttl=60).get("a") == {"q_score": 95}
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_disk_cache_writes_atomically(tmp_path):
+    """Test that a result which can't be written leaves the stored result and no temporary files."""
+    cache = result_cache.DiskResultCache(str(tmp_path))
+    cache.put("a", [1, 2])
+    with assert_raises(TypeError):
+        cache.put("a", object())
+    assert cache.get("a") == [1, 2]
+    assert os.listdir(str(tmp_path)) == ["a.json"]
+
+    (tmp_path / "b.json").write_text('{"expires": ')
+    assert cache.get("b") is None
+
+
+def test_disk_cache_eviction(tmp_path):
+    """Test that the least recently used results on disk are evicted once there are too many."""
+    cache = result_cache.DiskResultCache(str(tmp_path), max_entries=10)
+    for i in range(10):
+        cache.put(str(i), i)
+        os.utime(str(tmp_path / f"{i}.json"), (i, i))
+    cache.put("new", 10)
+    assert sorted(os.listdir(str(tmp_path))) == [f"{i}.json" for i in range(2, 10)] + ["new.json"]
@@ -0,0 +1,62 @@
+"""Tests for eval_server.py."""
+import shutil
+
+from os.path import dirname, join as joinpath
+
+from ..tango.eval_server import EvalServer
+
+EVALUATION_DIR = joinpath(dirname(dirname(dirname(__file__))), "evaluation")
+
+
+def _exercise(tmp_path):
+    """
+    Copy the example exercise, which is also a submission to itself.
+
+    Args:
+        tmp_path (pathlib.Path): directory to copy the exercise to.
+
+    Returns:
+        (pathlib.Path) the copied exercise
+    """
+    exercise = tmp_path / "exercise"
+    shutil.copytree(EVALUATION_DIR, exercise)
+    return exercise
+
+
+def test_eval_server_evaluates_submissions(tmp_path):
+    """Test that each submission is evaluated in a fork with its own files."""
+    exercise = _exercise(tmp_path)
+    with EvalServer(str(exercise / "config.yaml"), str(exercise / "eval_server.R")) as server:
+        evaluation = server.evaluate(str(exercise))
+        runner = evaluation["runners"][0]
+        names = {r["test_name"]: outcome for outcome in ("successes", "failures", "errors") for r in runner[outcome]}
+        assert names["testMultiplyZero"] == "successes"
+        # increment stops with an error
+        assert names["testIncrement"] == "errors"
+
+        # A second submission, whose multiply is wrong, doesn't see the first's functions
+        other = tmp_path / "other"
+        (other / "src").mkdir(parents=True)
+        shutil.copy(exercise / "src" / "add_two.R", other / "src")
+        (other / "src" / "calculate.R").write_text(
+            (exercise / "src" / "calculate.R").read_text().replace("start * 30.0", "start * 31.0")
+        )
+        evaluation = server.evaluate(str(other))
+        failures = {r["test_name"] for r in evaluation["runners"][0]["failures"]}
+        assert "testMultiplyOne" in failures
+        assert server.alive()
+
+
+def test_eval_server_reports_timeouts_per_test(tmp_path):
+    """Test that a submission which runs forever keeps its finished tests and has the rest reported as errors."""
+    exercise = _exercise(tmp_path)
+    # Hangs while being sourced, outside of any tdk_run timeout
+    (exercise / "src" / "add_two.R").write_text("while (TRUE) {}\n")
+    with EvalServer(str(exercise / "config.yaml"), str(exercise / "eval_server.R"), timeout=3) as server:
+        evaluation = server.evaluate(str(exercise))
+        runner = evaluation["runners"][0]
+        timeouts = {r["test_name"] for r in runner["errors"] if r["info"] == "timeout"}
+        assert "testAddZero" in timeouts
+        assert any(r["test_name"] == "testMultiplyZero" for r in runner["successes"])
+        assert runner["tests_run"] == len({r["test_name"] for kind in ("successes", "failures", "errors")
+                                          for r in runner[kind]})
@@ -0,0 +1,63 @@
+"""Tests for evaluation_stats.py."""
+import json
+
+from ..tango.evaluation_stats import main, percentile, summarise
+
+
+def _evaluation(successes=(), failures=(), errors=()):
+    """
+    Create an evaluation document in the format tester.R writes.
+
+    Args:
+        successes (tuple[dict]): the success records.
+        failures (tuple[dict]): the failure records.
+        errors (tuple[dict]): the error records.
+
+    Returns:
+        (dict[str: Any]) the evaluation
+    """
+    return {"passed": not failures and not errors, "runners": [{
+        "successes": list(successes), "failures": list(failures), "errors": list(errors), "runner_key": "testcases"
+    }]}
+
+
+def test_percentile():
+    """Test that percentiles interpolate between ranks."""
+    values = [1, 2, 3, 4, 5]
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 3
+    assert percentile(values, 90) == 4.6
+    assert percentile(values, 100) == 5
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_summarise():
+    """Test that resources are summarised per test, across outcomes, ignoring records without resources."""
+    evaluations = [
+        _evaluation(successes=[{"test_name": "fast", "wall_time": 0.1, "cpu_time": 0.1, "peak_memory": 10}]),
+        _evaluation(
+            successes=[{"test_name": "fast", "wall_time": 0.3, "cpu_time": 0.2, "peak_memory": 12}],
+            errors=[{"test_name": "slow", "info": "timeout"}]
+        ),
+        _evaluation(failures=[{"test_name": "slow", "wall_time": 2.0, "cpu_time": 1.5, "peak_memory": 30}]),
+    ]
+    summary = summarise(evaluations, percentiles=(50, 100))
+
+    assert list(summary) == ["fast", "slow"]
+    assert summary["fast"]["runs"] == 2 and summary["fast"]["successes"] == 2
+    assert summary["fast"]["wall_time"] == {"p50": 0.2, "p100": 0.3, "max": 0.3}
+    assert summary["slow"]["runs"] == 2
+    assert summary["slow"]["errors"] == 1 and summary["slow"]["failures"] == 1
+    assert summary["slow"]["peak_memory"] == {"p50": 30, "p100": 30, "max": 30}
+
+
+def test_main(tmp_path, capsys):
+    """Test that the command line summarises readable files and skips the rest."""
+    path = tmp_path / "evaluation.json"
+    path.write_text(json.dumps(_evaluation(successes=[{"test_name": "t", "wall_time": 1, "cpu_time": 1}])))
+
+    main([str(path), str(tmp_path / "missing.json"), "--percentiles", "50"])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["t"]["wall_time"] == {"p50": 1, "max": 1}
+    assert summary["t"]["peak_memory"] == {"p50": None, "max": None}
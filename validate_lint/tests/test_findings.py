@@ -0,0 +1,52 @@
+"""Tests for findings.py."""
+import json
+import pickle
+
+from pytest import raises as assert_raises
+
+from ..tango.findings import Finding, json_default, to_json
+from ..tango.linter import Linter
+
+
+def test_finding_reads_like_its_json():
+    """Test that a finding is a mapping of the fields it has, equal to the dict it is output as."""
+    finding = Finding(type="restricted library", info="library lib1 is not allowed in this file", file_path="a.R",
+                      line_number=3)
+    assert finding == {
+        "type": "restricted library",
+        "info": "library lib1 is not allowed in this file",
+        "file_path": "a.R",
+        "line_number": 3
+    }
+    assert list(finding) == ["file_path", "line_number", "type", "info"]
+    assert finding.get("column_number") is None
+    with assert_raises(KeyError):
+        finding["column_number"]
+    with assert_raises(AttributeError):
+        finding.extra = 1
+    assert pickle.loads(pickle.dumps(finding)) == finding
+
+
+def test_parsed_findings_share_strings():
+    """Test that findings parsed from lintr output share one copy of each repeated path and message."""
+    errors_xml = "".join(
+        f'<error line="{i}" column="1" severity="style" message="Only use double-quotes." source="quotes_linter"/>'
+        for i in range(1, 4)
+    )
+    output = f'<?xml version="1.0"?><checkstyle><file name="a.R">{errors_xml}</file></checkstyle>'
+    first, second, _ = Linter._parse_lintr_output(output, with_linter=True)
+    assert first.info is second.info and first.file_path is second.file_path and first.type is second.type
+    assert (first.linter, "linter" in next(Linter._style_errors([first]))) == ("quotes_linter", False)
+
+
+def test_findings_converted_to_json():
+    """Test that findings in a report become dicts only when it is converted or written."""
+    finding = Finding(type="syntax", info="unexpected symbol", file_path="a.R", line_number=1, column_number=5)
+    report = {"runners": [{"errors": [finding], "score": 0.95}], "passed": False}
+
+    converted = to_json(report)
+    assert type(converted["runners"][0]["errors"][0]) is dict
+    assert report["runners"][0]["errors"][0] is finding
+    assert json.loads(json.dumps(report, default=json_default)) == converted
+    with assert_raises(TypeError):
+        json.dumps({"runners": object()}, default=json_default)
@@ -0,0 +1,100 @@
+"""Tests for lint_cache.py."""
+import os
+
+from ..tango.lint_cache import LintCache
+
+
+def _checkstyle(file_name):
+    """
+    Create some checkstyle output for a file.
+
+    Args:
+        file_name (str): the already escaped name of the linted file.
+
+    Returns:
+        (str) checkstyle XML naming `file_name`
+    """
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<checkstyle version="lintr-2.0.1">\n  '
+        f'<file name="{file_name}">\n    '
+        '<error line="1" column="7" severity="style" message="Only use double-quotes."/>\n  </file>\n</checkstyle>\n'
+    )
+
+
+def _write(path, text):
+    """
+    Write `text` to the file at `path`.
+
+    Args:
+        path (str): the file to write.
+        text (str): the contents of the file.
+    """
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_identical_files_share_an_entry(tmp_path):
+    """Test that files with identical contents hit the cache and get their own path in the output."""
+    cache = LintCache(str(tmp_path / "cache"))
+    first = str(tmp_path / "first.R")
+    second = str(tmp_path / "a & b.R")
+    _write(first, "print('hello')\n")
+    _write(second, "print('hello')\n")
+
+    calls = []
+
+    def invoke_lintr():
+        calls.append(1)
+        return _checkstyle(first)
+
+    assert cache.lookup(first, "lint", invoke_lintr) == _checkstyle(first)
+    assert cache.lookup(first, "lint", invoke_lintr) == _checkstyle(first)
+    assert cache.lookup(second, "lint", invoke_lintr) == _checkstyle(second.replace("&", "&amp;"))
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 2, "misses": 1}
+
+
+def test_options_and_contents_are_part_of_the_key(tmp_path):
+    """Test that different options or different file contents miss the cache."""
+    cache = LintCache(str(tmp_path / "cache"))
+    file = str(tmp_path / "file.R")
+    _write(file, "x <- 1\n")
+
+    cache.lookup(file, "lint", lambda: _checkstyle(file))
+    cache.lookup(file, "lint, linters=c(object_usage_linter)", lambda: _checkstyle(file))
+    _write(file, "x <- 2\n")
+    cache.lookup(file, "lint", lambda: _checkstyle(file))
+    assert cache.stats() == {"hits": 0, "misses": 3}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test that the cache stays under its size limit by evicting the oldest entries."""
+    entry_size = len(_checkstyle("\0tango-linted-file\0").encode("utf-8"))
+    cache = LintCache(str(tmp_path / "cache"), max_bytes=int(2.5 * entry_size))
+    files = [str(tmp_path / f"{i}.R") for i in range(4)]
+    for i, file in enumerate(files):
+        _write(file, f"x <- {i}\n")
+        cache.lookup(file, "lint", lambda: _checkstyle(file))
+        # Ensure distinct last-used times regardless of filesystem timestamp resolution
+        os.utime(cache._path(cache._key(file, "lint")), (i, i))
+
+    remaining = sorted(path for _, _, path in cache._entries())
+    assert remaining == sorted(cache._path(cache._key(file, "lint")) for file in files[2:])
+
+
+def test_failed_lintr_output_is_not_stored(tmp_path):
+    """Test that empty or truncated output from a failed R process is passed on but linted again next time."""
+    cache = LintCache(str(tmp_path / "cache"))
+    file = str(tmp_path / "file.R")
+    _write(file, "x <- 1\n")
+
+    for failed_output in ("", _checkstyle(file)[:-20], "Error: there is no package called 'lintr'\n"):
+        assert cache.lookup(file, "lint", lambda: failed_output) == failed_output
+    assert cache.lookup(file, "lint", lambda: _checkstyle(file)) == _checkstyle(file)
+    assert cache.lookup(file, "lint", lambda: "") == _checkstyle(file)
+    assert cache.stats() == {"hits": 1, "misses": 4}
+
+    empty = '<?xml version="1.0" encoding="UTF-8"?>\n<checkstyle version="lintr-2.0.1"/>\n'
+    _write(file, "x <- 2\n")
+    cache.lookup(file, "lint", lambda: empty)
+    assert cache.lookup(file, "lint", lambda: "") == empty
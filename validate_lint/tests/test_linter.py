@@ -1,5 +1,9 @@
 """Unit tests for Linter.py."""
+import io
+import json
 import os
+import stat
+import time
 
 from contextlib import contextmanager
 
@@ -34,9 +38,10 @@ def _create_test_yaml(filename):
             "restricted_libraries": {f"{filename}.R": []}
         }, y)
 
-    yield _test_file(f"{filename}.yaml")
-
-    os.remove(_test_file(f"{filename}.yaml"))
+    try:
+        yield _test_file(f"{filename}.yaml")
+    finally:
+        os.remove(_test_file(f"{filename}.yaml"))
 
 
 def _ordered(obj):
@@ -57,22 +62,25 @@ def _ordered(obj):
         return obj
 
 
-def test_invoke_lintr():
+def test_combined_lintr():
     """
-    Checks that lintr works on invocation.
+    Checks that lintr works on invocation, recording the linter of each error.
 
     Returns:
         None
     """
     basic_warning_path = _test_file("warning.R")
-    basic_warning_result = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n<checkstyle version="lintr-2.0.1">\n  '
-        f'<file name="{basic_warning_path}">\n    '
-        '<error line="2" column="3" severity="warning" '
-        'message="local variable \'some_variable\' assigned but may not be used"/>\n  </file>\n</checkstyle>\n'
-    )
-    lintr_result = Linter._invoke_lintr(basic_warning_path)
-    assert lintr_result == basic_warning_result
+    _, r_cmd = Linter._combined_lintr_command(basic_warning_path)
+    with Linter._stream_R(r_cmd, "lintr", basic_warning_path) as output:
+        lintr_result = [error.to_json() for error in Linter._parse_lintr_output(output, with_linter=True)]
+    assert lintr_result == [{
+        "file_path": basic_warning_path,
+        "line_number": 2,
+        "column_number": 3,
+        "type": "warning",
+        "info": "local variable 'some_variable' assigned but may not be used",
+        "linter": "object_usage_linter"
+    }]
 
 
 def test_linter_raises_error_if_filenotfound():
@@ -202,3 +210,123 @@ def test_linter_correctly_ignores_multiple_similar_style_errors():
     with _create_test_yaml("zero") as f:
         lint_result = Linter.lint(f, ignore_multiple_for_score=True)
     assert lint_result["runners"][0]["score"] == 0.95
+
+
+def test_lint_file_shares_one_lint_pass(monkeypatch):
+    """
+    Checks that the combined lint pass runs once per file and is split between style and restricted function errors.
+
+    Returns:
+        None
+    """
+    file_path = _test_file("warning.R")
+    combined_output = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<checkstyle version="lintr-2.0.1">\n  '
+        f'<file name="{file_path}">\n    '
+        '<error line="2" column="3" severity="warning" '
+        'message="local variable \'some_variable\' assigned but may not be used" source="object_usage_linter"/>\n    '
+        '<error line="3" column="1" severity="warning" '
+        'message="Function &quot;print&quot; is undesirable." source="undesirable_function_linter"/>\n  '
+        '</file>\n</checkstyle>\n'
+    )
+    calls = []
+
+    def fake_combined_lintr(file_to_lint, restricted_functions=()):
+        calls.append((file_to_lint, restricted_functions))
+        return combined_output
+
+    monkeypatch.setattr(Linter, "_invoke_combined_lintr", fake_combined_lintr)
+    monkeypatch.setattr(Linter, "_lint_memo", type(Linter._lint_memo)())
+
+    tagged = Linter._lint_file(file_path, ["print"])
+    assert Linter._lint_file(file_path, ["print"]) is tagged
+    assert calls == [(file_path, ("print",))]
+    assert [error["linter"] for error in tagged] == ["object_usage_linter", "undesirable_function_linter"]
+
+    assert list(Linter._style_errors(tagged)) == [{
+        "file_path": file_path,
+        "line_number": 2,
+        "type": "warning",
+        "info": "local variable 'some_variable' assigned but may not be used",
+        "column_number": 3
+    }]
+
+
+def test_map_files_keeps_file_order():
+    """
+    Checks that files processed concurrently are returned in the order they were given.
+
+    Returns:
+        None
+    """
+    def slow_upper(file):
+        time.sleep(0.01 * (5 - len(file)))
+        return file.upper()
+
+    files = ["a", "bb", "ccc", "dddd"]
+    assert Linter._map_files(slow_upper, files, max_workers=4) == ["A", "BB", "CCC", "DDDD"]
+    assert Linter._map_files(slow_upper, files) == ["A", "BB", "CCC", "DDDD"]
+
+
+def test_parse_and_write_lint_json_stream():
+    """
+    Checks that lintr output is parsed from a stream and written as JSON with the same score as `lint` gives.
+
+    Returns:
+        None
+    """
+    errors_xml = ''.join(
+        f'<error line="{i}" column="1" severity="style" message="Only use double-quotes."/>' for i in range(1, 31)
+    )
+    stream = io.BytesIO(f'<?xml version="1.0"?><checkstyle><file name="a.R">{errors_xml}</file></checkstyle>'.encode())
+
+    errors = Linter._parse_lintr_output(stream)
+    first = next(errors)
+    assert first == {"file_path": "a.R", "line_number": 1, "type": "style", "info": "Only use double-quotes.",
+                     "column_number": 1}
+
+    out = io.StringIO()
+    Linter._write_lint_json(errors, out)
+    written = json.loads(out.getvalue())
+    assert len(written["runners"][0]["errors"]) == 29
+    assert written["runners"][0]["errors"][-1]["line_number"] == 30
+    assert written["runners"][0]["score"] == Linter._lint_report(written["runners"][0]["errors"])["runners"][0]["score"]
+    assert written["runners"][0]["runner_key"] == "Hadley Wickham's R Style Guide"
+
+    assert list(Linter._parse_lintr_output('<?xml version="1.0"?><checkstyle/>')) == []
+
+
+def test_lint_to_file_replaces_file_only_on_success(monkeypatch, tmp_path):
+    """
+    Checks that linting to a path leaves the previous file untouched, and no temporary file, if linting fails.
+
+    Returns:
+        None
+    """
+    config = tmp_path / "config.yaml"
+    config.write_text("files: [a.R, b.R]\n")
+    out = tmp_path / "quality.json"
+    out.write_text("previous")
+
+    def iter_errors(config, file):
+        yield {"file_path": file, "line_number": 1, "type": "style", "info": "x", "column_number": 1}
+        if file == "b.R":
+            raise RuntimeError("lintr crashed")
+
+    monkeypatch.setattr(Linter, "_iter_config_file_errors", iter_errors)
+    with assert_raises(RuntimeError):
+        Linter.lint_to_file(str(config), str(out))
+    assert sorted(os.listdir(tmp_path)) == ["config.yaml", "quality.json"]
+    assert out.read_text() == "previous"
+
+    monkeypatch.setattr(Linter, "_iter_config_file_errors", lambda config, file: iter(()))
+    umask = os.umask(0o027)
+    try:
+        Linter.lint_to_file(str(config), str(out))
+        new_out = tmp_path / "new_quality.json"
+        Linter.lint_to_file(str(config), str(new_out))
+    finally:
+        os.umask(umask)
+    assert json.loads(out.read_text())["runners"][0]["score"] == 1.0
+    # The files have the mode open() would give them, not mkstemp's 0o600
+    assert [stat.S_IMODE(os.stat(str(path)).st_mode) for path in (out, new_out)] == [0o640, 0o640]
@@ -0,0 +1,95 @@
+"""Tests for manifest.py."""
+import hashlib
+import json
+import shutil
+
+from os.path import dirname, join as joinpath
+
+from ..tango.manifest import MANIFEST_FILE, describe_test_file, find_test_functions, load_manifest, update_manifest
+
+EVALUATION_DIR = joinpath(dirname(dirname(dirname(__file__))), "evaluation")
+
+
+def test_find_test_functions():
+    """Test that only top-level functions not starting with '.' are found, sorted as R's ls() sorts them."""
+    code = "\n".join([
+        "test_b <- function() {",
+        "  inner <- function() 1",
+        "}",
+        "`Test_a` = function(x) x",
+        ".helper <- function() NULL",
+        "not_a_function <- 3",
+        "obj$method <- function() NULL",
+        "# commented <- function() NULL",
+    ])
+    assert find_test_functions(code) == ["Test_a", "test_b"]
+
+
+def test_describe_test_file():
+    """Test that the tested names and descriptions of the example exercise's tests are found."""
+    with open(joinpath(EVALUATION_DIR, "testcases", "test_calculate.R")) as f:
+        description = describe_test_file(f.read())
+    assert description["functions"] == ["testMultiplyOne", "testMultiplyType", "testMultiplyZero"]
+    assert description["tested_names"] == dict.fromkeys(description["functions"], "multiply")
+    # testMultiplyType misspells tdk_test_description
+    assert description["test_descriptions"] == {
+        "testMultiplyZero": "testing multiplication by zero",
+        "testMultiplyOne": "testing multiplication by 1",
+    }
+    assert description["file_path"] == "src/calculate.R"
+    assert description["descriptions"] == {"multiply": "multiplies by 30"}
+
+
+def test_describe_test_file_without_descriptions():
+    """Test that .descriptions is only in the description if the file defines it, as evaluator() checks for it."""
+    with open(joinpath(EVALUATION_DIR, "testcases", "test_increment.R")) as f:
+        assert "descriptions" not in describe_test_file(f.read())
+
+
+def _exercise(tmp_path):
+    """
+    Copy the example exercise's config and tests.
+
+    Args:
+        tmp_path (pathlib.Path): directory to copy the exercise to.
+
+    Returns:
+        (str) path to the copied config.yaml
+    """
+    shutil.copy(joinpath(EVALUATION_DIR, "config.yaml"), tmp_path)
+    shutil.copytree(joinpath(EVALUATION_DIR, "testcases"), tmp_path / "testcases")
+    return str(tmp_path / "config.yaml")
+
+
+def test_update_manifest(tmp_path):
+    """Test that the manifest describes every test file under its md5 and is written alongside config.yaml."""
+    config = _exercise(tmp_path)
+    manifest = update_manifest(config)
+
+    assert load_manifest(config) == manifest
+    test_file = "testcases/test_increment.R"
+    assert manifest["tests"][test_file]["functions"] == ["testIncrement"]
+    md5 = hashlib.md5((tmp_path / test_file).read_bytes()).hexdigest()
+    assert manifest["tests"][test_file]["md5"] == md5
+
+
+def test_update_manifest_only_redescribes_changed_files(tmp_path):
+    """Test that entries are kept while their file's md5 matches and rebuilt when it changes."""
+    config = _exercise(tmp_path)
+    manifest = update_manifest(config)
+    manifest["tests"]["testcases/test_addition.R"]["functions"] = ["kept"]
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest))
+
+    (tmp_path / "testcases" / "test_increment.R").write_text("testChanged <- function() NULL\n")
+    manifest = update_manifest(config)
+    assert manifest["tests"]["testcases/test_addition.R"]["functions"] == ["kept"]
+    assert manifest["tests"]["testcases/test_increment.R"]["functions"] == ["testChanged"]
+    assert load_manifest(config) == manifest
+
+
+def test_load_manifest_rejects_other_versions(tmp_path):
+    """Test that a manifest in another format is ignored."""
+    config = _exercise(tmp_path)
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps({"version": -1, "tests": {}}))
+    assert load_manifest(config) is None
+    assert load_manifest(str(tmp_path / "missing" / "config.yaml")) is None
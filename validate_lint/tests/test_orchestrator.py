@@ -0,0 +1,80 @@
+"""Tests for orchestrator.py."""
+import json
+import subprocess
+
+from os.path import dirname, join as joinpath
+
+from ..tango import orchestrator
+from ..tango.manifest import _describe
+from ..tango.orchestrator import run_test_file, run_tests
+from ..tango.r_pool import RWorkerPool, RWorkerTimeout
+
+EVALUATION_DIR = joinpath(dirname(dirname(dirname(__file__))), "evaluation")
+
+
+def test_run_test_file_timeout(monkeypatch):
+    """Test that a test file which times out has all of its tests reported as timeout errors."""
+    def timeout(cmd, timeout, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    monkeypatch.setattr(orchestrator.subprocess, "run", timeout)
+    test_file = "testcases/test_calculate.R"
+    records = run_test_file(test_file, "tester.R", EVALUATION_DIR, 5, _describe(test_file, EVALUATION_DIR))
+    assert [(r["outcome"], r["test_name"], r["info"]) for r in records] == [
+        ("errors", "testMultiplyOne", "timeout"),
+        ("errors", "testMultiplyType", "timeout"),
+        ("errors", "testMultiplyZero", "timeout"),
+    ]
+    # The errors describe the tests as R would have
+    assert records[0]["test_description"] == "testing multiplication by 1"
+    assert records[0]["file_path"] == "src/calculate.R"
+    assert records[0]["function_tested__name"] == "multiply"
+    assert records[0]["function_tested__description"] == "multiplies by 30"
+
+
+def test_run_test_file_keeps_finished_tests(monkeypatch):
+    """Test that tests which finished before R was killed keep their results."""
+    def partial_run(cmd, timeout, **kwargs):
+        with open(cmd[2], "w") as records:
+            records.write(json.dumps({"outcome": "successes", "test_name": "testIncrement"}) + "\n")
+            records.write('{"outcome": "fail')
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    monkeypatch.setattr(orchestrator.subprocess, "run", partial_run)
+    test_file = "testcases/test_increment.R"
+    records = run_test_file(test_file, "tester.R", EVALUATION_DIR, 5, _describe(test_file, EVALUATION_DIR))
+    assert records == [{"outcome": "successes", "test_name": "testIncrement"}]
+
+
+def test_run_test_file_in_session_timeout():
+    """Test that tests timed out in a session are reported as timeout errors."""
+    class TimingOutSession:
+        def run_with_status(self, r_cmd, timeout=None):
+            raise RWorkerTimeout(f"R worker timed out after {timeout} seconds")
+
+    test_file = "testcases/test_increment.R"
+    records = run_test_file(
+        test_file, "tester.R", EVALUATION_DIR, 5, _describe(test_file, EVALUATION_DIR), TimingOutSession()
+    )
+    assert [(r["outcome"], r["test_name"], r["info"]) for r in records] == [("errors", "testIncrement", "timeout")]
+
+
+def test_run_tests_in_session(tmp_path):
+    """Test that running every test file in one R session gives the same results as a process per file."""
+    tester = joinpath(EVALUATION_DIR, "tester.R")
+    config_yaml_file = joinpath(EVALUATION_DIR, "config.yaml")
+    by_process = run_tests(config_yaml_file, tester, str(tmp_path / "process.json"))
+    session = RWorkerPool(size=1, preload=())
+    try:
+        in_session = run_tests(config_yaml_file, tester, str(tmp_path / "session.json"), session=session)
+    finally:
+        session.close()
+
+    def outcomes(evaluation):
+        return {
+            (outcome, record["test_name"])
+            for outcome in ("successes", "failures", "errors")
+            for record in evaluation["runners"][0][outcome]
+        }
+
+    assert outcomes(in_session) == outcomes(by_process)
@@ -0,0 +1,92 @@
+"""Tests for pipeline.py."""
+from pytest import raises as assert_raises
+
+from ..tango.pipeline import COLLECT_ALL, FAIL_FAST, Stage, run_stages
+from ..tango.validation import Validator
+
+
+def _stages(calls):
+    """
+    Create stages which record the files they check, failing on files containing their name.
+
+    Args:
+        calls (list[tuple[str, str]]): list to append each (stage, file) checked to.
+
+    Returns:
+        (list[Stage]) two cheap failure stages and an expensive error stage, the last two in the same group
+    """
+    def check(name, kind):
+        def run(file):
+            calls.append((name, file))
+            found = [f"{name} in {file}"] if name in file else []
+            return (found, []) if kind == "failures" else ([], found)
+        return run
+
+    return [
+        Stage("cheap", "cheap", check("cheap", "failures")),
+        Stage("medium", "other", check("medium", "failures")),
+        Stage("expensive", "other", check("expensive", "errors")),
+    ]
+
+
+def _success(group, file):
+    """
+    Create a success for a group of stages.
+
+    Args:
+        group (str): name of the group.
+        file (str): the file which passed the group.
+
+    Returns:
+        (str) a description of the success
+    """
+    return f"{group} ok in {file}"
+
+
+def test_collect_all_runs_every_stage():
+    """Test that all stages run on all files, with successes for groups whose stages all passed."""
+    calls = []
+    results, timings = run_stages(_stages(calls), ["a", "cheap b"], _success, policy=COLLECT_ALL)
+    assert len(calls) == 6
+    assert results == [
+        (["cheap ok in a", "other ok in a"], [], []),
+        (["other ok in cheap b"], ["cheap in cheap b"], []),
+    ]
+    assert [(t.stage, t.file_path) for t in timings] == [
+        ("cheap", "a"), ("cheap", "cheap b"), ("medium", "a"), ("medium", "cheap b"),
+        ("expensive", "a"), ("expensive", "cheap b"),
+    ]
+    assert all(t.seconds >= 0 for t in timings)
+
+
+def test_fail_fast_stops_every_file_at_first_failing_stage():
+    """Test that no file reaches a stage after one which failed on any file, and skipped groups get no success."""
+    calls = []
+    results, _ = run_stages(_stages(calls), ["a", "medium b"], _success, policy=FAIL_FAST)
+    assert ("expensive", "a") not in calls
+    assert len(calls) == 4
+    assert results == [
+        (["cheap ok in a"], [], []),
+        (["cheap ok in medium b"], ["medium in medium b"], []),
+    ]
+
+
+def test_unknown_policy_raises():
+    """Test that a misspelt policy is reported rather than ignored."""
+    with assert_raises(ValueError):
+        run_stages(_stages([]), ["a"], _success, policy="fail-fast")
+
+
+def test_validate_file_fail_fast_never_reaches_r(monkeypatch, tmp_path):
+    """Test that a file using a restricted library is rejected without any R being run."""
+    def no_r(*args, **kwargs):
+        raise AssertionError("R should not be run")
+
+    monkeypatch.setattr(Validator, "_invoke_R", no_r)
+    code = tmp_path / "code.R"
+    code.write_text("library(rjson)\n")
+
+    successes, failures, errors = Validator.validate_file(str(code), ["rjson"], [], policy=FAIL_FAST)
+    assert successes == []
+    assert [failure["type"] for failure in failures] == ["restricted library"]
+    assert errors == []
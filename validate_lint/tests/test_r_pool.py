@@ -0,0 +1,112 @@
+"""Tests for r_pool.py."""
+import os
+import threading
+
+from pytest import raises as assert_raises
+
+from ..tango import r_pool
+from ..tango.linter import Linter
+from ..tango.r_pool import RWorker, RWorkerError, RWorkerPool
+
+_RESTRICTED_FUNCTIONS_FILE = os.path.join(os.path.dirname(__file__), "validation_test_res", "restricted_functions.R")
+
+
+def test_worker_runs_commands():
+    """Test that a worker returns the stdout and status of each command it is sent."""
+    with RWorker(preload=()) as worker:
+        assert worker.run('cat("hello\\n")') == ("hello\n", 0)
+        assert worker.run('x <- "a;b"; cat(x)') == ("a;b", 0)
+        assert worker.run("1 + 1") == ("[1] 2\n", 0)
+        assert worker.run('stop("oops")')[1] == 1
+        assert worker.jobs_run == 4
+        assert worker.ping()
+
+
+def test_worker_shares_variables_within_a_command():
+    """Test that the expressions of one command see the variables its earlier expressions assigned."""
+    with RWorker(preload=()) as worker:
+        assert worker.run("x <- 1; y <- x + 1\ncat(x, y)") == ("1 2", 0)
+
+
+def test_worker_does_not_leak_variables_between_commands():
+    """Test that each command is run in a fresh environment."""
+    with RWorker(preload=()) as worker:
+        worker.run("leaked <- 1")
+        assert worker.run('cat(exists("leaked"))') == ("FALSE", 0)
+
+
+def test_worker_timeout_kills_worker():
+    """Test that a command which runs for too long raises an error and stops the worker."""
+    with RWorker(preload=()) as worker:
+        with assert_raises(RWorkerError):
+            worker.run("Sys.sleep(5)", timeout=0.5)
+        assert not worker.alive()
+
+
+def test_pool_recycles_workers():
+    """Test that workers are replaced once they have run `max_jobs` commands."""
+    pool = RWorkerPool(size=1, max_jobs=2, preload=())
+    try:
+        pids = [pool.run("cat(Sys.getpid())") for _ in range(4)]
+    finally:
+        pool.close()
+    assert pids[0] == pids[1]
+    assert pids[1] != pids[2]
+    assert pids[2] == pids[3]
+
+
+def test_invoke_r_uses_pool_when_enabled():
+    """Test that `_invoke_R` gives the same output with and without the pool."""
+    r_cmd = 'cat("‘quoted’")'
+    one_shot = Linter._invoke_R(r_cmd)
+    r_pool.enable_pool(size=1)
+    try:
+        pooled = Linter._invoke_R(r_cmd)
+        assert r_pool.get_pool().check_health() == 1
+    finally:
+        r_pool.disable_pool()
+    assert pooled == one_shot
+    assert r_pool.get_pool() is None
+
+
+def test_pool_runs_multi_statement_lint_commands():
+    """Test that the combined lint command, which assigns variables, works through the pool."""
+    def lint_outputs():
+        return [Linter._invoke_R(Linter._combined_lintr_command(_RESTRICTED_FUNCTIONS_FILE, ["print"])[1])]
+
+    one_shot = lint_outputs()
+    r_pool.enable_pool(size=1)
+    try:
+        pooled = lint_outputs()
+    finally:
+        r_pool.disable_pool()
+
+    assert pooled == one_shot
+    for output in pooled:
+        assert any(error["info"].startswith('Function "print"') for error in Linter._parse_lintr_output(output))
+
+
+def test_failed_worker_start_releases_slot(monkeypatch):
+    """Test that workers which fail to start don't use up the pool's slots, which would deadlock later commands."""
+    def missing_rscript(*args, **kwargs):
+        raise FileNotFoundError("Rscript")
+
+    monkeypatch.setattr(r_pool, "RWorker", missing_rscript)
+    pool = RWorkerPool(size=1, preload=())
+    for _ in range(3):
+        with assert_raises(FileNotFoundError):
+            pool.run("1")
+    assert pool._slots.acquire(blocking=False)
+
+
+def test_use_pool_only_affects_this_thread():
+    """Test that a pool given to `use_pool` is used by this thread alone, until the block ends."""
+    session = object()
+    seen = []
+    with r_pool.use_pool(session):
+        seen.append(r_pool.get_pool())
+        thread = threading.Thread(target=lambda: seen.append(r_pool.get_pool()))
+        thread.start()
+        thread.join()
+    seen.append(r_pool.get_pool())
+    assert seen == [session, None, None]
@@ -0,0 +1,69 @@
+"""Tests for results.py."""
+import io
+import json
+
+from pytest import raises as assert_raises
+
+from ..tango.results import finalize, fold_records, read_records
+
+
+def _records_file(*records, tail=""):
+    """
+    Create a file of records as tester.R writes them.
+
+    Args:
+        records (dict): the records, one per line.
+        tail (str): text after the last complete line, e.g. a record cut off when R was killed.
+
+    Returns:
+        (io.StringIO) the records file
+    """
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records) + tail)
+
+
+def test_read_records_skips_incomplete_last_line():
+    """Test that a record cut off by the process being killed is ignored."""
+    records_file = _records_file({"outcome": "successes", "test_name": "a"}, tail='{"outcome": "succ')
+    assert [r["test_name"] for r in read_records(records_file)] == ["a"]
+
+
+def test_read_records_rejects_corrupt_lines():
+    """Test that complete lines which aren't records are errors."""
+    with assert_raises(ValueError):
+        list(read_records(io.StringIO("not json\n")))
+    with assert_raises(ValueError):
+        list(read_records(_records_file({"outcome": "skipped", "test_name": "a"})))
+
+
+def test_fold_records():
+    """Test that records are folded in order and the evaluation only passes if every test succeeded."""
+    evaluation = fold_records([
+        {"outcome": "successes", "test_name": "a"},
+        {"outcome": "failures", "test_name": "b"},
+        {"outcome": "successes", "test_name": "c"},
+        {"outcome": "errors", "test_name": "d"},
+    ])
+    runner = evaluation["runners"][0]
+    assert not evaluation["passed"]
+    assert runner["successes"] == [{"test_name": "a"}, {"test_name": "c"}]
+    assert runner["failures"] == [{"test_name": "b"}]
+    assert runner["errors"] == [{"test_name": "d"}]
+    assert runner["tests_run"] == 4
+    assert runner["runner_key"] == "testcases"
+
+    assert fold_records([{"outcome": "successes", "test_name": "a"}])["passed"]
+
+
+def test_fold_records_zero_tests():
+    """Test that having no tests at all is an error, as it was in tester.R."""
+    with assert_raises(ValueError):
+        fold_records([])
+
+
+def test_finalize_partial_run():
+    """Test that a run which was killed part way is graded on the tests which finished."""
+    out = io.StringIO()
+    finalize(_records_file({"outcome": "failures", "test_name": "a"}, tail='{"outcome"'), out)
+    evaluation = json.loads(out.getvalue())
+    assert not evaluation["passed"]
+    assert evaluation["runners"][0]["tests_run"] == 1
@@ -0,0 +1,120 @@
+"""Tests for run_tests.py, the grading image's entrypoint."""
+import importlib.util
+import json
+import shutil
+import sys
+
+import yaml
+
+from os.path import dirname, join as joinpath
+
+from .. import tango
+from ..tango import config, orchestrator, pipeline, r_pool, tracing  # noqa: F401 imported for run_tests.py
+
+PACKAGE_DIR = dirname(dirname(dirname(__file__)))
+EVALUATION_DIR = joinpath(PACKAGE_DIR, "evaluation")
+
+
+def _load_run_tests(monkeypatch):
+    """
+    Import run_tests.py, resolving its `tango` imports to the modules these tests use.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Used to alias the modules for the duration of the test.
+
+    Returns:
+        (module) the run_tests module
+    """
+    for name, module in list(sys.modules.items()):
+        if name == tango.__name__ or name.startswith(tango.__name__ + "."):
+            monkeypatch.setitem(sys.modules, "tango" + name[len(tango.__name__):], module)
+    spec = importlib.util.spec_from_file_location("run_tests", joinpath(PACKAGE_DIR, "run_tests.py"))
+    run_tests = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run_tests)
+    return run_tests
+
+
+def _exercise(tmp_path, monkeypatch):
+    """
+    Copy the example exercise with its testing tools, and import run_tests.py to grade it.
+
+    Args:
+        tmp_path (pathlib.Path): directory to copy the exercise to.
+        monkeypatch (pytest.MonkeyPatch): Used to import run_tests.py.
+
+    Returns:
+        (tuple[module, str]) the run_tests module, and the path to the copied config.yaml
+    """
+    exercise_dir = tmp_path / "exercise"
+    shutil.copytree(EVALUATION_DIR, str(exercise_dir), ignore=shutil.ignore_patterns("out"))
+    # Grading validates the submission, so its restrictions must be configured
+    config_yaml = yaml.safe_load((exercise_dir / "config.yaml").read_text())
+    for restriction, restricted in (("restricted_libraries", ["parallel"]), ("restricted_functions", ["system"])):
+        config_yaml[restriction] = {file: restricted for file in config_yaml["files"]}
+    (exercise_dir / "config.yaml").write_text(yaml.safe_dump(config_yaml))
+    run_tests = _load_run_tests(monkeypatch)
+    monkeypatch.setattr(run_tests, "TANGO_HOME", str(exercise_dir))
+    return run_tests, str(exercise_dir / "config.yaml")
+
+
+def _results(out_dir):
+    """
+    Read the results of grading, keeping only the outcome of each test.
+
+    Args:
+        out_dir (pathlib.Path): directory the results were written to.
+
+    Returns:
+        (dict) validation.json, quality.json and the outcomes of evaluation.json
+    """
+    results = {name: json.loads((out_dir / f"{name}.json").read_text()) for name in ("validation", "quality")}
+    evaluation = json.loads((out_dir / "evaluation.json").read_text())["runners"][0]
+    results["evaluation"] = sorted(
+        (outcome, record["test_name"])
+        for outcome in ("successes", "failures", "errors")
+        for record in evaluation[outcome]
+    )
+    return results
+
+
+def test_grade_with_pool(tmp_path, monkeypatch):
+    """Test that grading with the shared pool of R workers, as `serve` does, gives the same results as without."""
+    run_tests, config_yaml_file = _exercise(tmp_path, monkeypatch)
+    for out_dir in ("one-shot", "pooled"):
+        (tmp_path / out_dir).mkdir()
+
+    assert run_tests.grade(config_yaml_file, str(tmp_path / "one-shot"))
+    pool = r_pool.enable_pool(size=1)
+    try:
+        assert run_tests.grade(config_yaml_file, str(tmp_path / "pooled"))
+        worker = pool._idle.get_nowait()
+        assert worker.jobs_run > 0
+        pool._idle.put(worker)
+    finally:
+        r_pool.disable_pool()
+
+    assert _results(tmp_path / "pooled") == _results(tmp_path / "one-shot")
+
+
+def test_grade_in_session(tmp_path, monkeypatch):
+    """Test that grading in one R session, as --session does, validates, lints and tests as one-shot R would."""
+    run_tests, config_yaml_file = _exercise(tmp_path, monkeypatch)
+    for out_dir in ("one-shot", "session"):
+        (tmp_path / out_dir).mkdir()
+    commands = []
+
+    class RecordingSession(r_pool.RWorkerPool):
+        def run_with_status(self, r_cmd, timeout=None):
+            """Record each command run in the session."""
+            commands.append(r_cmd)
+            return super().run_with_status(r_cmd, timeout)
+
+    monkeypatch.setattr(run_tests, "RWorkerPool", RecordingSession)
+    assert run_tests.grade(config_yaml_file, str(tmp_path / "one-shot"))
+    assert not commands
+    assert run_tests.grade_in_session(config_yaml_file, str(tmp_path / "session"))
+
+    assert _results(tmp_path / "session") == _results(tmp_path / "one-shot")
+    # Validation and linting ran in the session as well as the tests
+    assert any("lint(" in r_cmd for r_cmd in commands)
+    assert any("tester.R" in r_cmd for r_cmd in commands)
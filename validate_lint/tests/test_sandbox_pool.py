@@ -0,0 +1,164 @@
+"""Tests for sandbox_pool.py."""
+import os
+import subprocess
+import sys
+
+from pytest import raises as assert_raises
+
+from ..tango.sandbox_pool import DockerSandbox, ProcessSandbox, SandboxError, SandboxPool
+
+# Serves jobs as run_tests.py --serve does, writing its pid to out/pid
+_FAKE_SERVER = r'''
+import os, sys, time
+for line in sys.stdin:
+    job_dir = line.strip()
+    if job_dir.endswith("hang"):
+        time.sleep(60)
+    if job_dir.endswith("fail"):
+        print("error: bad submission", flush=True)
+        continue
+    with open(os.path.join(job_dir, "out", "pid"), "w") as f:
+        f.write(str(os.getpid()))
+    print("ok", flush=True)
+'''
+
+
+def _start_fake():
+    """
+    Start a local process sandbox which fakes grading.
+
+    Returns:
+        (ProcessSandbox) the sandbox
+    """
+    return ProcessSandbox([sys.executable, "-c", _FAKE_SERVER], timeout=10)
+
+
+def _job(tmp_path, name):
+    """
+    Create a job directory.
+
+    Args:
+        tmp_path (pathlib.Path): directory to create the job in.
+        name (str): name of the job.
+
+    Returns:
+        (pathlib.Path) the job directory
+    """
+    job_dir = tmp_path / name
+    (job_dir / "out").mkdir(parents=True)
+    return job_dir
+
+
+def test_process_sandbox_grades_jobs(tmp_path):
+    """Test that a sandbox grades one job after another and reports failures."""
+    with _start_fake() as sandbox:
+        sandbox.run(str(_job(tmp_path, "a")))
+        sandbox.run(str(_job(tmp_path, "b")))
+        assert (tmp_path / "a" / "out" / "pid").read_text() == (tmp_path / "b" / "out" / "pid").read_text()
+        with assert_raises(SandboxError):
+            sandbox.run(str(_job(tmp_path, "fail")))
+        assert sandbox.alive()
+        assert sandbox.jobs_run == 3
+
+
+def test_process_sandbox_timeout_stops_sandbox(tmp_path):
+    """Test that a sandbox which doesn't reply in time is stopped."""
+    with _start_fake() as sandbox:
+        with assert_raises(SandboxError):
+            sandbox.run(str(_job(tmp_path, "hang")), timeout=0.5)
+        assert not sandbox.alive()
+
+
+def test_pool_recycles_sandboxes(tmp_path):
+    """Test that sandboxes are reused for up to max_jobs jobs, then replaced."""
+    pool = SandboxPool(_start_fake, size=1, max_jobs=2)
+    try:
+        pids = []
+        for i in range(4):
+            pool.run(str(_job(tmp_path, f"job{i}")))
+            pids.append((tmp_path / f"job{i}" / "out" / "pid").read_text())
+        assert pids[0] == pids[1] != pids[2] == pids[3]
+    finally:
+        pool.close()
+
+
+def test_pool_replaces_dead_sandboxes(tmp_path):
+    """Test that a sandbox which timed out is replaced rather than handed to the next job."""
+    pool = SandboxPool(_start_fake, size=1, max_jobs=10)
+    try:
+        with assert_raises(SandboxError):
+            pool.run(str(_job(tmp_path, "hang")), timeout=0.5)
+        pool.run(str(_job(tmp_path, "after")))
+        assert (tmp_path / "after" / "out" / "pid").exists()
+    finally:
+        pool.close()
+
+
+def test_pool_survives_failing_starts(tmp_path):
+    """Test that a replacement sandbox which can't be started fails the next job instead of losing its slot."""
+    starts = []
+
+    def start_sandbox():
+        """Start a sandbox the first and fifth times, failing in between."""
+        starts.append(len(starts))
+        if len(starts) in (2, 3, 4):
+            raise OSError("docker is not running")
+        return _start_fake()
+
+    pool = SandboxPool(start_sandbox, size=1, max_jobs=1, start_attempts=3, retry_delay=0.01)
+    try:
+        pool.run(str(_job(tmp_path, "first")))
+        with assert_raises(SandboxError, match="after 3 attempts: OSError: docker is not running"):
+            pool.run(str(_job(tmp_path, "failed")))
+        pool.run(str(_job(tmp_path, "recovered")))
+        assert (tmp_path / "recovered" / "out" / "pid").exists()
+        assert len(starts) == 5
+    finally:
+        pool.close()
+
+
+# Stands in for a grading container, with its job directory mounted at the path given as its argument
+_FAKE_CONTAINER = r'''
+import os, sys
+job_dir = sys.argv[1]
+for line in sys.stdin:
+    with open(os.path.join(job_dir, "out", "graded"), "w") as f:
+        f.write(line.strip() + " " + open(os.path.join(job_dir, "src", "answer.R")).read())
+    print("ok", flush=True)
+'''
+
+
+def test_docker_sandbox_sees_only_its_job(tmp_path, monkeypatch):
+    """Test that a container mounts only its own job directory, with the submission read-only, for each job."""
+    commands = []
+
+    def fake_docker(command, **kwargs):
+        """Record a docker command, running a process which serves the mounted directory in place of a container."""
+        commands.append(command)
+        if command[1] != "run":
+            return real_popen([sys.executable, "-c", ""], **kwargs)
+        host_dir = command[command.index("--mount") + 1].split(",")[1][len("src="):]
+        local_dir = host_dir.replace("/host/jobs", str(tmp_path / "jobs"), 1)
+        return real_popen([sys.executable, "-c", _FAKE_CONTAINER, local_dir], **kwargs)
+
+    real_popen = subprocess.Popen
+    monkeypatch.setattr(subprocess, "Popen", fake_docker)
+    job = _job(tmp_path / "jobs", "job-1")
+    (job / "src").mkdir()
+    (job / "src" / "answer.R").write_text("x <- 1")
+    (job / "testcases").mkdir()
+    sandbox = DockerSandbox(str(tmp_path / "jobs"), host_jobs_dir="/host/jobs", timeout=10)
+    try:
+        sandbox.run(str(job))
+        assert (job / "out" / "graded").read_text() == "/home/tango/job x <- 1"
+    finally:
+        sandbox.close()
+
+    mounts = [commands[0][i + 1] for i, arg in enumerate(commands[0]) if arg == "--mount"]
+    assert mounts == [
+        f"type=bind,src=/host/jobs/{sandbox.name},dst=/home/tango/job",
+        f"type=bind,src=/host/jobs/{sandbox.name}/src,dst=/home/tango/job/src,readonly=true",
+        f"type=bind,src=/host/jobs/{sandbox.name}/testcases,dst=/home/tango/job/testcases,readonly=true",
+    ]
+    assert commands[1] == ["docker", "kill", sandbox.name]
+    assert os.listdir(str(tmp_path / "jobs")) == ["job-1"]
@@ -0,0 +1,77 @@
+"""Tests for scoring.py."""
+import io
+import json
+
+from ..tango import scoring
+from ..tango.linter import Linter
+from ..tango.scoring import LintColumns, ScoringPolicy
+
+
+def _error(severity, message):
+    """
+    Create a style error.
+
+    Args:
+        severity (str): the error's type.
+        message (str): the error's info.
+
+    Returns:
+        (dict[str: (str | int)]) the error
+    """
+    return {"file_path": "a.R", "line_number": 1, "column_number": 1, "type": severity, "info": message}
+
+
+QUOTES = _error("style", "Only use double-quotes.")
+SPACES = _error("info", "Put spaces around all infix operators.")
+WARNING = _error("warning", "local variable 'x' assigned but may not be used")
+
+
+def test_linter_scores_unchanged():
+    """Test that Linter scores with 0.05 per error, or once per "info" message when ignoring multiple errors."""
+    errors = [QUOTES, QUOTES, SPACES, SPACES, WARNING]
+    assert Linter._score_file_by_errors(iter(errors), ignore_multiple=False) == 1.0 - 5 * 0.05
+    assert Linter._score_file_by_errors(iter(errors), ignore_multiple=True) == 1.0 - 0.05
+    assert Linter._score_file_by_errors(iter([QUOTES] * 30), ignore_multiple=False) == 0
+    assert Linter._score_file_by_errors(iter([]), ignore_multiple=True) == 1.0
+
+
+def test_score_batch_with_weights_and_caps():
+    """Test that every submission in a batch is scored with per-severity weights and per-message caps."""
+    columns = LintColumns()
+    assert columns.add([QUOTES] * 4 + [WARNING]) == 0
+    assert columns.add([]) == 1
+    assert columns.add([SPACES, WARNING, WARNING]) == 2
+    assert columns.severity_names == ["style", "warning", "info"]
+    assert list(columns.rules) == [0, 0, 0, 0, 1, 2, 1, 1]
+
+    policy = ScoringPolicy(weights={"warning": 0.25}, default_weight=0.1, rule_caps={QUOTES["info"]: 2})
+    assert columns.score(policy) == [1.0 - (0.1 * 2 + 0.25), 1.0, 1.0 - (0.1 + 0.25 * 2)]
+    assert columns.score() == [1.0 - 5 * 0.05, 1.0, 1.0 - 3 * 0.05]
+
+
+def test_cap_applies_across_severities():
+    """Test that a message's cap counts its errors of every severity together, deducting the most costly first."""
+    message = "Only use double-quotes."
+    columns = LintColumns()
+    columns.add([_error("style", message), _error("warning", message), _error("info", message), QUOTES])
+
+    policy = ScoringPolicy(weights={"warning": 0.25, "info": 0.01}, default_weight=0.1, rule_caps={message: 2})
+    assert columns.score(policy) == [1.0 - (0.25 + 0.1)]
+    # Repeats of a message at another severity don't cost more when ignoring multiple errors
+    errors = [_error("warning", SPACES["info"]), SPACES, _error("warning", SPACES["info"])]
+    assert Linter._score_file_by_errors(iter(errors), ignore_multiple=True) == 1.0 - 0.05
+
+
+def test_rescore_batch_output(monkeypatch, capsys):
+    """Test that the output of tango.batch is rescored, with no score for submissions which weren't linted."""
+    batch_output = "".join(json.dumps(result) + "\n" for result in [
+        {"submission": "alice", "validation": {}, "quality": {"runners": [{"errors": [QUOTES, QUOTES, SPACES]}]}},
+        {"submission": "bob", "validation": {}, "quality": None},
+    ])
+    monkeypatch.setattr(scoring.sys, "stdin", io.StringIO(batch_output))
+    scoring.main(["-", "--weight", "info=0", "--cap", "1"])
+
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+        {"submission": "alice", "score": 0.95},
+        {"submission": "bob", "score": None},
+    ]
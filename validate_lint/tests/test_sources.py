@@ -0,0 +1,64 @@
+"""Tests for sources.py."""
+import os
+
+from ..tango.sources import load_source
+from ..tango.validation import Validator
+
+
+def _write(tmp_path, name, data):
+    """
+    Write a file's bytes.
+
+    Args:
+        tmp_path (pathlib.Path): directory to write it to.
+        name (str): the file name.
+        data (bytes): the contents.
+
+    Returns:
+        (str) the path to the file
+    """
+    file = tmp_path / name
+    file.write_bytes(data)
+    return str(file)
+
+
+def test_load_source(tmp_path):
+    """Test that a source is decoded with text-mode line endings and tokenized."""
+    data = 'x <- 1\r\ny <- "é"\r\nz'.encode("utf-8")
+    source = load_source(_write(tmp_path, "a.R", data))
+    assert source.text == 'x <- 1\ny <- "é"\nz'
+    assert [(token.line, token.value) for token in source.tokens][:3] == [(1, "x"), (1, "<-"), (1, "1")]
+    assert [(token.line, token.value) for token in source.tokens][-1] == (3, "z")
+
+
+def test_load_empty_source(tmp_path):
+    """Test that an empty file, which can't be memory-mapped, is read as no tokens."""
+    source = load_source(_write(tmp_path, "empty.R", b""))
+    assert (source.text, source.tokens) == ("", [])
+
+
+def test_source_shared_until_changed(tmp_path):
+    """Test that checks share a file's source, which is read again once the file changes."""
+    file = _write(tmp_path, "a.R", b"library(stats)\n")
+    source = load_source(file)
+    assert load_source(file) is source
+    assert Validator._check_restricted_libs(file, {"stats"})[0]["line_number"] == 1
+    assert load_source(file) is source
+
+    _write(tmp_path, "a.R", b"\nlibrary(utils)\n")
+    os.utime(file, ns=(0, 0))
+    assert load_source(file).text == "\nlibrary(utils)\n"
+    assert Validator._check_restricted_libs(file, {"utils"})[0]["line_number"] == 2
+
+
+def test_source_read_again_when_rewritten_in_place(tmp_path):
+    """Test that a file rewritten with the same size and modification time is read again."""
+    file = _write(tmp_path, "a.R", b"library(stats)\n")
+    stat = os.stat(file)
+    assert Validator._check_restricted_libs(file, {"stats"})
+
+    _write(tmp_path, "a.R", b"library(utils)\n")
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(file).st_size == stat.st_size
+    assert load_source(file).text == "library(utils)\n"
+    assert not Validator._check_restricted_libs(file, {"stats"})
@@ -0,0 +1,48 @@
+"""Tests for tokenizer.py."""
+from ..tango import tokenizer
+from ..tango.tokenizer import Token
+
+
+def test_tokens_have_positions():
+    """Test that tokens record their line, column and offset, across multi-line tokens."""
+    tokens = list(tokenizer.tokenize('x <- "a\nb"\n  y'))
+    assert tokens == [
+        Token(tokenizer.SYMBOL, "x", 1, 1, 0),
+        Token(tokenizer.WHITESPACE, " ", 1, 2, 1),
+        Token(tokenizer.OPERATOR, "<-", 1, 3, 2),
+        Token(tokenizer.WHITESPACE, " ", 1, 5, 4),
+        Token(tokenizer.STRING, '"a\nb"', 1, 6, 5),
+        Token(tokenizer.NEWLINE, "\n", 2, 3, 10),
+        Token(tokenizer.WHITESPACE, "  ", 3, 1, 11),
+        Token(tokenizer.SYMBOL, "y", 3, 3, 13),
+    ]
+
+
+def test_tokens_cover_whole_text():
+    """Test that concatenating the tokens gives back the code, even when it is invalid."""
+    code = "f <- function(x) {\n  `my var` <- r\"-(a)\")-\" # comment\n  x %in% c(1.5e3L, 0xFF, .5) |> g(\n'open"
+    assert "".join(token.value for token in tokenizer.tokenize(code)) == code
+
+
+def test_literals_and_operators():
+    """Test that strings, backticks, raw strings, numbers and multi-character operators are single tokens."""
+    tokens = tokenizer.significant_tokens("a::b; c:::d; `e f` <<- r\"[g]\" %% 'h\\'i' -> .j; 1e-3")
+    assert [(t.type, t.value) for t in tokens] == [
+        (tokenizer.SYMBOL, "a"), (tokenizer.OPERATOR, "::"), (tokenizer.SYMBOL, "b"), (tokenizer.PUNCTUATION, ";"),
+        (tokenizer.SYMBOL, "c"), (tokenizer.OPERATOR, ":::"), (tokenizer.SYMBOL, "d"), (tokenizer.PUNCTUATION, ";"),
+        (tokenizer.SYMBOL, "`e f`"), (tokenizer.OPERATOR, "<<-"), (tokenizer.STRING, 'r"[g]"'),
+        (tokenizer.OPERATOR, "%%"), (tokenizer.STRING, "'h\\'i'"), (tokenizer.OPERATOR, "->"),
+        (tokenizer.SYMBOL, ".j"), (tokenizer.PUNCTUATION, ";"), (tokenizer.NUMBER, "1e-3"),
+    ]
+    assert [tokenizer.unquote(tokens[i]) for i in (8, 10, 12)] == ["e f", "g", "h'i"]
+
+
+def test_call_arguments():
+    """Test that call arguments are split at top-level commas and matched by name or position."""
+    tokens = tokenizer.significant_tokens('f(g(1, 2), key = "value",\n  x[1, 2])')
+    args = tokenizer.call_arguments(tokens, 1)
+    assert ["".join(t.value for t in arg) for arg in args] == ["g(1,2)", 'key="value"', "x[1,2]"]
+    assert tokenizer.argument_value(args, 0, "key")[1] == "value"
+    assert tokenizer.argument_value(args, 0, "other") is None  # g(1, 2) isn't a plain name
+    assert tokenizer.is_call(tokens, 0)
+    assert not tokenizer.is_call(tokenizer.significant_tokens("x$f()"), 2)
@@ -0,0 +1,121 @@
+"""Tests for tracing.py."""
+import io
+import subprocess
+
+from pytest import raises as assert_raises
+
+from ..tango import linter, tracing
+from ..tango.linter import Linter
+from ..tango.pipeline import Stage, run_stages
+from ..tango.tracing import HistogramRegistry, JsonLogSink, Span, read_spans
+
+
+class _ListSink:
+    """A sink which keeps every span."""
+
+    def __init__(self):
+        """Create an empty sink."""
+        self.spans = []
+
+    def record(self, span):
+        """
+        Keep a span.
+
+        Args:
+            span (Span): the finished span.
+        """
+        self.spans.append(span)
+
+
+def test_span_sent_to_sinks():
+    """Test that finished spans go to every enabled sink, with errors recorded, and nowhere once disabled."""
+    sink = _ListSink()
+    log = io.StringIO()
+    tracing.enable_tracing(sink, JsonLogSink(log))
+    try:
+        with tracing.span("invoke_R", kind="lintr", file="a.R") as span:
+            span.set(exit_status=0)
+        with assert_raises(ValueError):
+            with tracing.span("invoke_R", kind="lintr"):
+                raise ValueError()
+    finally:
+        tracing.disable_tracing()
+    with tracing.span("invoke_R"):
+        pass
+
+    assert [span.attributes.get("error") for span in sink.spans] == [None, "ValueError"]
+    assert [span.failed for span in sink.spans] == [False, True]
+    assert sink.spans[0].duration >= 0
+    logged = list(read_spans(io.StringIO(log.getvalue())))
+    assert [span.to_json() for span in logged] == [span.to_json() for span in sink.spans]
+
+
+def test_read_spans_skips_incomplete_line():
+    """Test that a span being written when a process was killed is ignored."""
+    log = io.StringIO('{"name": "lint", "start": 0, "duration": 1.5, "kind": "style"}\n{"name": "li')
+    assert [(span.name, span.duration, span.kind) for span in read_spans(log)] == [("lint", 1.5, "style")]
+
+
+def test_histogram_percentiles():
+    """Test that percentiles are interpolated within buckets, by name and optionally kind."""
+    registry = HistogramRegistry(buckets=(1.0, 2.0, 4.0))
+    for duration in (0.5, 0.5, 1.5, 3.0):
+        registry.record(Span("invoke_R", {"kind": "lintr"}, duration=duration))
+    registry.record(Span("invoke_R", {"kind": "toolchain"}, duration=10.0))
+
+    assert registry.percentile("invoke_R", 50, kind="lintr") == 1.0
+    assert registry.percentile("invoke_R", 75, kind="lintr") == 2.0
+    assert registry.percentile("invoke_R", 100) == 4.0
+    assert registry.percentile("tester", 50) is None
+
+
+def test_prometheus_text():
+    """Test that histograms are rendered with cumulative buckets, sums, counts and failures."""
+    registry = HistogramRegistry(buckets=(1.0, 2.0))
+    registry.record(Span("tester", {"kind": "tester", "exit_status": 1}, duration=0.5))
+    registry.record(Span("tester", {"kind": "tester", "exit_status": 0}, duration=1.5))
+    text = registry.prometheus_text()
+
+    labels = 'span="tester",kind="tester"'
+    assert f'tango_span_duration_seconds_bucket{{{labels},le="1.0"}} 1\n' in text
+    assert f'tango_span_duration_seconds_bucket{{{labels},le="2.0"}} 2\n' in text
+    assert f'tango_span_duration_seconds_bucket{{{labels},le="+Inf"}} 2\n' in text
+    assert f"tango_span_duration_seconds_sum{{{labels}}} 2.0\n" in text
+    assert f"tango_span_duration_seconds_count{{{labels}}} 2\n" in text
+    assert f"tango_span_failures_total{{{labels}}} 1\n" in text
+
+
+def test_invoke_r_records_exit_status(monkeypatch, capsys):
+    """Test that a failed Rscript has its exit status and error output traced and passed on."""
+    def failing_run(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 1, stdout="", stderr="Error: no lintr\n")
+
+    monkeypatch.setattr(linter.subprocess, "run", failing_run)
+    sink = _ListSink()
+    tracing.enable_tracing(sink)
+    try:
+        assert Linter._invoke_R("library(lintr)", kind="lintr", file="a.R") == ""
+    finally:
+        tracing.disable_tracing()
+
+    [span] = sink.spans
+    assert (span.name, span.kind, span.attributes["file"]) == ("invoke_R", "lintr", "a.R")
+    assert span.attributes["exit_status"] == 1
+    assert span.attributes["stderr"] == "Error: no lintr\n"
+    assert capsys.readouterr().err == "Error: no lintr\n"
+
+
+def test_validation_stages_traced():
+    """Test that each stage run on each file is traced with what it found."""
+    stages = [Stage("syntax", "syntax", lambda file: ([], ["error"] if file == "b.R" else []))]
+    sink = _ListSink()
+    tracing.enable_tracing(sink)
+    try:
+        run_stages(stages, ["a.R", "b.R"], lambda group, file: {})
+    finally:
+        tracing.disable_tracing()
+
+    assert [(span.name, span.kind, span.attributes["file"], span.attributes["errors"]) for span in sink.spans] == [
+        ("validate", "syntax", "a.R", 0),
+        ("validate", "syntax", "b.R", 1),
+    ]
@@ -6,6 +6,7 @@ from os.path import abspath, dirname, join as joinpath
 import yaml
 
 from pytest import raises as assert_raises
+from ..tango.config import load_config
 from ..tango.validation import Validator
 
 PATH_TO_TEST_RES = joinpath(dirname(__file__), "validation_test_res")
@@ -66,7 +67,7 @@ def _read_file(file):
 def test_exceptions():
     """Tests if the code properly throws exceptions when a file doesn't exist or not."""
     with assert_raises(FileNotFoundError):
-        Validator._read_config('not_config.yaml')
+        load_config('not_config.yaml')
 
     with assert_raises(FileNotFoundError):
         Validator.validate(_test_file('no_r_config.yaml'))
@@ -74,40 +75,11 @@ def test_exceptions():
 
 def test_read_config():
     """Tests to see if the config file is read properly."""
-    config = Validator._read_config(_test_file("config.yaml"))
-
-    expected_config = {
-        "files": [
-            'file1.R',
-            'file2.R'
-        ],
-        "restricted_libraries": {
-            'file1.R': [
-                'lib1',
-                'lib2',
-                'lib3'
-            ],
-            'file2.R': [
-                'lib4',
-                'lib5',
-                'lib6'
-            ]
-        },
-        "restricted_functions": {
-            'file1.R': [
-                'func1',
-                'func2',
-                'func3'
-            ],
-            'file2.R': [
-                'func0',
-                'func1',
-                'func2'
-            ]
-        }
-    }
-
-    assert config == expected_config
+    config = load_config(_test_file("config.yaml"))
+
+    assert config.files == ("file1.R", "file2.R")
+    assert config.restrictions("file1.R") == ({"lib1", "lib2", "lib3"}, {"func1", "func2", "func3"})
+    assert config.restrictions("file2.R") == ({"lib4", "lib5", "lib6"}, {"func0", "func1", "func2"})
 
 
 def test_get_used_libraries():
@@ -281,3 +253,109 @@ def test_success():
     assert successes[1]["info"] == "No restricted functions used"
     assert successes[2]["type"] == "syntax"
     assert successes[2]["info"] == "No syntax errors found"
+
+
+def test_installed_libraries_found_once(monkeypatch, tmp_path):
+    """Test that R is asked for the installed libraries once, and that the snapshot is invalidated by library mtimes."""
+    lib_dir = tmp_path / "library"
+    lib_dir.mkdir()
+    calls = []
+
+    def fake_invoke_r(r_cmd, **kwargs):
+        calls.append(r_cmd)
+        return f"{lib_dir}\n--\nbase\nutils\n"
+
+    monkeypatch.setattr(Validator, "_invoke_R", fake_invoke_r)
+    monkeypatch.setattr(Validator, "_installed_libraries", None)
+    monkeypatch.setattr(Validator, "installed_libraries_snapshot", str(tmp_path / "snapshot.json"))
+
+    assert Validator._get_installed_libraries() == frozenset({"base", "utils"})
+    assert Validator._get_installed_libraries() == frozenset({"base", "utils"})
+    assert len(calls) == 1
+
+    # A new process reads the snapshot instead of running R
+    monkeypatch.setattr(Validator, "_installed_libraries", None)
+    assert Validator._get_installed_libraries() == frozenset({"base", "utils"})
+    assert len(calls) == 1
+
+    # Installing a package changes the library directory so the snapshot is stale
+    (lib_dir / "newpkg").mkdir()
+    monkeypatch.setattr(Validator, "_installed_libraries", None)
+    Validator._get_installed_libraries()
+    assert len(calls) == 2
+
+
+def test_installed_libraries_failures(monkeypatch, tmp_path):
+    """Test that R failing to list packages is a clear error, and that a malformed snapshot is ignored."""
+    snapshot = tmp_path / "snapshot.json"
+    monkeypatch.setattr(Validator, "_installed_libraries", None)
+    monkeypatch.setattr(Validator, "installed_libraries_snapshot", str(snapshot))
+    monkeypatch.setattr(Validator, "_invoke_R", lambda r_cmd, **kwargs: "")
+    with assert_raises(RuntimeError, match="installed R packages"):
+        Validator._get_installed_libraries()
+
+    for text in ('{"libraries": ["base"]}', '["base"]', '{"lib_paths": {}, "libraries": 1}'):
+        snapshot.write_text(text)
+        assert Validator._load_installed_libraries_snapshot() is None
+
+
+def test_get_used_libraries_from_tokens():
+    """Test that library use is found in multi-line calls and namespaces, but not in comments or strings."""
+    code = (
+        '# library(commented)\n'
+        'print("library(quoted)")\n'
+        'library(\n'
+        '  package = "multiline"\n'
+        ')\n'
+        'suppressMessages(require(nested)); x <- dplyr::filter(y)\n'
+        'if (requireNamespace("ns", quietly = TRUE)) loadNamespace(package = \'loaded\')\n'
+        'test_library(notalib); obj$library(notalib); library(paste0("not", "literal"))\n'
+    )
+    assert Validator._get_used_libraries(code) == [
+        (3, "multiline"),
+        (6, "nested"),
+        (6, "dplyr"),
+        (7, "ns"),
+        (7, "loaded"),
+    ]
+
+
+def test_restricted_functions_found_without_r(tmp_path):
+    """Test that the tokenizer finds direct, quoted, namespaced and indirect calls to restricted functions."""
+    code = tmp_path / "code.R"
+    code.write_text(
+        'print("eval(x)")  # eval(y)\n'
+        'x <- base::`eval`(quote(1))\n'
+        'do.call("Sys.sleep", list(1)); f <- match.fun(FUN = print)\n'
+        'obj$eval(1); printer(2); sapply(1:3, "eval")\n'
+    )
+    failures = Validator._check_restricted_functions(str(code), ["print", "eval", "Sys.sleep"])
+    assert [(f["info"].split(" ")[1], f["line_number"], f["column_number"]) for f in failures] == [
+        ("print", 1, 1),
+        ("eval", 2, 12),
+        ("Sys.sleep", 3, 9),
+        ("print", 3, 53),
+    ]
+    for failure in failures:
+        assert failure["type"] == "restricted function"
+        assert failure["file_path"] == str(code)
+
+    assert Validator._check_restricted_functions(str(code), []) == []
+
+
+def test_restricted_functions_used_as_values(tmp_path):
+    """Test that restricted functions are found when they are assigned or passed to other functions, as lintr does."""
+    code = tmp_path / "code.R"
+    code.write_text(
+        'f <- eval; f(1)\n'
+        'sapply(1, eval)\n'
+        'Map(Sys.getenv, "HOME")\n'
+        'g <- function(eval, x = print) list(eval = x$eval, source = utils::head)\n'
+    )
+    failures = Validator._check_restricted_functions(str(code), ["eval", "Sys.getenv", "print", "source"])
+    assert [(f["info"].split(" ")[1], f["line_number"], f["column_number"]) for f in failures] == [
+        ("eval", 1, 6),
+        ("eval", 2, 11),
+        ("Sys.getenv", 3, 5),
+        ("print", 4, 25),
+    ]